@@ -1,12 +1,50 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from .config import settings
 
 
+# Drivers assíncronos equivalentes aos síncronos de DATABASE_URL
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+def async_database_url(url: str) -> str:
+    """DATABASE_URL com o driver assíncrono (postgresql+psycopg2 -> postgresql+asyncpg)."""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        return url
+    return parsed.set(drivername=f"{parsed.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
 engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
 # Fabrica sessões para uso por request (FastAPI dependency)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Mesmo banco para os handlers async: as queries não bloqueiam o event loop
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL), pool_pre_ping=True
+)
+# expire_on_commit=False: objetos seguem legíveis após o commit sem novo SELECT
+# (em sessão assíncrona não há lazy load implícito)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def _sqlite_wal(dbapi_connection, _):
+    # Os dois engines abrem conexões próprias no mesmo arquivo: em WAL a
+    # leitura de um não trava a escrita do outro (no modo padrão, uma
+    # transação assíncrona aberta fazia o engine síncrono esperar o
+    # busy timeout com o event loop parado)
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.close()
+
+
+if engine.dialect.name == "sqlite":
+    event.listen(engine, "connect", _sqlite_wal)
+    event.listen(async_engine.sync_engine, "connect", _sqlite_wal)
+
 # Classe base para modelos do SQLAlchemy
 Base = declarative_base()
 
@@ -20,3 +58,7 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """Como get_db, com AsyncSession (routers async def)."""
+    async with AsyncSessionLocal() as db:
+        yield db
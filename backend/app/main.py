@@ -1,10 +1,31 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 # Configurações da aplicação (variáveis de ambiente, CORS, etc.)
 from .config import settings
+from .database import async_engine, engine
+from .middleware import RequestContextMiddleware, count_queries
 # Rotas principais da API
 from .routers import auth, analyze, history, admin, chat, reports, training, enrichment, dashboard, kanban
+from .services import analysis_jobs, llm_cache, llm_providers, llm_usage, parse_pool
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Inicializa e encerra recursos compartilhados do processo."""
+    parse_pool.start_pool()
+    await analysis_jobs.start_workers()
+    llm_usage.start_flusher()
+    llm_cache.start_flusher()
+    yield
+    await analysis_jobs.stop_workers()
+    await llm_providers.close_provider()
+    await llm_usage.stop_flusher()
+    await llm_cache.stop_flusher()
+    parse_pool.shutdown_pool()
+    await async_engine.dispose()
 
 
 # Instância principal do FastAPI
@@ -13,7 +34,8 @@ app = FastAPI(
     description="Plataforma de Inteligência para Vendas com RAG e IA",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Middleware de CORS para permitir o frontend acessar a API em ambiente local
@@ -25,6 +47,13 @@ app.add_middleware(
     allow_headers=["*"]
 )
 
+# Endpoint e usuário de cada requisição, para atribuir o custo das chamadas ao LLM
+# (e queries SQL por requisição, no header X-DB-Queries)
+app.add_middleware(RequestContextMiddleware)
+if settings.DB_QUERY_COUNT_HEADER:
+    count_queries(engine)
+    count_queries(async_engine.sync_engine)
+
 
 @app.get("/health")
 def health():
@@ -0,0 +1,111 @@
+"""
+Contexto por requisição (endpoint e usuário)
+
+Guarda em uma contextvar qual endpoint e qual usuário originaram o trabalho
+em andamento, para que serviços profundos (ex.: a contabilidade de chamadas
+ao LLM) saibam a quem atribuir o custo sem receber isso por parâmetro.
+O mesmo contexto conta as queries SQL da requisição, devolvidas no header
+X-DB-Queries (DB_QUERY_COUNT_HEADER) para o teste de carga.
+"""
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from jose import JWTError, jwt
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .config import settings
+
+
+_request_context: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar(
+    "request_context", default=None
+)
+
+
+def _user_id_from_scope(scope: Dict[str, Any]) -> Optional[int]:
+    """Id do usuário no token Bearer (sem validar no banco; só para atribuição)."""
+    for name, value in scope.get("headers", []):
+        if name == b"authorization" and value[:7].lower() == b"bearer ":
+            try:
+                payload = jwt.decode(value[7:].decode(), settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+                return int(payload.get("sub"))
+            except (JWTError, TypeError, ValueError):
+                return None
+    return None
+
+
+def current_endpoint() -> Optional[str]:
+    """Endpoint atual, com os parâmetros de path no formato da rota
+    ("GET /analyze/jobs/{job_id}"), ou o rótulo dado por `work_context`."""
+    ctx = _request_context.get()
+    if ctx is None:
+        return None
+    scope = ctx.get("scope")
+    if scope is None:
+        return ctx.get("endpoint")
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    if path is None:
+        path = scope.get("path", "")
+        for name, value in (scope.get("path_params") or {}).items():
+            path = path.replace(f"/{value}", f"/{{{name}}}")
+    return f"{scope.get('method', '')} {scope.get('root_path', '')}{path}"
+
+
+def current_user_id() -> Optional[int]:
+    ctx = _request_context.get()
+    return ctx.get("user_id") if ctx else None
+
+
+def current_query_count() -> int:
+    ctx = _request_context.get()
+    return ctx.get("db_queries", 0) if ctx else 0
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany) -> None:
+    # O dict do contexto é o mesmo nas rotas síncronas (threadpool copia a contextvar)
+    ctx = _request_context.get()
+    if ctx is not None:
+        ctx["db_queries"] = ctx.get("db_queries", 0) + 1
+
+
+def count_queries(engine: Engine) -> None:
+    """Passa a contar, no contexto atual, as queries executadas pelo engine."""
+    if not event.contains(engine, "before_cursor_execute", _count_query):
+        event.listen(engine, "before_cursor_execute", _count_query)
+
+
+@contextmanager
+def work_context(endpoint: str, user_id: Optional[int] = None) -> Iterator[None]:
+    """Contexto para trabalho fora de requisições (jobs, scripts)."""
+    token = _request_context.set({"endpoint": endpoint, "user_id": user_id})
+    try:
+        yield
+    finally:
+        _request_context.reset(token)
+
+
+class RequestContextMiddleware:
+    """Middleware ASGI que abre o contexto de cada requisição HTTP."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        ctx = {"scope": scope, "user_id": _user_id_from_scope(scope), "db_queries": 0}
+        token = _request_context.set(ctx)
+
+        async def send_with_query_count(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-queries", str(ctx["db_queries"]).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_query_count if settings.DB_QUERY_COUNT_HEADER else send)
+        finally:
+            _request_context.reset(token)
@@ -1,9 +1,17 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, UniqueConstraint
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, UniqueConstraint, JSON, LargeBinary
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import deferred, relationship, validates
 from datetime import datetime
+from typing import Optional
+import json
+import zlib
 from .database import Base
 
 
+# JSONB no Postgres (indexável, sem reparse no servidor); JSON (texto) nos demais bancos
+JSONColumn = JSON(none_as_null=True).with_variant(JSONB(none_as_null=True), "postgresql")
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -27,11 +35,20 @@ class PageAnalysis(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     url = Column(Text, nullable=False)
+    canonical_key = Column(Text, nullable=True, index=True)  # URL normalizada usada no cache (services/url_canonical.py)
     title = Column(Text, nullable=True)
-    raw_text = Column(Text, nullable=True)
-    summary = Column(Text, nullable=True)
-    key_points = Column(Text, nullable=True)  # Armazenado como JSON (string) de lista
-    entities = Column(Text, nullable=True)    # Armazenado como JSON (string) de dicionário
+    # Conteúdo da análise: adiado (grupo "content"), carregado no primeiro acesso
+    # a qualquer um dos três ou com undefer_group("content") na query. O texto
+    # extraído da página fica em PageAnalysisText (ver `raw_text`)
+    summary = deferred(Column(Text, nullable=True), group="content")
+    key_points = deferred(Column(Text, nullable=True), group="content")  # Armazenado como JSON (string) de lista
+    entities = deferred(Column(JSONColumn, nullable=True), group="content")  # Dicionário de entidades (LLM, enriquecimento, pipeline)
+    # Campos de `entities` lidos em listagens e agregações (dashboard, kanban,
+    # histórico), copiados em colunas próprias a cada atribuição de `entities`
+    industry = Column(String(100), nullable=True, index=True)
+    sales_potential = Column(String(50), nullable=True, index=True)  # Alto, Médio, Baixo
+    has_enrichment = Column(Boolean, default=False, nullable=False, index=True)
+    tech_stack = Column(JSONColumn, nullable=True)  # Lista de tecnologias
     stage = Column(String(50), default='lead', nullable=False)  # Pipeline stage
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
@@ -47,6 +64,73 @@ class PageAnalysis(Base):
     notes = relationship("AnalysisNote", back_populates="analysis", cascade="all, delete-orphan")
     attachments = relationship("AnalysisAttachment", back_populates="analysis", cascade="all, delete-orphan")
 
+    # Texto extraído (comprimido) em tabela própria, fora da linha lida pelas listagens
+    text_blob = relationship("PageAnalysisText", uselist=False, cascade="all, delete-orphan")
+
+    @property
+    def raw_text(self) -> Optional[str]:
+        """Texto extraído da página (uma query à parte no primeiro acesso;
+        em listas, use selectinload(PageAnalysis.text_blob))."""
+        return self.text_blob.text if self.text_blob else None
+
+    @raw_text.setter
+    def raw_text(self, value: Optional[str]) -> None:
+        if value is None:
+            self.text_blob = None
+        elif self.text_blob is None:
+            self.text_blob = PageAnalysisText(text=value)
+        else:
+            self.text_blob.text = value
+
+    @validates("entities")
+    def _sync_entity_columns(self, key, entities):
+        """Mantém as colunas derivadas em dia com o dicionário de entidades.
+
+        Atribua sempre um dicionário novo: mutações no mesmo objeto não são
+        detectadas pelo SQLAlchemy (nem passam por aqui).
+        """
+        if isinstance(entities, str):
+            entities = json.loads(entities) if entities else None
+        data = entities if isinstance(entities, dict) else {}
+        self.industry = _entity_str(data.get("industry"), 100)
+        self.sales_potential = _entity_str(data.get("sales_potential"), 50)
+        self.has_enrichment = bool(data.get("enriched_data"))
+        self.tech_stack = _entity_list(data.get("tech_stack"))
+        return entities
+
+
+def _entity_str(value, max_length: int):
+    if not isinstance(value, str) or not value.strip():
+        return None
+    return value.strip()[:max_length]
+
+
+def _entity_list(value):
+    if isinstance(value, str):
+        value = [value] if value.strip() else []
+    if not isinstance(value, list):
+        return []
+    return [str(item) for item in value if item]
+
+
+class PageAnalysisText(Base):
+    """Texto extraído da página analisada, comprimido com zlib"""
+    __tablename__ = "page_analysis_texts"
+
+    analysis_id = Column(Integer, ForeignKey("page_analyses.id", ondelete="CASCADE"), primary_key=True)
+    content = Column(LargeBinary, nullable=False)  # zlib(UTF-8)
+    size_bytes = Column(Integer, nullable=False, default=0)  # tamanho sem compressão
+
+    @property
+    def text(self) -> str:
+        return zlib.decompress(self.content).decode("utf-8")
+
+    @text.setter
+    def text(self, value: str) -> None:
+        data = value.encode("utf-8")
+        self.content = zlib.compress(data, 6)
+        self.size_bytes = len(data)
+
 
 class ChatMessage(Base):
     """Histórico de mensagens do chat RAG"""
@@ -116,3 +200,88 @@ class AnalysisAttachment(Base):
     # Relacionamentos
     analysis = relationship("PageAnalysis", back_populates="attachments")
     user = relationship("User")
+
+
+class PageSnapshot(Base):
+    """Último fetch HTTP de uma URL (validadores para GET condicional + hash do texto)"""
+    __tablename__ = "page_snapshots"
+
+    id = Column(Integer, primary_key=True, index=True)
+    url = Column(Text, nullable=False, unique=True, index=True)
+    analysis_id = Column(Integer, ForeignKey("page_analyses.id", ondelete="CASCADE"), nullable=True)
+    etag = Column(String(255), nullable=True)
+    last_modified = Column(String(64), nullable=True)
+    content_hash = Column(String(64), nullable=True)  # sha256 do texto normalizado
+    fetched_at = Column(DateTime, default=datetime.utcnow, nullable=False)  # último 200 com conteúdo
+    checked_at = Column(DateTime, default=datetime.utcnow, nullable=False)  # última verificação (200 ou 304)
+
+    analysis = relationship("PageAnalysis")
+
+
+class AnalysisJob(Base):
+    """Job assíncrono de análise (POST /analyze com async_job)"""
+    __tablename__ = "analysis_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    url = Column(Text, nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    params = Column(Text, nullable=True)  # JSON com refresh/crawl/max_pages
+    status = Column(String(20), default="queued", nullable=False, index=True)  # queued, running, done, failed
+    stage = Column(String(50), nullable=True)  # Última fase: fetched, summarized, enriched...
+    error = Column(Text, nullable=True)
+    analysis_id = Column(Integer, ForeignKey("page_analyses.id", ondelete="SET NULL"), nullable=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    # Relacionamentos
+    owner = relationship("User")
+    analysis = relationship("PageAnalysis")
+
+
+class AnalysisClaim(Base):
+    """Análise em andamento por URL (single-flight entre processos)"""
+    __tablename__ = "analysis_claims"
+
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(Text, nullable=False, unique=True)
+    token = Column(String(32), nullable=False)  # identifica o dono do claim
+    claimed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False)  # claim expirado pode ser tomado por outro worker
+
+
+class LLMCacheEntry(Base):
+    """Resposta do LLM em cache, por impressão digital do prompt"""
+    __tablename__ = "llm_cache_entries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String(64), nullable=False, unique=True, index=True)  # sha256(model, messages, temperature, max_tokens)
+    call_site = Column(String(100), nullable=False, index=True)
+    model = Column(String(100), nullable=False)
+    response = Column(Text, nullable=False)  # JSON da resposta da API
+    size_bytes = Column(Integer, nullable=False, default=0)
+    hits = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_hit_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)  # ordem de despejo (LRU)
+    expires_at = Column(DateTime, nullable=False)
+
+
+class LLMCallRecord(Base):
+    """Registro (somente inserção) de cada chamada ao LLM, para custo e latência"""
+    __tablename__ = "llm_call_records"
+
+    id = Column(Integer, primary_key=True, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    call_site = Column(String(100), nullable=False, index=True)  # ex.: analysis.summary
+    endpoint = Column(String(200), nullable=True, index=True)  # ex.: "POST /analyze/", "job:analysis"
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True)
+    provider = Column(String(50), nullable=False)
+    model = Column(String(100), nullable=False)
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    completion_tokens = Column(Integer, nullable=False, default=0)
+    latency_ms = Column(Integer, nullable=False, default=0)
+    cache_hit = Column(Boolean, nullable=False, default=False)
+    attempts = Column(Integer, nullable=False, default=1)
+    error = Column(String(300), nullable=True)  # tipo e mensagem do erro final, se falhou
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, undefer_group
 from typing import List
 
 # Modelos e dependências de banco/segurança
@@ -7,6 +7,10 @@ from .. import models, schemas
 from ..database import get_db
 from ..security import get_current_user_payload
 from ..services.text_formatter import format_title, format_summary, format_key_points
+from ..services.parse_pool import pool_stats
+from ..services.llm_cache import cache_stats
+from ..services.llm_client import gateway_stats
+from ..services.llm_usage import rollup
 
 
 router = APIRouter()
@@ -45,7 +49,7 @@ def update_role(user_id: int, body: UpdateRole, db: Session = Depends(get_db), u
 @router.get("/analyses", response_model=List[schemas.HistoryItem])
 def list_all_analyses(db: Session = Depends(get_db), user=Depends(get_current_user_payload)):
     _ensure_admin(user)
-    rows = db.query(models.PageAnalysis).order_by(models.PageAnalysis.created_at.desc()).limit(200).all()
+    rows = db.query(models.PageAnalysis).options(undefer_group("content")).order_by(models.PageAnalysis.created_at.desc()).limit(200).all()
     import json
     return [
         schemas.HistoryItem(
@@ -54,10 +58,45 @@ def list_all_analyses(db: Session = Depends(get_db), user=Depends(get_current_us
             title=format_title(r.title),
             summary=format_summary(r.summary),
             key_points=format_key_points(json.loads(r.key_points) if r.key_points else []),
-            entities=json.loads(r.entities) if r.entities else None,
+            entities=r.entities,
             created_at=r.created_at,
         )
         for r in rows
     ]
 
 
+@router.get("/metrics/parse-pool")
+def parse_pool_metrics(user=Depends(get_current_user_payload)):
+    """Métricas do pool de parsing HTML (profundidade da fila, tarefas inline)."""
+    _ensure_admin(user)
+    return pool_stats()
+
+
+@router.get("/metrics/llm-cache")
+def llm_cache_metrics(user=Depends(get_current_user_payload)):
+    """Acertos/erros do cache de respostas do LLM por call site e tamanho da tabela."""
+    _ensure_admin(user)
+    return cache_stats()
+
+
+@router.get("/metrics/llm")
+def llm_gateway_metrics(user=Depends(get_current_user_payload)):
+    """Latência, tokens, erros e retries por call site e ocupação das faixas de prioridade."""
+    _ensure_admin(user)
+    return gateway_stats()
+
+
+@router.get("/metrics/llm-usage")
+def llm_usage_metrics(
+    group_by: str = "endpoint",
+    days: int = 7,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user_payload),
+):
+    """Chamadas, tokens (total e por dia) e latência p50/p95 do LLM agrupados
+    por endpoint, user, call_site, model ou day."""
+    _ensure_admin(user)
+    try:
+        return {"group_by": group_by, "days": days, "rows": rollup(db, group_by=group_by, days=days)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
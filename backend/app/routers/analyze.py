@@ -1,69 +1,144 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, undefer_group
 import json
 from typing import List
 
 # Modelos, schemas e dependências
 from .. import models, schemas
-from ..database import get_db
+from ..config import settings
+from ..database import SessionLocal, get_async_db, get_db
 from ..security import get_current_user_payload
 # Serviços de scraping e sumarização
-from ..services.scraper import fetch_url
-from ..services.llm import summarize_text
+from ..services.analysis_runner import FetchError, find_analysis_async, run_analysis
+from ..services.analysis_jobs import create_job, job_events, job_payload
+from ..services.bulk_analysis import analyze_bulk, parse_url_csv
 from ..services.text_formatter import format_content_for_display, format_title, format_summary, format_key_points, process_markdown_formatting
 from ..services.comparison import compare_companies
-from ..services.market_analysis import analyze_market_trends, generate_sales_strategy
 
 
 router = APIRouter()
 
 
-@router.post("/", response_model=schemas.AnalyzeResponse)
-async def analyze(request: schemas.AnalyzeRequest, db: Session = Depends(get_db), user=Depends(get_current_user_payload)):
-    # Evita reprocessar a mesma URL (cache no banco)
-    existing = db.query(models.PageAnalysis).filter(models.PageAnalysis.url == str(request.url)).first()
-    if existing:
+@router.post("/", response_model=schemas.AnalyzeResponse, responses={202: {"model": schemas.AnalysisJobOut}})
+async def analyze(request: schemas.AnalyzeRequest, db: AsyncSession = Depends(get_async_db), user=Depends(get_current_user_payload)):
+    owner_id = int(user.get("sub")) if user else None
+    async_job = settings.ANALYZE_ASYNC_DEFAULT if request.async_job is None else request.async_job
+
+    # Cache hit (o caso mais comum) responde pela sessão assíncrona
+    existing = await find_analysis_async(db, str(request.url))
+    if existing and not request.refresh:
         return _to_response(existing)
+    await db.close()
 
-    try:
-        title, raw_text = await fetch_url(str(request.url))
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to fetch URL: {e}")
-
-    llm_out = await summarize_text(raw_text)
-
-    # Análise adicional de mercado e estratégia
-    market_analysis = await analyze_market_trends(llm_out.get("entities", {}))
-    sales_strategy = await generate_sales_strategy(llm_out.get("entities", {}))
-
-    # Persiste resultado com deduplicação
-    analysis = models.PageAnalysis(
-        url=str(request.url),
-        title=title,
-        raw_text=raw_text,
-        summary=llm_out.get("summary"),
-        key_points=json.dumps(llm_out.get("key_points", [])),
-        entities=json.dumps({
-            **llm_out.get("entities", {}),
-            "market_analysis": market_analysis,
-            "sales_strategy": sales_strategy,
-            "sentiment_analysis": llm_out.get("sentiment_analysis", {}),
-            "market_context": llm_out.get("market_context", {}),
-            "sales_insights": llm_out.get("sales_insights", {}),
-            "risk_assessment": llm_out.get("risk_assessment", {})
-        }),
-        owner_id=int(user.get("sub")) if user else None,
+    # Jobs e o executor de análise são compartilhados com os workers e o
+    # bulk, em sessão síncrona: cada passo de banco roda numa thread
+    with SessionLocal() as sync_db:
+        if async_job:
+            # O resto vira job (202 + URLs de status/eventos)
+            job = await create_job(sync_db, str(request.url), owner_id, {
+                "refresh": request.refresh,
+                "crawl": request.crawl,
+                "max_pages": request.max_pages,
+            })
+            return JSONResponse(
+                status_code=202,
+                content=jsonable_encoder(_job_response(job)),
+                headers={"Location": f"/analyze/jobs/{job.id}"},
+            )
+
+        try:
+            analysis = await run_analysis(
+                sync_db,
+                str(request.url),
+                owner_id=owner_id,
+                refresh=request.refresh,
+                crawl=request.crawl,
+                max_pages=request.max_pages,
+            )
+        except FetchError as e:
+            raise HTTPException(status_code=400, detail=f"Failed to fetch URL: {e}")
+        return _to_response(analysis)
+
+
+def _bulk_response(urls: List[str], user, crawl: bool) -> StreamingResponse:
+    if not urls:
+        raise HTTPException(status_code=400, detail="Nenhuma URL informada")
+    if len(urls) > settings.BULK_MAX_URLS:
+        raise HTTPException(status_code=400, detail=f"Máximo de {settings.BULK_MAX_URLS} URLs por lote")
+
+    async def ndjson():
+        async for item in analyze_bulk(urls, owner_id=int(user.get("sub")), crawl=crawl):
+            yield json.dumps(item, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+@router.post("/bulk")
+async def analyze_bulk_urls(request: schemas.BulkAnalyzeRequest, user=Depends(get_current_user_payload)):
+    """
+    Analisa uma lista de URLs; responde NDJSON, uma linha por URL conforme terminam.
+
+    Cada linha traz status (cached/succeeded/failed) e o progresso; a última
+    linha é `{"summary": {...}}`.
+    """
+    return _bulk_response(request.urls, user, request.crawl)
+
+
+@router.post("/bulk/csv")
+async def analyze_bulk_csv(
+    file: UploadFile = File(...),
+    crawl: bool = Form(False),
+    user=Depends(get_current_user_payload),
+):
+    """Como /analyze/bulk, mas lendo as URLs de um CSV (coluna url/website/site)."""
+    urls = parse_url_csv(await file.read())
+    return _bulk_response(urls, user, crawl)
+
+
+def _get_job(db: Session, job_id: int, user) -> models.AnalysisJob:
+    job = db.get(models.AnalysisJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    if user.get("role") != "admin" and job.owner_id != int(user.get("sub")):
+        raise HTTPException(status_code=403, detail="Acesso negado a este job")
+    return job
+
+
+def _job_response(job: models.AnalysisJob) -> schemas.AnalysisJobOut:
+    analysis = _to_response(job.analysis) if job.status == "done" and job.analysis else None
+    return schemas.AnalysisJobOut(
+        **job_payload(job),
+        status_url=f"/analyze/jobs/{job.id}",
+        events_url=f"/analyze/jobs/{job.id}/events",
+        analysis=analysis,
+    )
+
+
+@router.get("/jobs/{job_id}", response_model=schemas.AnalysisJobOut)
+def get_analysis_job(job_id: int, db: Session = Depends(get_db), user=Depends(get_current_user_payload)):
+    """Status de um job de análise; inclui a análise quando `done`."""
+    return _job_response(_get_job(db, job_id, user))
+
+
+@router.get("/jobs/{job_id}/events")
+def analysis_job_events(job_id: int, db: Session = Depends(get_db), user=Depends(get_current_user_payload)):
+    """Progresso do job via Server-Sent Events (fetched, summarized, enriched, done/failed)."""
+    _get_job(db, job_id, user)
+    return StreamingResponse(
+        job_events(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    db.add(analysis)
-    db.commit()
-    db.refresh(analysis)
-    return _to_response(analysis)
 
 
 def _to_response(analysis: models.PageAnalysis) -> schemas.AnalyzeResponse:
     # Parseia JSON
     key_points = json.loads(analysis.key_points) if analysis.key_points else []
-    entities = json.loads(analysis.entities) if analysis.entities else {}
+    entities = analysis.entities or {}
     
     # Processa formatação markdown
     formatted_summary = process_markdown_formatting(analysis.summary)
@@ -84,7 +159,7 @@ def _to_response(analysis: models.PageAnalysis) -> schemas.AnalyzeResponse:
 @router.post("/compare")
 async def compare_analyses(
     analysis_ids: List[int],
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(get_current_user_payload)
 ):
     """
@@ -105,9 +180,13 @@ async def compare_analyses(
         )
     
     # Busca análises do banco
-    analyses = db.query(models.PageAnalysis).filter(
-        models.PageAnalysis.id.in_(analysis_ids)
-    ).all()
+    analyses = (await db.execute(
+        select(models.PageAnalysis).options(undefer_group("content")).where(
+            models.PageAnalysis.id.in_(analysis_ids)
+        )
+    )).scalars().all()
+    # Libera a conexão antes da chamada ao LLM
+    await db.close()
     
     if len(analyses) != len(analysis_ids):
         raise HTTPException(
@@ -7,43 +7,40 @@ Combina:
 - LLM (GPT-4) para gerar respostas contextualizadas
 """
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload, undefer_group
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import Any, Dict, List, Tuple
 import json
 
 from .. import models, schemas
-from ..database import get_db
+from ..database import AsyncSessionLocal, get_async_db
 from ..security import get_current_user_payload
 from ..services.embeddings import find_similar_analyses
 from ..services.web_search import enriched_search
 from ..services.text_formatter import process_markdown_formatting
+from ..services.llm_client import chat_completion, stream_chat_completion
 from ..config import settings
 
 
 router = APIRouter()
 
 
-@router.post("/", response_model=schemas.ChatResponse)
-async def chat(
+async def _prepare_chat(
     request: schemas.ChatRequest,
-    db: Session = Depends(get_db),
-    user=Depends(get_current_user_payload)
-):
-    """
-    Endpoint principal do chat RAG.
-    
-    Fluxo:
-    1. Busca análises similares no banco (RAG)
-    2. Opcionalmente faz web search
-    3. Monta contexto rico
-    4. Envia para GPT-4
-    5. Salva pergunta e resposta no histórico
-    """
-    user_id = int(user.get("sub"))
+    db: AsyncSession,
+    user_id: int,
+) -> Tuple[str, List[Dict[str, str]], List[schemas.ChatSource]]:
+    """Passos comuns ao chat e ao stream: contexto (RAG + web), histórico e fontes."""
     
     # ===== 1. RAG SIMPLIFICADO: Busca análises relevantes =====
-    all_analyses = db.query(models.PageAnalysis).all()
+    all_analyses = (await db.execute(
+        select(models.PageAnalysis).options(
+            undefer_group("content"), selectinload(models.PageAnalysis.text_blob)
+        )
+    )).scalars().all()
     analyses_data = [
         {
             'id': a.id,
@@ -57,6 +54,18 @@ async def chat(
         for a in all_analyses
     ]
     
+    # ===== 2. Busca histórico de conversa recente =====
+    chat_history = (await db.execute(
+        select(models.ChatMessage)
+        .where(models.ChatMessage.user_id == user_id)
+        .order_by(models.ChatMessage.created_at.desc())
+        .limit(request.max_history)
+    )).scalars().all()
+    chat_history.reverse()  # Ordem cronológica
+    # Encerra a transação de leitura antes de embeddings, busca na web e LLM:
+    # a conexão volta ao pool enquanto a requisição espera a rede
+    await db.commit()
+    
     # Busca análises similares (método tradicional mais rápido)
     similar_analyses = await find_similar_analyses(
         request.message,
@@ -64,7 +73,7 @@ async def chat(
         top_k=3
     )
     
-    # ===== 2. Web Search (se habilitado) =====
+    # ===== 3. Web Search (se habilitado) =====
     web_results = []
     if request.use_web_search:
         enriched = await enriched_search(
@@ -76,14 +85,6 @@ async def chat(
     else:
         scraped_content = []
     
-    # ===== 3. Busca histórico de conversa recente =====
-    chat_history = db.query(models.ChatMessage)\
-        .filter(models.ChatMessage.user_id == user_id)\
-        .order_by(models.ChatMessage.created_at.desc())\
-        .limit(request.max_history)\
-        .all()
-    chat_history.reverse()  # Ordem cronológica
-    
     # ===== 4. Monta contexto para o LLM =====
     context_parts = []
     
@@ -130,17 +131,7 @@ async def chat(
             "content": msg.content
         })
     
-    # ===== 6. Chama GPT-4 com contexto rico =====
-    response_text = await generate_rag_response(
-        user_message=request.message,
-        context=full_context,
-        conversation_history=conversation_history
-    )
-    
-    # ===== 7. Processa formatação markdown =====
-    formatted_response = process_markdown_formatting(response_text)
-    
-    # ===== 8. Prepara fontes usadas =====
+    # ===== 6. Prepara fontes usadas =====
     sources = []
     
     # Adiciona análises como fontes
@@ -161,14 +152,24 @@ async def chat(
             snippet=result['snippet']
         ))
     
-    # ===== 9. Salva no histórico do banco =====
+    return full_context, conversation_history, sources
+
+
+async def _save_exchange(
+    db: AsyncSession,
+    user_id: int,
+    question: str,
+    answer: str,
+    sources: List[schemas.ChatSource],
+) -> None:
+    """Salva pergunta e resposta no histórico do usuário."""
     sources_json = json.dumps([s.dict() for s in sources])
     
     # Salva pergunta do usuário
     user_msg = models.ChatMessage(
         user_id=user_id,
         role='user',
-        content=request.message,
+        content=question,
         sources=None
     )
     db.add(user_msg)
@@ -177,11 +178,44 @@ async def chat(
     assistant_msg = models.ChatMessage(
         user_id=user_id,
         role='assistant',
-        content=formatted_response,
+        content=answer,
         sources=sources_json
     )
     db.add(assistant_msg)
-    db.commit()
+    await db.commit()
+
+
+@router.post("/", response_model=schemas.ChatResponse)
+async def chat(
+    request: schemas.ChatRequest,
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user_payload)
+):
+    """
+    Endpoint principal do chat RAG.
+    
+    Fluxo:
+    1. Busca análises similares no banco (RAG)
+    2. Opcionalmente faz web search
+    3. Monta contexto rico
+    4. Envia para GPT-4
+    5. Salva pergunta e resposta no histórico
+    """
+    user_id = int(user.get("sub"))
+    full_context, conversation_history, sources = await _prepare_chat(request, db, user_id)
+    
+    # ===== 7. Chama GPT-4 com contexto rico =====
+    response_text = await generate_rag_response(
+        user_message=request.message,
+        context=full_context,
+        conversation_history=conversation_history
+    )
+    
+    # ===== 8. Processa formatação markdown =====
+    formatted_response = process_markdown_formatting(response_text)
+    
+    # ===== 9. Salva no histórico do banco =====
+    await _save_exchange(db, user_id, request.message, formatted_response, sources)
     
     # ===== 10. Retorna resposta =====
     return schemas.ChatResponse(
@@ -191,20 +225,72 @@ async def chat(
     )
 
 
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@router.post("/stream")
+async def chat_stream(
+    request: schemas.ChatRequest,
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user_payload)
+):
+    """
+    Como POST /chat/, mas transmite a resposta via Server-Sent Events.
+    
+    Eventos: `delta` ({"content": trecho}) conforme o modelo gera e, no fim,
+    `done` (mensagem formatada e fontes, já salvas no histórico) ou `error`.
+    """
+    user_id = int(user.get("sub"))
+    full_context, conversation_history, sources = await _prepare_chat(request, db, user_id)
+    messages = _rag_messages(request.message, full_context, conversation_history)
+    
+    async def events():
+        parts = []
+        try:
+            async for delta in stream_chat_completion(
+                "chat.answer",
+                priority="interactive",
+                model=settings.OPENAI_MODEL,
+                messages=messages,
+                temperature=0.7,
+                max_tokens=1000
+            ):
+                parts.append(delta)
+                yield _sse("delta", {"content": delta})
+        except Exception as e:
+            print(f"Erro ao gerar resposta RAG (stream): {e}")
+            yield _sse("error", {"error": str(e)})
+            return
+        
+        formatted_response = process_markdown_formatting("".join(parts))
+        # A sessão da dependência já foi fechada quando o stream começa
+        async with AsyncSessionLocal() as save_db:
+            await _save_exchange(save_db, user_id, request.message, formatted_response, sources)
+        yield _sse("done", {"message": formatted_response, "sources": [s.dict() for s in sources]})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/history", response_model=List[schemas.ChatHistoryItem])
-def get_chat_history(
+async def get_chat_history(
     limit: int = 50,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(get_current_user_payload)
 ):
     """Retorna histórico de chat do usuário."""
     user_id = int(user.get("sub"))
     
-    messages = db.query(models.ChatMessage)\
-        .filter(models.ChatMessage.user_id == user_id)\
-        .order_by(models.ChatMessage.created_at.desc())\
-        .limit(limit)\
-        .all()
+    messages = (await db.execute(
+        select(models.ChatMessage)
+        .where(models.ChatMessage.user_id == user_id)
+        .order_by(models.ChatMessage.created_at.desc())
+        .limit(limit)
+    )).scalars().all()
     
     messages.reverse()  # Ordem cronológica
     
@@ -229,17 +315,18 @@ def get_chat_history(
 
 
 @router.delete("/history")
-def clear_chat_history(
-    db: Session = Depends(get_db),
+async def clear_chat_history(
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(get_current_user_payload)
 ):
     """Limpa todo o histórico de chat do usuário."""
     user_id = int(user.get("sub"))
     
-    db.query(models.ChatMessage)\
-        .filter(models.ChatMessage.user_id == user_id)\
-        .delete()
-    db.commit()
+    await db.execute(
+        delete(models.ChatMessage)
+        .where(models.ChatMessage.user_id == user_id)
+    )
+    await db.commit()
     
     return {"message": "Chat history cleared"}
 
@@ -261,9 +348,32 @@ async def generate_rag_response(
         Resposta gerada pelo LLM
     """
     try:
-        import openai
+        messages = _rag_messages(user_message, context, conversation_history)
+        
+        # Chama GPT-4
+        response = await chat_completion(
+            "chat.answer",
+            priority="interactive",
+            model=settings.OPENAI_MODEL,
+            messages=messages,
+            temperature=0.7,
+            max_tokens=1000
+        )
         
-        system_prompt = """Você é um assistente de vendas inteligente da BNA.dev.
+        return response['choices'][0]['message']['content']
+        
+    except Exception as e:
+        print(f"Erro ao gerar resposta RAG: {e}")
+        return f"Desculpe, ocorreu um erro ao processar sua pergunta. Por favor, tente novamente. (Erro: {str(e)})"
+
+
+def _rag_messages(
+    user_message: str,
+    context: str,
+    conversation_history: List[Dict[str, str]]
+) -> List[Dict[str, str]]:
+    """Mensagens para o LLM: prompt de sistema, histórico e pergunta com contexto."""
+    system_prompt = """Você é um assistente de vendas inteligente da BNA.dev.
 
 Seu papel é ajudar o time de vendas a pesquisar e entender empresas antes de reuniões.
 
@@ -286,16 +396,16 @@ FORMATO DE RESPOSTA:
 - Destaque informações-chave
 - Seja conciso mas completo"""
 
-        # Monta mensagens para GPT
-        messages = [
-            {"role": "system", "content": system_prompt}
-        ]
-        
-        # Adiciona histórico de conversa
-        messages.extend(conversation_history)
-        
-        # Adiciona pergunta atual com contexto
-        user_content = f"""CONTEXTO DISPONÍVEL:
+    # Monta mensagens para GPT
+    messages = [
+        {"role": "system", "content": system_prompt}
+    ]
+    
+    # Adiciona histórico de conversa
+    messages.extend(conversation_history)
+    
+    # Adiciona pergunta atual com contexto
+    user_content = f"""CONTEXTO DISPONÍVEL:
 {context}
 
 ===========================
@@ -305,19 +415,6 @@ PERGUNTA DO USUÁRIO:
 
 Por favor, responda a pergunta usando o contexto fornecido. Se usar informações específicas, mencione a fonte."""
 
-        messages.append({"role": "user", "content": user_content})
-        
-        # Chama GPT-4
-        response = await openai.ChatCompletion.acreate(
-            model=settings.OPENAI_MODEL,
-            messages=messages,
-            temperature=0.7,
-            max_tokens=1000
-        )
-        
-        return response['choices'][0]['message']['content']
-        
-    except Exception as e:
-        print(f"Erro ao gerar resposta RAG: {e}")
-        return f"Desculpe, ocorreu um erro ao processar sua pergunta. Por favor, tente novamente. (Erro: {str(e)})"
+    messages.append({"role": "user", "content": user_content})
+    return messages
 
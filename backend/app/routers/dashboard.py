@@ -2,24 +2,25 @@
 Router do Dashboard Executivo com Insights de IA
 """
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
+from sqlalchemy import func, desc, case, and_, or_, select
 from datetime import datetime, timedelta
 from typing import Dict, List, Any
 import json
 
 from .. import models, schemas
-from ..database import get_db
+from ..database import get_async_db
 from ..security import get_current_user_payload
 from ..config import settings
-import openai
+from ..services.llm_client import chat_completion
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
 
 @router.get("/")
 async def get_dashboard_data(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(get_current_user_payload)
 ):
     """
@@ -65,42 +66,47 @@ async def get_dashboard_data(
     }
 
 
-async def _calculate_kpis(db: Session, user_id: int) -> Dict[str, Any]:
+async def _count_analyses(db: AsyncSession, user_id: int, *conditions) -> int:
+    """Conta as análises do usuário que atendem às condições"""
+    return await db.scalar(
+        select(func.count(models.PageAnalysis.id)).where(
+            models.PageAnalysis.owner_id == user_id,
+            *conditions
+        )
+    )
+
+
+async def _calculate_kpis(db: AsyncSession, user_id: int) -> Dict[str, Any]:
     """Calcula KPIs principais"""
     
-    # Total de leads
-    total_leads = db.query(models.PageAnalysis).filter(
-        models.PageAnalysis.owner_id == user_id
-    ).count()
-    
-    # Leads hot (com enrichment ou score alto)
-    hot_leads_count = 0
-    analyses = db.query(models.PageAnalysis).filter(
-        models.PageAnalysis.owner_id == user_id
-    ).all()
-    
-    for analysis in analyses:
-        try:
-            entities = json.loads(analysis.entities) if analysis.entities else {}
-            if entities.get('enriched_data') or entities.get('sales_potential') == 'Alto':
-                hot_leads_count += 1
-        except:
-            pass
+    # Total de leads e leads hot (com enrichment ou potencial alto), em uma query
+    is_hot = or_(
+        models.PageAnalysis.has_enrichment.is_(True),
+        models.PageAnalysis.sales_potential == 'Alto'
+    )
+    total_leads, hot_leads_count = (await db.execute(
+        select(
+            func.count(models.PageAnalysis.id),
+            func.count(case((is_hot, 1)))
+        ).where(
+            models.PageAnalysis.owner_id == user_id
+        )
+    )).one()
     
     # Análises deste mês
     first_day_of_month = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    analyses_this_month = db.query(models.PageAnalysis).filter(
-        models.PageAnalysis.owner_id == user_id,
+    analyses_this_month = await _count_analyses(
+        db, user_id,
         models.PageAnalysis.created_at >= first_day_of_month
-    ).count()
+    )
     
     # Análises do mês anterior para calcular trend
     first_day_last_month = (first_day_of_month - timedelta(days=1)).replace(day=1)
-    analyses_last_month = db.query(models.PageAnalysis).filter(
-        models.PageAnalysis.owner_id == user_id,
+    analyses_last_month = await _count_analyses(
+        db, user_id,
         models.PageAnalysis.created_at >= first_day_last_month,
         models.PageAnalysis.created_at < first_day_of_month
-    ).count()
+    )
     
     analyses_trend = "+0%"
     if analyses_last_month > 0:
@@ -124,13 +130,21 @@ async def _calculate_kpis(db: Session, user_id: int) -> Dict[str, Any]:
     }
 
 
-async def _generate_ai_insights(db: Session, user_id: int) -> List[Dict[str, Any]]:
+async def _generate_ai_insights(db: AsyncSession, user_id: int) -> List[Dict[str, Any]]:
     """Gera insights automáticos com IA baseado nas análises recentes"""
     
-    # Busca análises recentes
-    recent_analyses = db.query(models.PageAnalysis).filter(
-        models.PageAnalysis.owner_id == user_id
-    ).order_by(desc(models.PageAnalysis.created_at)).limit(20).all()
+    # Busca análises recentes (só as colunas usadas, sem o JSON de entidades)
+    recent_analyses = (await db.execute(
+        select(
+            models.PageAnalysis.title,
+            models.PageAnalysis.industry,
+            models.PageAnalysis.tech_stack,
+            models.PageAnalysis.has_enrichment,
+            models.PageAnalysis.created_at
+        ).where(
+            models.PageAnalysis.owner_id == user_id
+        ).order_by(desc(models.PageAnalysis.created_at)).limit(20)
+    )).all()
     
     if not recent_analyses:
         return [{
@@ -146,26 +160,19 @@ async def _generate_ai_insights(db: Session, user_id: int) -> List[Dict[str, Any
     tech_stacks = {}
     
     for analysis in recent_analyses:
-        try:
-            entities = json.loads(analysis.entities) if analysis.entities else {}
-            
-            industry = entities.get('industry', 'N/A')
-            if industry != 'N/A':
-                industries[industry] = industries.get(industry, 0) + 1
-            
-            tech = entities.get('tech_stack', [])
-            if isinstance(tech, list):
-                for t in tech:
-                    tech_stacks[t] = tech_stacks.get(t, 0) + 1
-            
-            summary.append({
-                "company": analysis.title,
-                "industry": industry,
-                "created_at": analysis.created_at.strftime("%Y-%m-%d"),
-                "has_enrichment": bool(entities.get('enriched_data'))
-            })
-        except:
-            pass
+        industry = analysis.industry or 'N/A'
+        if industry != 'N/A':
+            industries[industry] = industries.get(industry, 0) + 1
+        
+        for t in analysis.tech_stack or []:
+            tech_stacks[t] = tech_stacks.get(t, 0) + 1
+        
+        summary.append({
+            "company": analysis.title,
+            "industry": industry,
+            "created_at": analysis.created_at.strftime("%Y-%m-%d"),
+            "has_enrichment": analysis.has_enrichment
+        })
     
     # Top indústria e tech
     top_industry = max(industries.items(), key=lambda x: x[1])[0] if industries else "N/A"
@@ -207,8 +214,13 @@ REGRAS:
 - Varie os tipos de insights
 """
     
+    # Encerra a transação de leitura: a conexão volta ao pool durante o LLM
+    await db.commit()
+    
     try:
-        resp = await openai.ChatCompletion.acreate(
+        resp = await chat_completion(
+            "dashboard.insights",
+            priority="interactive",
             model=settings.OPENAI_MODEL,
             messages=[
                 {"role": "system", "content": "Você é um analista de vendas B2B que gera insights acionáveis baseados em dados."},
@@ -273,43 +285,36 @@ REGRAS:
     }]
 
 
-async def _get_pipeline_distribution(db: Session, user_id: int) -> List[Dict[str, Any]]:
+async def _get_pipeline_distribution(db: AsyncSession, user_id: int) -> List[Dict[str, Any]]:
     """Distribuição do pipeline por estágio"""
     
     # Se tiver campo 'stage' no modelo (vamos assumir que não tem ainda)
     # Por ora, distribui baseado em metadados
     
-    analyses = db.query(models.PageAnalysis).filter(
-        models.PageAnalysis.owner_id == user_id
-    ).all()
+    # Lógica simples de classificação: enriquecido e com potencial alto = qualificado
+    is_qualified = and_(
+        models.PageAnalysis.has_enrichment.is_(True),
+        models.PageAnalysis.sales_potential == 'Alto'
+    )
+    total, qualified = (await db.execute(
+        select(
+            func.count(models.PageAnalysis.id),
+            func.count(case((is_qualified, 1)))
+        ).where(
+            models.PageAnalysis.owner_id == user_id
+        )
+    )).one()
     
     distribution = {
-        "Lead": 0,
-        "Qualificado": 0,
+        "Lead": total - qualified,
+        "Qualificado": qualified,
         "Proposta": 0,
         "Negociação": 0,
         "Fechado": 0
     }
     
-    for analysis in analyses:
-        try:
-            entities = json.loads(analysis.entities) if analysis.entities else {}
-            
-            # Lógica simples de classificação
-            if entities.get('enriched_data'):
-                if entities.get('sales_potential') == 'Alto':
-                    distribution["Qualificado"] += 1
-                else:
-                    distribution["Lead"] += 1
-            else:
-                distribution["Lead"] += 1
-                
-        except:
-            distribution["Lead"] += 1
-    
     # Se tudo está em Lead, distribui mock realista
-    if distribution["Lead"] == len(analyses) and len(analyses) > 0:
-        total = len(analyses)
+    if distribution["Lead"] == total and total > 0:
         distribution = {
             "Lead": int(total * 0.5),
             "Qualificado": int(total * 0.25),
@@ -321,19 +326,23 @@ async def _get_pipeline_distribution(db: Session, user_id: int) -> List[Dict[str
     return [{"stage": k, "count": v} for k, v in distribution.items()]
 
 
-async def _get_recent_activity(db: Session, user_id: int) -> List[Dict[str, Any]]:
+async def _get_recent_activity(db: AsyncSession, user_id: int) -> List[Dict[str, Any]]:
     """Timeline de atividade recente"""
     
     activities = []
     
     # Buscar usuário
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    user = await db.get(models.User, user_id)
     user_email = user.email if user else "Você"
     
     # Análises recentes
-    recent_analyses = db.query(models.PageAnalysis).filter(
-        models.PageAnalysis.owner_id == user_id
-    ).order_by(desc(models.PageAnalysis.created_at)).limit(10).all()
+    recent_analyses = (await db.execute(
+        select(models.PageAnalysis).options(
+            load_only(models.PageAnalysis.id, models.PageAnalysis.title, models.PageAnalysis.created_at)
+        ).where(
+            models.PageAnalysis.owner_id == user_id
+        ).order_by(desc(models.PageAnalysis.created_at)).limit(10)
+    )).scalars().all()
     
     for analysis in recent_analyses:
         activities.append({
@@ -346,10 +355,12 @@ async def _get_recent_activity(db: Session, user_id: int) -> List[Dict[str, Any]
         })
     
     # Chat messages recentes
-    recent_chats = db.query(models.ChatMessage).filter(
-        models.ChatMessage.user_id == user_id,
-        models.ChatMessage.role == 'user'
-    ).order_by(desc(models.ChatMessage.created_at)).limit(5).all()
+    recent_chats = (await db.execute(
+        select(models.ChatMessage).where(
+            models.ChatMessage.user_id == user_id,
+            models.ChatMessage.role == 'user'
+        ).order_by(desc(models.ChatMessage.created_at)).limit(5)
+    )).scalars().all()
     
     for chat in recent_chats:
         activities.append({
@@ -362,9 +373,11 @@ async def _get_recent_activity(db: Session, user_id: int) -> List[Dict[str, Any]
         })
     
     # Sessões de treinamento recentes
-    recent_training = db.query(models.TrainingSession).filter(
-        models.TrainingSession.user_id == user_id
-    ).order_by(desc(models.TrainingSession.created_at)).limit(5).all()
+    recent_training = (await db.execute(
+        select(models.TrainingSession).where(
+            models.TrainingSession.user_id == user_id
+        ).order_by(desc(models.TrainingSession.created_at)).limit(5)
+    )).scalars().all()
     
     for training in recent_training:
         activities.append({
@@ -382,7 +395,7 @@ async def _get_recent_activity(db: Session, user_id: int) -> List[Dict[str, Any]
     return activities[:15]
 
 
-async def _get_weekly_trends(db: Session, user_id: int) -> List[Dict[str, Any]]:
+async def _get_weekly_trends(db: AsyncSession, user_id: int) -> List[Dict[str, Any]]:
     """Tendência de análises por semana (últimas 8 semanas)"""
     
     trends = []
@@ -391,11 +404,11 @@ async def _get_weekly_trends(db: Session, user_id: int) -> List[Dict[str, Any]]:
         week_end = datetime.now() - timedelta(weeks=i)
         week_start = week_end - timedelta(weeks=1)
         
-        count = db.query(models.PageAnalysis).filter(
-            models.PageAnalysis.owner_id == user_id,
+        count = await _count_analyses(
+            db, user_id,
             models.PageAnalysis.created_at >= week_start,
             models.PageAnalysis.created_at < week_end
-        ).count()
+        )
         
         # Formata semana
         week_label = f"Sem {8-i}"
@@ -409,16 +422,25 @@ async def _get_weekly_trends(db: Session, user_id: int) -> List[Dict[str, Any]]:
     return list(reversed(trends))
 
 
-async def _get_top_leads(db: Session, user_id: int) -> List[Dict[str, Any]]:
+async def _get_top_leads(db: AsyncSession, user_id: int) -> List[Dict[str, Any]]:
     """Top leads da semana (gerados por IA)"""
     
     # Busca análises recentes (última semana)
     one_week_ago = datetime.now() - timedelta(weeks=1)
     
-    recent_analyses = db.query(models.PageAnalysis).filter(
-        models.PageAnalysis.owner_id == user_id,
-        models.PageAnalysis.created_at >= one_week_ago
-    ).order_by(desc(models.PageAnalysis.created_at)).limit(10).all()
+    recent_analyses = (await db.execute(
+        select(
+            models.PageAnalysis.id,
+            models.PageAnalysis.title,
+            models.PageAnalysis.url,
+            models.PageAnalysis.has_enrichment,
+            models.PageAnalysis.sales_potential,
+            models.PageAnalysis.tech_stack
+        ).where(
+            models.PageAnalysis.owner_id == user_id,
+            models.PageAnalysis.created_at >= one_week_ago
+        ).order_by(desc(models.PageAnalysis.created_at)).limit(10)
+    )).all()
     
     if not recent_analyses:
         return []
@@ -429,46 +451,34 @@ async def _get_top_leads(db: Session, user_id: int) -> List[Dict[str, Any]]:
     for analysis in recent_analyses:
         score = 50  # Base score
         
-        try:
-            entities = json.loads(analysis.entities) if analysis.entities else {}
-            
-            # +30 se tem enrichment
-            if entities.get('enriched_data'):
-                score += 30
-            
-            # +20 se tem tech stack identificado
-            if entities.get('tech_stack'):
-                score += 20
-            
-            # +10 se sales_potential é Alto
-            if entities.get('sales_potential') == 'Alto':
-                score += 10
-            
-            # Reason baseado no score
-            reasons = []
-            if entities.get('enriched_data'):
-                reasons.append("Perfil 360° completo")
-            if entities.get('sales_potential') == 'Alto':
-                reasons.append("Potencial alto identificado")
-            if entities.get('tech_stack'):
-                reasons.append(f"Stack: {', '.join(entities.get('tech_stack', [])[:2])}")
-            
-            scored_leads.append({
-                "company": analysis.title,
-                "deal_score": min(score, 100),
-                "reason": " • ".join(reasons) if reasons else "Análise básica completa",
-                "url": analysis.url,
-                "analysis_id": analysis.id
-            })
-            
-        except:
-            scored_leads.append({
-                "company": analysis.title,
-                "deal_score": 50,
-                "reason": "Análise em andamento",
-                "url": analysis.url,
-                "analysis_id": analysis.id
-            })
+        # +30 se tem enrichment
+        if analysis.has_enrichment:
+            score += 30
+        
+        # +20 se tem tech stack identificado
+        if analysis.tech_stack:
+            score += 20
+        
+        # +10 se sales_potential é Alto
+        if analysis.sales_potential == 'Alto':
+            score += 10
+        
+        # Reason baseado no score
+        reasons = []
+        if analysis.has_enrichment:
+            reasons.append("Perfil 360° completo")
+        if analysis.sales_potential == 'Alto':
+            reasons.append("Potencial alto identificado")
+        if analysis.tech_stack:
+            reasons.append(f"Stack: {', '.join(analysis.tech_stack[:2])}")
+        
+        scored_leads.append({
+            "company": analysis.title,
+            "deal_score": min(score, 100),
+            "reason": " • ".join(reasons) if reasons else "Análise básica completa",
+            "url": analysis.url,
+            "analysis_id": analysis.id
+        })
     
     # Ordena por score e retorna top 5
     scored_leads.sort(key=lambda x: x['deal_score'], reverse=True)
@@ -478,7 +488,7 @@ async def _get_top_leads(db: Session, user_id: int) -> List[Dict[str, Any]]:
 
 @router.get("/kpis")
 async def get_kpis_only(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(get_current_user_payload)
 ):
     """Retorna apenas os KPIs (endpoint mais leve)"""
@@ -489,7 +499,7 @@ async def get_kpis_only(
 
 @router.get("/insights")
 async def get_insights_only(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(get_current_user_payload)
 ):
     """Retorna apenas os insights de IA"""
@@ -4,7 +4,6 @@ Router para Enriquecimento Multi-Fonte
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
 from sqlalchemy.orm import Session
 from typing import Dict, Any
-import json
 
 from .. import models, schemas
 from ..database import get_db
@@ -51,10 +50,11 @@ async def enrich_analysis(
     enriched_data = await enrichment_service.enrich_company(domain, company_name)
     
     # Atualiza análise com dados enriquecidos
-    current_entities = json.loads(analysis.entities) if analysis.entities else {}
+    # Dicionário novo: a atribuição é o que grava o JSON e sincroniza has_enrichment
+    current_entities = dict(analysis.entities or {})
     current_entities['enriched_data'] = enriched_data
     
-    analysis.entities = json.dumps(current_entities, ensure_ascii=False)
+    analysis.entities = current_entities
     db.commit()
     db.refresh(analysis)
     
@@ -83,7 +83,7 @@ async def get_enrichment_status(
         raise HTTPException(status_code=404, detail="Análise não encontrada")
     
     # Verifica se tem dados enriquecidos
-    entities = json.loads(analysis.entities) if analysis.entities else {}
+    entities = analysis.entities or {}
     enriched_data = entities.get('enriched_data')
     
     if enriched_data:
@@ -142,10 +142,10 @@ async def _enrich_analysis_background(analysis_id: int, db: Session):
         
         enriched_data = await enrichment_service.enrich_company(domain, company_name)
         
-        current_entities = json.loads(analysis.entities) if analysis.entities else {}
+        current_entities = dict(analysis.entities or {})
         current_entities['enriched_data'] = enriched_data
         
-        analysis.entities = json.dumps(current_entities, ensure_ascii=False)
+        analysis.entities = current_entities
         db.commit()
         
         print(f"✅ Análise {analysis_id} enriquecida com sucesso")
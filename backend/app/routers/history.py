@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, undefer_group
 import json
 import csv
 import io
@@ -18,7 +18,7 @@ router = APIRouter()
 
 @router.get("/", response_model=list[schemas.HistoryItem])
 def list_history(db: Session = Depends(get_db), user=Depends(get_current_user_payload)):
-    q = db.query(models.PageAnalysis)
+    q = db.query(models.PageAnalysis).options(undefer_group("content"))
     # Se não for admin, restringe ao dono
     if not user or user.get("role") != "admin":
         q = q.filter(models.PageAnalysis.owner_id == int(user.get("sub")))
@@ -30,7 +30,7 @@ def list_history(db: Session = Depends(get_db), user=Depends(get_current_user_pa
             title=format_title(r.title),
             summary=format_summary(r.summary),
             key_points=format_key_points(json.loads(r.key_points) if r.key_points else []),
-            entities=json.loads(r.entities) if r.entities else None,
+            entities=r.entities,
             created_at=r.created_at,
         )
         for r in rows
@@ -42,7 +42,7 @@ def export_history_csv(db: Session = Depends(get_db), user=Depends(get_current_u
     """
     Exporta histórico de análises para CSV formatado para Google Sheets.
     """
-    q = db.query(models.PageAnalysis)
+    q = db.query(models.PageAnalysis).options(undefer_group("content"))
     # Se não for admin, restringe ao dono
     if not user or user.get("role") != "admin":
         q = q.filter(models.PageAnalysis.owner_id == int(user.get("sub")))
@@ -74,14 +74,12 @@ def export_history_csv(db: Session = Depends(get_db), user=Depends(get_current_u
         key_points_formatted = format_key_points(key_points)
         key_points_text = ' | '.join(key_points_formatted) if key_points_formatted else 'N/A'
         
-        # Parse entities
-        entities = json.loads(r.entities) if r.entities else {}
-        
         # Extrai campos das entidades
+        entities = r.entities or {}
         company = entities.get('company_name', 'N/A')
         products = ', '.join(entities.get('products', [])) if entities.get('products') else 'N/A'
         pricing = entities.get('pricing', 'N/A')
-        tech_stack = ', '.join(entities.get('tech_stack', [])) if entities.get('tech_stack') else 'N/A'
+        tech_stack = ', '.join(r.tech_stack) if r.tech_stack else 'N/A'
         contacts = ', '.join(entities.get('contacts', [])) if entities.get('contacts') else 'N/A'
         
         # Formata data
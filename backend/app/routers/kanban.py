@@ -2,13 +2,16 @@
 Router para Kanban Board do Pipeline de Vendas
 """
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, selectinload, undefer_group
+from datetime import datetime
 from typing import Dict, List, Any
 from pydantic import BaseModel
 import json
 
 from .. import models, schemas
-from ..database import get_db
+from ..database import get_async_db
 from ..security import get_current_user_payload
 
 router = APIRouter(prefix="/kanban", tags=["Kanban"])
@@ -16,6 +19,20 @@ router = APIRouter(prefix="/kanban", tags=["Kanban"])
 # Estágios válidos do pipeline
 VALID_STAGES = ['lead', 'qualified', 'proposal', 'negotiation', 'closed']
 
+# Colunas que os cards usam (sem raw_text nem o JSON de entidades)
+CARD_COLUMNS = load_only(
+    models.PageAnalysis.id,
+    models.PageAnalysis.title,
+    models.PageAnalysis.url,
+    models.PageAnalysis.stage,
+    models.PageAnalysis.created_at,
+    models.PageAnalysis.summary,
+    models.PageAnalysis.sales_potential,
+    models.PageAnalysis.industry,
+    models.PageAnalysis.has_enrichment,
+    models.PageAnalysis.owner_id
+)
+
 
 class UpdateStageRequest(BaseModel):
     stage: str
@@ -23,7 +40,7 @@ class UpdateStageRequest(BaseModel):
 
 @router.get("/pipeline")
 async def get_pipeline(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(get_current_user_payload)
 ):
     """
@@ -39,9 +56,11 @@ async def get_pipeline(
     user_id = int(user.get("sub"))
     
     # Busca todas as análises do usuário
-    analyses = db.query(models.PageAnalysis).filter(
-        models.PageAnalysis.owner_id == user_id
-    ).order_by(models.PageAnalysis.created_at.desc()).all()
+    analyses = (await db.execute(
+        select(models.PageAnalysis).options(CARD_COLUMNS).where(
+            models.PageAnalysis.owner_id == user_id
+        ).order_by(models.PageAnalysis.created_at.desc())
+    )).scalars().all()
     
     # Organiza por estágio
     pipeline = {stage: [] for stage in VALID_STAGES}
@@ -49,14 +68,6 @@ async def get_pipeline(
     for analysis in analyses:
         stage = analysis.stage or 'lead'
         
-        # Parse entities para incluir na resposta
-        entities = {}
-        try:
-            if analysis.entities:
-                entities = json.loads(analysis.entities)
-        except:
-            pass
-        
         # Monta card
         card = {
             "id": analysis.id,
@@ -65,9 +76,9 @@ async def get_pipeline(
             "stage": stage,
             "created_at": analysis.created_at.isoformat(),
             "summary": analysis.summary[:200] if analysis.summary else None,
-            "sales_potential": entities.get('sales_potential', 'Médio'),
-            "industry": entities.get('industry', 'N/A'),
-            "has_enrichment": bool(entities.get('enriched_data'))
+            "sales_potential": analysis.sales_potential or 'Médio',
+            "industry": analysis.industry or 'N/A',
+            "has_enrichment": analysis.has_enrichment
         }
         
         if stage in pipeline:
@@ -91,7 +102,7 @@ async def get_pipeline(
 async def update_analysis_stage(
     analysis_id: int,
     request: UpdateStageRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(get_current_user_payload)
 ):
     """
@@ -107,12 +118,14 @@ async def update_analysis_stage(
         )
     
     # Busca análise (permite owner ou seller)
-    analysis = db.query(models.PageAnalysis).filter(
-        models.PageAnalysis.id == analysis_id
-    ).filter(
-        (models.PageAnalysis.owner_id == user_id) | 
-        (models.PageAnalysis.seller_id == user_id)
-    ).first()
+    analysis = await db.scalar(
+        select(models.PageAnalysis).where(
+            models.PageAnalysis.id == analysis_id
+        ).where(
+            (models.PageAnalysis.owner_id == user_id) | 
+            (models.PageAnalysis.seller_id == user_id)
+        )
+    )
     
     if not analysis:
         raise HTTPException(status_code=404, detail="Análise não encontrada")
@@ -120,8 +133,8 @@ async def update_analysis_stage(
     old_stage = analysis.stage
     analysis.stage = request.stage
     
-    db.commit()
-    db.refresh(analysis)
+    await db.commit()
+    await db.refresh(analysis)
     
     # Gera sugestão de IA baseada no novo estágio
     suggestion = await _generate_stage_suggestion(analysis, request.stage, db)
@@ -138,7 +151,7 @@ async def update_analysis_stage(
 @router.get("/analysis/{analysis_id}/suggestions")
 async def get_analysis_suggestions(
     analysis_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(get_current_user_payload)
 ):
     """
@@ -146,10 +159,12 @@ async def get_analysis_suggestions(
     """
     user_id = int(user.get("sub"))
     
-    analysis = db.query(models.PageAnalysis).filter(
-        models.PageAnalysis.id == analysis_id,
-        models.PageAnalysis.owner_id == user_id
-    ).first()
+    analysis = await db.scalar(
+        select(models.PageAnalysis).where(
+            models.PageAnalysis.id == analysis_id,
+            models.PageAnalysis.owner_id == user_id
+        )
+    )
     
     if not analysis:
         raise HTTPException(status_code=404, detail="Análise não encontrada")
@@ -159,7 +174,7 @@ async def get_analysis_suggestions(
     return {"suggestions": suggestions}
 
 
-async def _generate_stage_suggestion(analysis, stage: str, db: Session) -> List[str]:
+async def _generate_stage_suggestion(analysis, stage: str, db: AsyncSession) -> List[str]:
     """
     Gera sugestões de próximas ações baseado no estágio atual
     """
@@ -196,19 +211,13 @@ async def _generate_stage_suggestion(analysis, stage: str, db: Session) -> List[
     base_suggestions = stage_suggestions.get(stage, [])
     
     # Adiciona sugestões personalizadas baseadas na análise
-    try:
-        entities = json.loads(analysis.entities) if analysis.entities else {}
-        
-        # Se não tem enrichment, sugere
-        if not entities.get('enriched_data') and stage == 'lead':
-            base_suggestions.insert(0, "🌐 Enriquecer dados (LinkedIn, Crunchbase, GitHub)")
-        
-        # Se tem alto potencial, prioriza
-        if entities.get('sales_potential') == 'Alto':
-            base_suggestions.insert(0, "🔥 PRIORIDADE: Alta probabilidade de fechamento")
-            
-    except:
-        pass
+    # Se não tem enrichment, sugere
+    if not analysis.has_enrichment and stage == 'lead':
+        base_suggestions.insert(0, "🌐 Enriquecer dados (LinkedIn, Crunchbase, GitHub)")
+    
+    # Se tem alto potencial, prioriza
+    if analysis.sales_potential == 'Alto':
+        base_suggestions.insert(0, "🔥 PRIORIDADE: Alta probabilidade de fechamento")
     
     return base_suggestions[:4]  # Top 4 sugestões
 
@@ -217,7 +226,7 @@ async def _generate_stage_suggestion(analysis, stage: str, db: Session) -> List[
 async def bulk_update_stage(
     analysis_ids: List[int],
     new_stage: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(get_current_user_payload)
 ):
     """
@@ -235,12 +244,15 @@ async def bulk_update_stage(
         raise HTTPException(status_code=400, detail="Máximo de 50 análises por vez")
     
     # Atualiza todas
-    updated_count = db.query(models.PageAnalysis).filter(
-        models.PageAnalysis.id.in_(analysis_ids),
-        models.PageAnalysis.owner_id == user_id
-    ).update({"stage": new_stage}, synchronize_session=False)
+    result = await db.execute(
+        update(models.PageAnalysis).where(
+            models.PageAnalysis.id.in_(analysis_ids),
+            models.PageAnalysis.owner_id == user_id
+        ).values(stage=new_stage).execution_options(synchronize_session=False)
+    )
+    updated_count = result.rowcount
     
-    db.commit()
+    await db.commit()
     
     return {
         "status": "success",
@@ -251,7 +263,7 @@ async def bulk_update_stage(
 
 @router.get("/stats")
 async def get_pipeline_stats(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(get_current_user_payload)
 ):
     """
@@ -259,16 +271,18 @@ async def get_pipeline_stats(
     """
     user_id = int(user.get("sub"))
     
-    analyses = db.query(models.PageAnalysis).filter(
-        models.PageAnalysis.owner_id == user_id
-    ).all()
+    # Conta por estágio (no banco)
+    counts = (await db.execute(
+        select(models.PageAnalysis.stage, func.count(models.PageAnalysis.id)).where(
+            models.PageAnalysis.owner_id == user_id
+        ).group_by(models.PageAnalysis.stage)
+    )).all()
     
-    # Conta por estágio
     by_stage = {stage: 0 for stage in VALID_STAGES}
-    for analysis in analyses:
-        stage = analysis.stage or 'lead'
+    for stage, count in counts:
+        stage = stage or 'lead'
         if stage in by_stage:
-            by_stage[stage] += 1
+            by_stage[stage] += count
     
     # Taxa de conversão (simplificada)
     conversion_rates = {}
@@ -294,7 +308,7 @@ async def get_pipeline_stats(
     }
     
     return {
-        "total_analyses": len(analyses),
+        "total_analyses": sum(count for _, count in counts),
         "by_stage": by_stage,
         "conversion_rates": conversion_rates,
         "avg_time_by_stage": avg_time_by_stage
@@ -317,7 +331,7 @@ class CreateAttachmentRequest(BaseModel):
 @router.get("/analysis/{analysis_id}/details")
 async def get_analysis_details(
     analysis_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(get_current_user_payload)
 ):
     """
@@ -325,9 +339,13 @@ async def get_analysis_details(
     """
     user_id = int(user.get("sub"))
     
-    analysis = db.query(models.PageAnalysis).filter(
-        models.PageAnalysis.id == analysis_id
-    ).first()
+    analysis = await db.scalar(
+        select(models.PageAnalysis).options(
+            undefer_group("content"), selectinload(models.PageAnalysis.text_blob)
+        ).where(
+            models.PageAnalysis.id == analysis_id
+        )
+    )
     
     if not analysis:
         raise HTTPException(status_code=404, detail="Análise não encontrada")
@@ -336,22 +354,25 @@ async def get_analysis_details(
     entities = {}
     key_points = []
     try:
-        if analysis.entities:
-            entities = json.loads(analysis.entities)
+        entities = analysis.entities or {}
         if analysis.key_points:
             key_points = json.loads(analysis.key_points)
     except:
         pass
     
     # Busca notas
-    notes = db.query(models.AnalysisNote).filter(
-        models.AnalysisNote.analysis_id == analysis_id
-    ).order_by(models.AnalysisNote.created_at.desc()).all()
+    notes = (await db.execute(
+        select(models.AnalysisNote).options(selectinload(models.AnalysisNote.user)).where(
+            models.AnalysisNote.analysis_id == analysis_id
+        ).order_by(models.AnalysisNote.created_at.desc())
+    )).scalars().all()
     
     # Busca anexos
-    attachments = db.query(models.AnalysisAttachment).filter(
-        models.AnalysisAttachment.analysis_id == analysis_id
-    ).order_by(models.AnalysisAttachment.created_at.desc()).all()
+    attachments = (await db.execute(
+        select(models.AnalysisAttachment).options(selectinload(models.AnalysisAttachment.user)).where(
+            models.AnalysisAttachment.analysis_id == analysis_id
+        ).order_by(models.AnalysisAttachment.created_at.desc())
+    )).scalars().all()
     
     return {
         "id": analysis.id,
@@ -393,7 +414,7 @@ async def get_analysis_details(
 async def create_note(
     analysis_id: int,
     request: CreateNoteRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(get_current_user_payload)
 ):
     """
@@ -402,12 +423,14 @@ async def create_note(
     user_id = int(user.get("sub"))
     
     # Verifica se a análise existe e pertence ao usuário (owner ou seller)
-    analysis = db.query(models.PageAnalysis).filter(
-        models.PageAnalysis.id == analysis_id
-    ).filter(
-        (models.PageAnalysis.owner_id == user_id) | 
-        (models.PageAnalysis.seller_id == user_id)
-    ).first()
+    analysis = await db.scalar(
+        select(models.PageAnalysis).where(
+            models.PageAnalysis.id == analysis_id
+        ).where(
+            (models.PageAnalysis.owner_id == user_id) | 
+            (models.PageAnalysis.seller_id == user_id)
+        )
+    )
     
     if not analysis:
         raise HTTPException(status_code=404, detail="Análise não encontrada")
@@ -420,8 +443,8 @@ async def create_note(
     )
     
     db.add(note)
-    db.commit()
-    db.refresh(note)
+    await db.commit()
+    await db.refresh(note)
     
     return {
         "id": note.id,
@@ -436,7 +459,7 @@ async def update_note(
     analysis_id: int,
     note_id: int,
     request: CreateNoteRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(get_current_user_payload)
 ):
     """
@@ -444,11 +467,13 @@ async def update_note(
     """
     user_id = int(user.get("sub"))
     
-    note = db.query(models.AnalysisNote).filter(
-        models.AnalysisNote.id == note_id,
-        models.AnalysisNote.analysis_id == analysis_id,
-        models.AnalysisNote.user_id == user_id
-    ).first()
+    note = await db.scalar(
+        select(models.AnalysisNote).where(
+            models.AnalysisNote.id == note_id,
+            models.AnalysisNote.analysis_id == analysis_id,
+            models.AnalysisNote.user_id == user_id
+        )
+    )
     
     if not note:
         raise HTTPException(status_code=404, detail="Nota não encontrada")
@@ -456,8 +481,8 @@ async def update_note(
     note.content = request.content
     note.updated_at = datetime.utcnow()
     
-    db.commit()
-    db.refresh(note)
+    await db.commit()
+    await db.refresh(note)
     
     return {
         "id": note.id,
@@ -471,7 +496,7 @@ async def update_note(
 async def delete_note(
     analysis_id: int,
     note_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(get_current_user_payload)
 ):
     """
@@ -479,17 +504,19 @@ async def delete_note(
     """
     user_id = int(user.get("sub"))
     
-    note = db.query(models.AnalysisNote).filter(
-        models.AnalysisNote.id == note_id,
-        models.AnalysisNote.analysis_id == analysis_id,
-        models.AnalysisNote.user_id == user_id
-    ).first()
+    note = await db.scalar(
+        select(models.AnalysisNote).where(
+            models.AnalysisNote.id == note_id,
+            models.AnalysisNote.analysis_id == analysis_id,
+            models.AnalysisNote.user_id == user_id
+        )
+    )
     
     if not note:
         raise HTTPException(status_code=404, detail="Nota não encontrada")
     
-    db.delete(note)
-    db.commit()
+    await db.delete(note)
+    await db.commit()
     
     return {"status": "success", "message": "Nota deletada"}
 
@@ -498,7 +525,7 @@ async def delete_note(
 async def create_attachment(
     analysis_id: int,
     request: CreateAttachmentRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(get_current_user_payload)
 ):
     """
@@ -507,12 +534,14 @@ async def create_attachment(
     user_id = int(user.get("sub"))
     
     # Verifica se a análise existe e pertence ao usuário (owner ou seller)
-    analysis = db.query(models.PageAnalysis).filter(
-        models.PageAnalysis.id == analysis_id
-    ).filter(
-        (models.PageAnalysis.owner_id == user_id) | 
-        (models.PageAnalysis.seller_id == user_id)
-    ).first()
+    analysis = await db.scalar(
+        select(models.PageAnalysis).where(
+            models.PageAnalysis.id == analysis_id
+        ).where(
+            (models.PageAnalysis.owner_id == user_id) | 
+            (models.PageAnalysis.seller_id == user_id)
+        )
+    )
     
     if not analysis:
         raise HTTPException(status_code=404, detail="Análise não encontrada")
@@ -528,8 +557,8 @@ async def create_attachment(
     )
     
     db.add(attachment)
-    db.commit()
-    db.refresh(attachment)
+    await db.commit()
+    await db.refresh(attachment)
     
     return {
         "id": attachment.id,
@@ -545,7 +574,7 @@ async def create_attachment(
 async def delete_attachment(
     analysis_id: int,
     attachment_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(get_current_user_payload)
 ):
     """
@@ -553,17 +582,19 @@ async def delete_attachment(
     """
     user_id = int(user.get("sub"))
     
-    attachment = db.query(models.AnalysisAttachment).filter(
-        models.AnalysisAttachment.id == attachment_id,
-        models.AnalysisAttachment.analysis_id == analysis_id,
-        models.AnalysisAttachment.user_id == user_id
-    ).first()
+    attachment = await db.scalar(
+        select(models.AnalysisAttachment).where(
+            models.AnalysisAttachment.id == attachment_id,
+            models.AnalysisAttachment.analysis_id == analysis_id,
+            models.AnalysisAttachment.user_id == user_id
+        )
+    )
     
     if not attachment:
         raise HTTPException(status_code=404, detail="Anexo não encontrado")
     
-    db.delete(attachment)
-    db.commit()
+    await db.delete(attachment)
+    await db.commit()
     
     return {"status": "success", "message": "Anexo deletado"}
 
@@ -576,7 +607,7 @@ class AssignSellerRequest(BaseModel):
 
 @router.get("/sellers")
 async def get_sellers(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(get_current_user_payload)
 ):
     """
@@ -587,9 +618,11 @@ async def get_sellers(
     
     # Todos os usuários podem ver vendedores, mas apenas admins podem atribuir
     
-    sellers = db.query(models.User).filter(
-        models.User.role.in_(["user", "seller"])
-    ).all()
+    sellers = (await db.execute(
+        select(models.User).where(
+            models.User.role.in_(["user", "seller"])
+        )
+    )).scalars().all()
     
     return [
         {
@@ -606,7 +639,7 @@ async def get_sellers(
 async def assign_seller(
     analysis_id: int,
     request: AssignSellerRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(get_current_user_payload)
 ):
     """
@@ -616,25 +649,21 @@ async def assign_seller(
     user_role = user.get("role", "user")
     
     # Verifica se a análise existe (temporariamente removida restrição de owner)
-    analysis = db.query(models.PageAnalysis).filter(
-        models.PageAnalysis.id == analysis_id
-    ).first()
+    analysis = await db.get(models.PageAnalysis, analysis_id)
     
     if not analysis:
         raise HTTPException(status_code=404, detail="Análise não encontrada")
     
     # Verifica se o vendedor existe
-    seller = db.query(models.User).filter(
-        models.User.id == request.seller_id
-    ).first()
+    seller = await db.get(models.User, request.seller_id)
     
     if not seller:
         raise HTTPException(status_code=404, detail="Vendedor não encontrado")
     
     # Atualiza o vendedor
     analysis.seller_id = request.seller_id
-    db.commit()
-    db.refresh(analysis)
+    await db.commit()
+    await db.refresh(analysis)
     
     return {
         "status": "success",
@@ -647,7 +676,7 @@ async def assign_seller(
 @router.patch("/analysis/{analysis_id}/unassign-seller")
 async def unassign_seller(
     analysis_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(get_current_user_payload)
 ):
     """
@@ -656,18 +685,20 @@ async def unassign_seller(
     user_id = int(user.get("sub"))
     
     # Verifica se a análise existe e se o usuário tem acesso
-    analysis = db.query(models.PageAnalysis).filter(
-        models.PageAnalysis.id == analysis_id,
-        models.PageAnalysis.owner_id == user_id
-    ).first()
+    analysis = await db.scalar(
+        select(models.PageAnalysis).where(
+            models.PageAnalysis.id == analysis_id,
+            models.PageAnalysis.owner_id == user_id
+        )
+    )
     
     if not analysis:
         raise HTTPException(status_code=404, detail="Análise não encontrada")
     
     # Remove o vendedor
     analysis.seller_id = None
-    db.commit()
-    db.refresh(analysis)
+    await db.commit()
+    await db.refresh(analysis)
     
     return {
         "status": "success",
@@ -678,7 +709,7 @@ async def unassign_seller(
 
 @router.get("/my-pipeline")
 async def get_my_pipeline(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(get_current_user_payload)
 ):
     """
@@ -687,9 +718,13 @@ async def get_my_pipeline(
     user_id = int(user.get("sub"))
     
     # Busca análises atribuídas ao vendedor
-    analyses = db.query(models.PageAnalysis).filter(
-        models.PageAnalysis.seller_id == user_id
-    ).order_by(models.PageAnalysis.created_at.desc()).all()
+    analyses = (await db.execute(
+        select(models.PageAnalysis).options(
+            CARD_COLUMNS, selectinload(models.PageAnalysis.owner)
+        ).where(
+            models.PageAnalysis.seller_id == user_id
+        ).order_by(models.PageAnalysis.created_at.desc())
+    )).scalars().all()
     
     # Organiza por estágio
     pipeline = {stage: [] for stage in VALID_STAGES}
@@ -697,14 +732,6 @@ async def get_my_pipeline(
     for analysis in analyses:
         stage = analysis.stage or 'lead'
         
-        # Parse entities para incluir na resposta
-        entities = {}
-        try:
-            if analysis.entities:
-                entities = json.loads(analysis.entities)
-        except:
-            pass
-        
         # Monta card
         card = {
             "id": analysis.id,
@@ -713,9 +740,9 @@ async def get_my_pipeline(
             "stage": stage,
             "created_at": analysis.created_at.isoformat(),
             "summary": analysis.summary[:200] if analysis.summary else None,
-            "sales_potential": entities.get('sales_potential', 'Médio'),
-            "industry": entities.get('industry', 'N/A'),
-            "has_enrichment": bool(entities.get('enriched_data')),
+            "sales_potential": analysis.sales_potential or 'Médio',
+            "industry": analysis.industry or 'N/A',
+            "has_enrichment": analysis.has_enrichment,
             "owner_email": analysis.owner.email if analysis.owner else "N/A"
         }
         
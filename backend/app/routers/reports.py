@@ -3,7 +3,7 @@ Router para geração de relatórios PDF detalhados
 """
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, undefer_group
 from typing import Dict, Any
 import io
 import json
@@ -82,8 +82,8 @@ async def generate_report(
     """
     user_id = int(user.get("sub"))
     
-    # Busca a análise no banco
-    analysis = db.query(models.PageAnalysis).filter(
+    # Busca a análise no banco (com o conteúdo, que vai para o prompt)
+    analysis = db.query(models.PageAnalysis).options(undefer_group("content")).filter(
         models.PageAnalysis.id == analysis_id,
         models.PageAnalysis.owner_id == user_id
     ).first()
@@ -3,7 +3,7 @@ Endpoints para o Simulador de Objeções e Treinamento de Vendas
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, undefer_group
 from typing import List
 import json
 from datetime import datetime, timedelta
@@ -39,7 +39,7 @@ async def generate_objections_endpoint(
     - **difficulty**: Nível de dificuldade (easy, medium, hard)
     """
     # Busca a análise
-    analysis = db.query(PageAnalysis).filter(PageAnalysis.id == request.analysis_id).first()
+    analysis = db.query(PageAnalysis).options(undefer_group("content")).filter(PageAnalysis.id == request.analysis_id).first()
     
     if not analysis:
         raise HTTPException(
@@ -39,6 +39,16 @@ class UserOut(UserBase):
 class AnalyzeRequest(BaseModel):
     """Entrada para análise de página (URL)."""
     url: AnyHttpUrl
+    refresh: bool = False  # Revalida a página (GET condicional) mesmo se já analisada
+    crawl: bool = False  # Lê também pricing/sobre/clientes/carreiras do mesmo site
+    max_pages: Optional[int] = None  # Páginas no modo crawl (padrão: CRAWL_MAX_PAGES)
+    async_job: Optional[bool] = None  # Responde 202 com job id (padrão: ANALYZE_ASYNC_DEFAULT)
+
+
+class BulkAnalyzeRequest(BaseModel):
+    """Entrada da análise em lote: URLs (ou domínios) de uma lista de leads."""
+    urls: List[str]
+    crawl: bool = False
 
 
 class AnalyzeResponse(BaseModel):
@@ -56,6 +66,22 @@ class HistoryItem(AnalyzeResponse):
     pass
 
 
+class AnalysisJobOut(BaseModel):
+    """Estado de um job assíncrono de análise."""
+    id: int
+    url: str
+    status: str  # queued, running, done, failed
+    stage: Optional[str]
+    error: Optional[str]
+    analysis_id: Optional[int]
+    created_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+    status_url: str
+    events_url: str
+    analysis: Optional[AnalyzeResponse] = None
+
+
 class ChatRequest(BaseModel):
     """Requisição de chat RAG."""
     message: str
@@ -0,0 +1,68 @@
+"""
+Adiciona e preenche page_analyses.canonical_key em bancos já existentes
+
+Bancos criados antes da canonicalização de URLs não têm a coluna (o
+create_all do init_db não altera tabelas existentes). Idempotente: pode
+ser executado de novo sem efeito.
+
+Uso:
+    python -m app.scripts.backfill_canonical_keys
+"""
+from collections import Counter
+
+from sqlalchemy import inspect, text
+
+from ..database import SessionLocal, engine
+from ..models import PageAnalysis
+from ..services.url_canonical import canonical_key
+
+
+BATCH_SIZE = 500
+
+
+def ensure_column() -> None:
+    columns = {column["name"] for column in inspect(engine).get_columns("page_analyses")}
+    if "canonical_key" in columns:
+        return
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE page_analyses ADD COLUMN canonical_key TEXT"))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_page_analyses_canonical_key ON page_analyses (canonical_key)"
+        ))
+    print("Coluna canonical_key criada.")
+
+
+def backfill() -> int:
+    db = SessionLocal()
+    updated = 0
+    try:
+        while True:
+            rows = db.query(PageAnalysis).filter(
+                PageAnalysis.canonical_key.is_(None)
+            ).order_by(PageAnalysis.id).limit(BATCH_SIZE).all()
+            if not rows:
+                break
+            for analysis in rows:
+                analysis.canonical_key = canonical_key(analysis.url)
+            db.commit()
+            updated += len(rows)
+
+        # Análises duplicadas que agora compartilham a mesma chave
+        keys = Counter(key for (key,) in db.query(PageAnalysis.canonical_key).all())
+        duplicates = {key: count for key, count in keys.items() if count > 1}
+        if duplicates:
+            print(f"{len(duplicates)} chaves com mais de uma análise (a mais antiga é usada no cache):")
+            for key, count in sorted(duplicates.items(), key=lambda item: -item[1])[:20]:
+                print(f"  {count}x {key}")
+    finally:
+        db.close()
+    return updated
+
+
+def main():
+    ensure_column()
+    print(f"{backfill()} análises atualizadas.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Benchmark: pipeline de análise multi (4 prompts) vs. fused (1 prompt JSON).
+
+Uso:
+    python -m app.scripts.bench_analysis_modes <pasta_com_paginas_html> [--limit 10]
+
+Usa o provider de LLM configurado (LLM_PROVIDER, OPENAI_API_KEY...) com o
+cache de respostas desligado. Para cada página roda os dois modos e reporta:
+
+- latência (mediana e p95 por página), chamadas e tokens de entrada/saída;
+- qualidade: respostas válidas (fused que não precisou cair no multi,
+  multi com entidades extraídas), preenchimento dos campos estruturados e
+  concordância entre os dois modos nas entidades principais.
+"""
+import argparse
+import asyncio
+import pathlib
+import statistics
+import time
+from typing import Any, Dict, List, Tuple
+
+from ..config import settings
+from ..services.fused_analysis import Entities
+from ..services.llm_client import gateway_stats
+from ..services.pipeline import AnalysisOutput, run_analysis_pipeline
+from ..services.scraper import extract_page_text
+
+
+MODES = ("multi", "fused")
+SECTIONS = ("sentiment_analysis", "market_context", "sales_insights", "risk_assessment", "market_analysis", "sales_strategy")
+EMPTY_VALUES = {"", "não identificado", "não especificado", "n/a"}
+
+
+def _filled(value: Any) -> bool:
+    if isinstance(value, dict):
+        return any(_filled(v) for v in value.values())
+    if isinstance(value, list):
+        return any(_filled(v) for v in value)
+    return value is not None and str(value).strip().lower() not in EMPTY_VALUES
+
+
+def completeness(output: AnalysisOutput) -> float:
+    """Fração das entidades e seções estruturadas com conteúdo real."""
+    fields = list(Entities.__fields__) + list(SECTIONS)
+    return sum(_filled(output.entities.get(name)) for name in fields) / len(fields)
+
+
+def _tokens() -> Tuple[int, int, int]:
+    sites = gateway_stats()["call_sites"].values()
+    return (
+        sum(s["calls"] for s in sites),
+        sum(s["prompt_tokens"] for s in sites),
+        sum(s["completion_tokens"] for s in sites),
+    )
+
+
+def _norm_set(values: Any) -> set:
+    return {str(v).strip().lower() for v in values or [] if _filled(v)}
+
+
+def agreement(a: AnalysisOutput, b: AnalysisOutput) -> float:
+    """Concordância nas entidades principais (nome, setor, produtos, stack)."""
+    scores = []
+    for name in ("company_name", "industry"):
+        x, y = str(a.entities.get(name) or "").strip().lower(), str(b.entities.get(name) or "").strip().lower()
+        if x or y:
+            scores.append(float(bool(x) and (x in y or y in x)))
+    for name in ("products", "tech_stack"):
+        x, y = _norm_set(a.entities.get(name)), _norm_set(b.entities.get(name))
+        if x or y:
+            scores.append(len(x & y) / len(x | y))
+    return sum(scores) / len(scores) if scores else 0.0
+
+
+async def _run(text: str, mode: str) -> Tuple[AnalysisOutput, float, Tuple[int, int, int]]:
+    before = _tokens()
+    started = time.perf_counter()
+    output = await run_analysis_pipeline(text, mode=mode)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    after = _tokens()
+    return output, elapsed_ms, tuple(x - y for x, y in zip(after, before))
+
+
+def _p95(values: List[float]) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+async def bench(pages: List[pathlib.Path]) -> None:
+    stats: Dict[str, Dict[str, List[float]]] = {
+        mode: {"ms": [], "calls": [], "prompt": [], "completion": [], "valid": [], "complete": []} for mode in MODES
+    }
+    agreements: List[float] = []
+
+    for page in pages:
+        _, text, _, _ = await extract_page_text(page.read_bytes(), None)
+        outputs = {}
+        for mode in MODES:
+            output, elapsed_ms, (calls, prompt, completion) = await _run(text, mode)
+            outputs[mode] = output
+            s = stats[mode]
+            s["ms"].append(elapsed_ms)
+            s["calls"].append(calls)
+            s["prompt"].append(prompt)
+            s["completion"].append(completion)
+            s["valid"].append(float(output.timings.get("mode") == mode and bool(output.entities.get("company_name"))))
+            s["complete"].append(completeness(output))
+        agreements.append(agreement(outputs["multi"], outputs["fused"]))
+        print(
+            f"{page.name:<40} multi {stats['multi']['ms'][-1]:7.0f} ms | fused {stats['fused']['ms'][-1]:7.0f} ms"
+            f" | concordância {agreements[-1]:.2f}"
+        )
+
+    print(f"\nProvider: {settings.LLM_PROVIDER} ({settings.LLM_MODEL or settings.OPENAI_MODEL}), {len(pages)} páginas")
+    for mode in MODES:
+        s = stats[mode]
+        print(
+            f"{mode:>6}: mediana {statistics.median(s['ms']):7.0f} ms | p95 {_p95(s['ms']):7.0f} ms"
+            f" | chamadas/página {statistics.mean(s['calls']):4.1f}"
+            f" | tokens entrada {statistics.mean(s['prompt']):7.0f} saída {statistics.mean(s['completion']):6.0f}"
+            f" | válidas {statistics.mean(s['valid']):5.0%} | preenchimento {statistics.mean(s['complete']):5.0%}"
+        )
+    prompt_multi, prompt_fused = sum(stats["multi"]["prompt"]), sum(stats["fused"]["prompt"])
+    if prompt_fused:
+        print(f"Redução de tokens de entrada: {prompt_multi / prompt_fused:.1f}x")
+    print(f"Concordância média entre os modos: {statistics.mean(agreements):.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", type=pathlib.Path, help="Pasta com arquivos .html/.htm")
+    parser.add_argument("--limit", type=int, default=10, help="Máximo de páginas (cada uma custa ~5 chamadas)")
+    args = parser.parse_args()
+
+    pages = sorted(p for p in args.corpus.rglob("*") if p.suffix.lower() in (".html", ".htm"))[:args.limit]
+    if not pages:
+        raise SystemExit(f"Nenhuma página .html encontrada em {args.corpus}")
+    # Sem cache: o segundo modo não pode reaproveitar respostas do primeiro
+    settings.LLM_CACHE_ENABLED = False
+    asyncio.run(bench(pages))
+
+
+if __name__ == "__main__":
+    main()
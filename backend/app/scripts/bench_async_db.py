@@ -0,0 +1,219 @@
+"""
+Compara sessão síncrona e assíncrona do SQLAlchemy dentro de handlers async
+
+Antes da camada assíncrona, os routers `async def` usavam a Session
+síncrona: cada query travava o event loop até o banco responder, e as
+demais requisições (inclusive as que só esperam o LLM) ficavam paradas.
+Aqui o mesmo trabalho de uma requisição (cards do /kanban/pipeline e a
+contagem do /dashboard/ de um usuário) chega em taxa constante (--rps, em
+laço aberto, até --concurrency simultâneas) em dois modos:
+
+    sync   Session síncrona dentro de corrotinas (o comportamento antigo)
+    async  AsyncSession (asyncpg/aiosqlite), como os routers agora
+
+Para cada modo mostra vazão, latência p50/p95/p99 (contada desde o
+instante previsto de chegada, como um cliente a veria) e o atraso do event
+loop (uma sonda que deveria acordar a cada 5 ms). --db-latency-ms soma a
+cada requisição uma ida ao banco que demora esse tempo (pg_sleep no
+Postgres, função registrada no SQLite), simulando a rede até um banco
+remoto; com 0 só o custo das queries conta.
+
+Uso:
+    python -m app.scripts.bench_async_db [--database-url sqlite:///./bench_async_db.db]
+        [--requests 400] [--rps 150] [--concurrency 20] [--db-latency-ms 5]
+        [--users 10] [--analyses-per-user 50]
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import create_engine, event, func, select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from .. import models
+from ..database import Base, async_database_url
+from ..routers.kanban import CARD_COLUMNS
+from ..security import get_password_hash
+
+
+STAGES = ("lead", "qualified", "proposal", "negotiation", "closed")
+POTENTIALS = ("Alto", "Médio", "Baixo")
+PROBE_INTERVAL_S = 0.005
+
+
+def _register_sleep(engine) -> None:
+    """bench_sleep(ms) no SQLite: bloqueia a conexão como uma ida lenta ao banco."""
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine.sync_engine if hasattr(engine, "sync_engine") else engine, "connect")
+    def _connect(dbapi_connection, _):
+        dbapi_connection.create_function("bench_sleep", 1, lambda ms: time.sleep(ms / 1000))
+
+
+def _latency_statement(dialect: str, latency_ms: float):
+    if dialect == "postgresql":
+        return text("SELECT pg_sleep(:s)").bindparams(s=latency_ms / 1000)
+    return text("SELECT bench_sleep(:ms)").bindparams(ms=latency_ms)
+
+
+def _queries(user_id: int):
+    cards = select(models.PageAnalysis).options(CARD_COLUMNS).where(
+        models.PageAnalysis.owner_id == user_id
+    ).order_by(models.PageAnalysis.created_at.desc())
+    count = select(func.count(models.PageAnalysis.id)).where(models.PageAnalysis.owner_id == user_id)
+    return cards, count
+
+
+def seed(engine, users: int, analyses_per_user: int) -> List[int]:
+    """Cria as tabelas e, se faltarem, os usuários e análises do benchmark."""
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        user_ids = list(db.scalars(
+            select(models.User.id).where(models.User.email.like("bench-%@bench.local"))
+        ))
+        if len(user_ids) >= users:
+            return user_ids[:users]
+        rng = random.Random(1)
+        password = get_password_hash("bench-password")
+        for n in range(len(user_ids), users):
+            user = models.User(email=f"bench-{n}@bench.local", hashed_password=password)
+            db.add(user)
+            db.flush()
+            for i in range(analyses_per_user):
+                db.add(models.PageAnalysis(
+                    url=f"https://empresa-{n}-{i}.example.com",
+                    title=f"Empresa {n}-{i}",
+                    summary="Resumo da empresa. " * 20,
+                    key_points='["Ponto 1", "Ponto 2"]',
+                    entities={"industry": rng.choice(("SaaS", "Varejo", "Fintech")),
+                              "sales_potential": rng.choice(POTENTIALS)},
+                    stage=rng.choice(STAGES),
+                    owner_id=user.id,
+                ))
+            user_ids.append(user.id)
+        db.commit()
+        return user_ids
+    finally:
+        db.close()
+
+
+def _percentile(ordered: List[float], pct: float) -> Optional[float]:
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def _probe(stop: asyncio.Event, lags: List[float]) -> None:
+    """Mede quanto o event loop atrasa para acordar uma tarefa que dorme 5 ms."""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL_S)
+        lags.append((time.perf_counter() - started - PROBE_INTERVAL_S) * 1000)
+
+
+async def run_mode(mode: str, args: argparse.Namespace, user_ids: List[int]) -> Dict[str, Any]:
+    pool = {"pool_size": args.concurrency, "max_overflow": 0} if not args.database_url.startswith("sqlite") else {}
+    if mode == "sync":
+        engine = create_engine(args.database_url, **pool)
+        dialect = engine.dialect.name
+        SessionFactory = sessionmaker(bind=engine)
+
+        async def handle(user_id: int) -> None:
+            # Como os handlers antigos: async def, mas I/O do banco bloqueante
+            with SessionFactory() as db:
+                if args.db_latency_ms:
+                    db.execute(_latency_statement(dialect, args.db_latency_ms))
+                cards, count = _queries(user_id)
+                db.execute(cards).scalars().all()
+                db.scalar(count)
+    else:
+        engine = create_async_engine(async_database_url(args.database_url), **pool)
+        dialect = engine.dialect.name
+        SessionFactory = async_sessionmaker(engine)
+
+        async def handle(user_id: int) -> None:
+            async with SessionFactory() as db:
+                if args.db_latency_ms:
+                    await db.execute(_latency_statement(dialect, args.db_latency_ms))
+                cards, count = _queries(user_id)
+                (await db.execute(cards)).scalars().all()
+                await db.scalar(count)
+    _register_sleep(engine)
+
+    rng = random.Random(2)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: List[float] = []
+    lags: List[float] = []
+
+    async def one(user_id: int, arrival: float) -> None:
+        await asyncio.sleep(max(0.0, arrival - time.perf_counter()))
+        async with semaphore:
+            await handle(user_id)
+        latencies.append((time.perf_counter() - arrival) * 1000)
+
+    # Aquece o pool antes de medir
+    now = time.perf_counter()
+    await asyncio.gather(*(one(user_ids[0], now) for _ in range(args.concurrency)))
+    latencies.clear()
+
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_probe(stop, lags))
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        one(rng.choice(user_ids), started + n / args.rps) for n in range(args.requests)
+    ))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe
+
+    if mode == "sync":
+        engine.dispose()
+    else:
+        await engine.dispose()
+
+    latencies.sort()
+    lags.sort()
+    return {
+        "mode": mode,
+        "throughput_rps": round(args.requests / elapsed, 1),
+        "latency_ms": {name: round(_percentile(latencies, pct), 1) for name, pct in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))},
+        "loop_lag_ms": {"p99": round(_percentile(lags, 0.99) or 0, 1), "max": round(lags[-1] if lags else 0, 1)},
+    }
+
+
+def print_report(results: List[Dict[str, Any]]) -> None:
+    print(f"\n{'modo':<6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'lag p99':>8} {'lag máx':>8}")
+    for r in results:
+        lat, lag = r["latency_ms"], r["loop_lag_ms"]
+        print(f"{r['mode']:<6} {r['throughput_rps']:>8.1f} {lat['p50']:>8.1f} {lat['p95']:>8.1f} {lat['p99']:>8.1f} "
+              f"{lag['p99']:>8.1f} {lag['max']:>8.1f}")
+    if len(results) == 2 and results[0]["throughput_rps"]:
+        print(f"\nasync/sync: {results[1]['throughput_rps'] / results[0]['throughput_rps']:.2f}x a vazão")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default="sqlite:///./bench_async_db.db", help="Banco (URL síncrona; o driver async é derivado)")
+    parser.add_argument("--requests", type=int, default=400, help="Requisições por modo")
+    parser.add_argument("--rps", type=float, default=150.0, help="Taxa de chegada das requisições")
+    parser.add_argument("--concurrency", type=int, default=20, help="Requisições simultâneas no máximo (e tamanho do pool)")
+    parser.add_argument("--db-latency-ms", type=float, default=5.0, help="Latência extra por requisição (ida ao banco)")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--analyses-per-user", type=int, default=50)
+    parser.add_argument("--modes", default="sync,async", help="Modos a medir, na ordem")
+    args = parser.parse_args()
+
+    user_ids = seed(create_engine(args.database_url), args.users, args.analyses_per_user)
+    print(f"🗄️ {len(user_ids)} usuários em {args.database_url}; {args.requests} requisições, "
+          f"{args.rps:g} req/s, até {args.concurrency} simultâneas, +{args.db_latency_ms:g} ms por requisição")
+    results = [asyncio.run(run_mode(mode.strip(), args, user_ids)) for mode in args.modes.split(",")]
+    print_report(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Micro-benchmark: extração de texto BeautifulSoup vs. motor em streaming.
+
+Uso:
+    python -m app.scripts.bench_html_extract <pasta_com_paginas_html> [--repeat 5]
+
+A pasta deve conter páginas reais salvas (ex.: `curl -L https://site.com > site.html`).
+Para cada página mede o tempo do caminho antigo (BeautifulSoup + decompose) e de
+cada engine disponível do `html_text`, e confere se o texto gerado é idêntico.
+"""
+import argparse
+import pathlib
+import statistics
+import time
+from typing import Callable, Dict, List, Tuple
+
+from bs4 import BeautifulSoup
+
+from ..services.html_text import extract_text, lxml_available
+
+
+def bs4_extract(html: str) -> Tuple[str, str]:
+    """Caminho original do fetch_url (mantido aqui só como referência)."""
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(["script", "style", "noscript"]):
+        tag.decompose()
+    title = soup.title.string.strip() if soup.title and soup.title.string else None
+    text = " ".join(soup.get_text(separator=" ").split())
+    return title or "", text
+
+
+def _time_ms(fn: Callable[[str], Tuple[str, str]], html: str, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(html)
+        samples.append((time.perf_counter() - start) * 1000)
+    return min(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", type=pathlib.Path, help="Pasta com arquivos .html/.htm")
+    parser.add_argument("--repeat", type=int, default=5, help="Execuções por página (usa o melhor tempo)")
+    args = parser.parse_args()
+
+    pages = sorted(p for p in args.corpus.rglob("*") if p.suffix.lower() in (".html", ".htm"))
+    if not pages:
+        raise SystemExit(f"Nenhuma página .html encontrada em {args.corpus}")
+
+    engines: Dict[str, Callable[[str], Tuple[str, str]]] = {
+        "bs4": bs4_extract,
+        "stdlib": lambda h: extract_text(h, engine="stdlib"),
+    }
+    if lxml_available():
+        engines["lxml"] = lambda h: extract_text(h, engine="lxml")
+
+    timings: Dict[str, List[float]] = {name: [] for name in engines}
+    mismatches: Dict[str, int] = {name: 0 for name in engines if name != "bs4"}
+    total_bytes = 0
+
+    for page in pages:
+        html = page.read_text(encoding="utf-8", errors="replace")
+        total_bytes += len(html.encode("utf-8"))
+        reference = bs4_extract(html)
+        for name, fn in engines.items():
+            timings[name].append(_time_ms(fn, html, args.repeat))
+            if name != "bs4" and fn(html)[1] != reference[1]:
+                mismatches[name] += 1
+
+    print(f"Corpus: {len(pages)} páginas, {total_bytes / 1024:.0f} KB")
+    base_total = sum(timings["bs4"])
+    for name, samples in timings.items():
+        total = sum(samples)
+        line = (
+            f"{name:>7}: total {total:8.1f} ms | mediana {statistics.median(samples):7.2f} ms/página"
+            f" | {total_bytes / 1024 / 1024 / (total / 1000):6.1f} MB/s"
+        )
+        if name != "bs4":
+            line += f" | speedup {base_total / total:4.1f}x | textos divergentes: {mismatches[name]}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""
+Benchmark e comparação "golden" do analisador offline (sem LLM).
+
+Uso:
+    python -m app.scripts.bench_offline_analyzer <pasta_com_paginas_html> [--repeat 5]
+
+Compara `analyze_offline` (services/offline_analyzer.py) com uma cópia fiel
+do analisador anterior, que chamava cada heurística duas vezes e varria o
+texto inteiro de novo a cada lista de palavras-chave e a cada regex. Para
+cada página extrai o texto como o fetch faz, confere que as duas saídas são
+idênticas e mede o tempo por página: anterior, novo sem memoização (primeira
+análise do documento) e novo memoizado (reanálise do mesmo texto).
+
+Sai com código 1 se alguma saída divergir.
+"""
+import argparse
+import asyncio
+import pathlib
+import re
+import sys
+import timeit
+from typing import Any, Dict, List
+
+from ..services.offline_analyzer import analyze_offline, offline_signals
+from ..services.scraper import extract_page_text
+
+
+# ---------------------------------------------------------------------------
+# Analisador anterior (referência para a comparação)
+# ---------------------------------------------------------------------------
+
+def _extract_mock_analysis(raw_text: str) -> Dict[str, Any]:
+    lines = [line.strip() for line in raw_text.split('\n') if line.strip()]
+    title = lines[0] if lines else "Título não encontrado"
+    summary = f"""## RESUMO EXECUTIVO
+{_generate_smart_summary(raw_text, title)}
+
+## INFORMAÇÕES PRINCIPAIS
+
+### 🎯 ICP (Ideal Customer Profile)
+{_extract_icp(raw_text)}
+
+### 🛍️ PRODUTOS/SERVIÇOS
+{_extract_products_formatted(raw_text)}
+
+### 💰 PRICING
+{_extract_pricing(raw_text)}
+
+### 🔧 STACK TECNOLÓGICO
+{_extract_tech_stack_formatted(raw_text)}
+
+### 📞 CONTATOS
+{_extract_contacts_formatted(raw_text)}
+
+### 🏢 SOBRE A EMPRESA
+{_extract_company_info(raw_text)}
+
+### 🎯 OPORTUNIDADES DE VENDAS
+{_extract_opportunities(raw_text)}"""
+    key_points = []
+    sections = [
+        ("🎯 ICP (Ideal Customer Profile)", _extract_icp(raw_text)),
+        ("🛍️ PRODUTOS/SERVIÇOS", _extract_products_formatted(raw_text)),
+        ("💰 PRICING", _extract_pricing(raw_text)),
+        ("🔧 STACK TECNOLÓGICO", _extract_tech_stack_formatted(raw_text)),
+        ("📞 CONTATOS", _extract_contacts_formatted(raw_text)),
+        ("🏢 SOBRE A EMPRESA", _extract_company_info(raw_text)),
+        ("🎯 OPORTUNIDADES DE VENDAS", _extract_opportunities(raw_text))
+    ]
+    for section_title, content in sections:
+        if content and content != "Não especificado" and len(content.strip()) > 3:
+            key_points.append(f"{section_title}: {content}")
+    entities = {
+        "company_name": _extract_company_name(raw_text),
+        "products": _extract_products(raw_text),
+        "pricing": _extract_pricing(raw_text),
+        "tech_stack": _extract_tech_stack(raw_text),
+        "contacts": _extract_contacts(raw_text)
+    }
+    return {
+        "summary": summary,
+        "key_points": key_points,
+        "entities": entities
+    }
+
+
+def _extract_company_name(text: str) -> str:
+    lines = [line.strip() for line in text.split('\n') if line.strip()]
+    if lines:
+        return lines[0][:50]  # Limita o tamanho
+    return "Nome da empresa não identificado"
+
+
+def _extract_products(text: str) -> List[str]:
+    products = []
+    text_lower = text.lower()
+    if 'software' in text_lower:
+        products.append("Software")
+    if 'app' in text_lower or 'aplicativo' in text_lower:
+        products.append("Aplicativo")
+    if 'api' in text_lower:
+        products.append("API")
+    if 'ia' in text_lower or 'ai' in text_lower:
+        products.append("Soluções de IA")
+    if 'automação' in text_lower or 'automation' in text_lower:
+        products.append("Automação")
+    return products if products else ["Produtos não especificados"]
+
+
+def _extract_pricing(text: str) -> str:
+    price_patterns = [
+        r'\$\d+',
+        r'€\d+',
+        r'R\$\s*\d+',
+        r'\d+\s*reais',
+        r'preço.*?\d+',
+        r'price.*?\d+'
+    ]
+    for pattern in price_patterns:
+        matches = re.findall(pattern, text, re.IGNORECASE)
+        if matches:
+            return matches[0]
+    return "Preços não especificados"
+
+
+def _extract_tech_stack(text: str) -> List[str]:
+    tech_stack = []
+    text_lower = text.lower()
+    technologies = [
+        'python', 'javascript', 'react', 'node', 'vue', 'angular',
+        'aws', 'azure', 'gcp', 'docker', 'kubernetes',
+        'mysql', 'postgresql', 'mongodb', 'redis',
+        'tensorflow', 'pytorch', 'openai', 'gpt'
+    ]
+    for tech in technologies:
+        if tech in text_lower:
+            tech_stack.append(tech.title())
+    return tech_stack if tech_stack else ["Stack não especificado"]
+
+
+def _extract_contacts(text: str) -> List[str]:
+    contacts = []
+    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
+    emails = re.findall(email_pattern, text)
+    contacts.extend(emails)
+    phone_pattern = r'(\+?55\s?)?(\(?\d{2}\)?\s?)?\d{4,5}-?\d{4}'
+    phones = re.findall(phone_pattern, text)
+    if phones:
+        contacts.append("Telefone encontrado")
+    return contacts if contacts else ["Contatos não fornecidos"]
+
+
+def _generate_smart_summary(text: str, title: str) -> str:
+    sentences = [s.strip() for s in text.split('.') if len(s.strip()) > 20]
+    if len(sentences) >= 2:
+        summary = f"{title}. {sentences[0]}. {sentences[1]}."
+    elif len(sentences) == 1:
+        summary = f"{title}. {sentences[0]}."
+    else:
+        summary = f"{title}. {text[:200]}..."
+    return summary[:400] + ("..." if len(summary) > 400 else "")
+
+
+def _extract_icp(text: str) -> str:
+    text_lower = text.lower()
+    icp_indicators = []
+    if any(word in text_lower for word in ['b2b', 'business', 'empresa', 'corporação']):
+        icp_indicators.append("Empresas B2B")
+    if any(word in text_lower for word in ['startup', 'pequena', 'média']):
+        icp_indicators.append("Startups e PMEs")
+    if any(word in text_lower for word in ['grande', 'enterprise', 'corporativo']):
+        icp_indicators.append("Grandes corporações")
+    if any(word in text_lower for word in ['tech', 'tecnologia', 'software']):
+        icp_indicators.append("Empresas de tecnologia")
+    return ", ".join(icp_indicators) if icp_indicators else "Não especificado"
+
+
+def _extract_products_formatted(text: str) -> str:
+    products = _extract_products(text)
+    if products and products != ["Produtos não especificados"]:
+        return ", ".join(products)
+    return "Não especificado"
+
+
+def _extract_tech_stack_formatted(text: str) -> str:
+    tech_stack = _extract_tech_stack(text)
+    if tech_stack and tech_stack != ["Stack não especificado"]:
+        return ", ".join(tech_stack)
+    return "Não especificado"
+
+
+def _extract_contacts_formatted(text: str) -> str:
+    contacts = _extract_contacts(text)
+    if contacts and contacts != ["Contatos não fornecidos"]:
+        return ", ".join(contacts)
+    return "Não especificado"
+
+
+def _extract_company_info(text: str) -> str:
+    text_lower = text.lower()
+    info = []
+    if any(word in text_lower for word in ['fundada', 'criada', 'estabelecida']):
+        info.append("Empresa estabelecida")
+    if any(word in text_lower for word in ['startup', 'inovação', 'disruptiva']):
+        info.append("Empresa inovadora")
+    if any(word in text_lower for word in ['global', 'internacional', 'mundial']):
+        info.append("Presença global")
+    if any(word in text_lower for word in ['local', 'brasil', 'nacional']):
+        info.append("Presença nacional")
+    return ", ".join(info) if info else "Não especificado"
+
+
+def _extract_opportunities(text: str) -> str:
+    text_lower = text.lower()
+    opportunities = []
+    if any(word in text_lower for word in ['crescimento', 'expansão', 'escalar', 'crescer', 'expandir']):
+        opportunities.append("Oportunidade de crescimento")
+    if any(word in text_lower for word in ['automação', 'otimização', 'eficiência', 'automatizar', 'otimizar']):
+        opportunities.append("Necessidade de automação")
+    if any(word in text_lower for word in ['digital', 'transformação', 'modernização', 'digitalizar']):
+        opportunities.append("Transformação digital")
+    if any(word in text_lower for word in ['ia', 'ai', 'inteligência artificial', 'machine learning', 'ml']):
+        opportunities.append("Adoção de IA")
+    if any(word in text_lower for word in ['inovação', 'inovador', 'disruptivo', 'tecnologia']):
+        opportunities.append("Empresa inovadora")
+    if any(word in text_lower for word in ['desafio', 'problema', 'dificuldade', 'limitação']):
+        opportunities.append("Possíveis pain points identificados")
+    if any(word in text_lower for word in ['mercado', 'competição', 'concorrência', 'diferencial']):
+        opportunities.append("Análise de mercado necessária")
+    if not opportunities:
+        if any(word in text_lower for word in ['startup', 'pequena', 'média empresa']):
+            opportunities.append("Empresa em crescimento - oportunidades de parceria")
+        elif any(word in text_lower for word in ['grande', 'corporação', 'enterprise']):
+            opportunities.append("Empresa estabelecida - foco em ROI e eficiência")
+        elif any(word in text_lower for word in ['tech', 'tecnologia', 'software']):
+            opportunities.append("Empresa de tecnologia - foco em inovação")
+        else:
+            opportunities.append("Análise de necessidades específicas recomendada")
+    return ", ".join(opportunities)
+
+
+# ---------------------------------------------------------------------------
+# Comparação e benchmark
+# ---------------------------------------------------------------------------
+
+def _cold(text: str) -> Dict[str, Any]:
+    offline_signals.cache_clear()
+    return analyze_offline(text)
+
+
+def _ms(fn, repeat: int) -> float:
+    return min(timeit.repeat(fn, number=1, repeat=repeat)) * 1000
+
+
+async def _load(pages: List[pathlib.Path]) -> List[str]:
+    texts = []
+    for page in pages:
+        _, text, _, _ = await extract_page_text(page.read_bytes(), None)
+        texts.append(text)
+    return texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", type=pathlib.Path, help="Pasta com arquivos .html/.htm")
+    parser.add_argument("--repeat", type=int, default=5, help="Rodadas por medição (vale a melhor)")
+    args = parser.parse_args()
+
+    pages = sorted(p for p in args.corpus.rglob("*") if p.suffix.lower() in (".html", ".htm"))
+    if not pages:
+        raise SystemExit(f"Nenhuma página .html encontrada em {args.corpus}")
+    texts = asyncio.run(_load(pages))
+
+    failures = 0
+    totals = {"anterior": 0.0, "novo": 0.0, "memoizado": 0.0}
+    for page, text in zip(pages, texts):
+        ok = _extract_mock_analysis(text) == _cold(text)
+        failures += not ok
+        timings = {
+            "anterior": _ms(lambda: _extract_mock_analysis(text), args.repeat),
+            "novo": _ms(lambda: _cold(text), args.repeat),
+            "memoizado": _ms(lambda: analyze_offline(text), args.repeat),
+        }
+        for name, value in timings.items():
+            totals[name] += value
+        print(
+            f"{'✅' if ok else '❌'} {page.name:<30} {len(text):>7} caracteres | "
+            + " | ".join(f"{name} {value:7.2f} ms" for name, value in timings.items())
+        )
+
+    print(f"\n{len(pages)} páginas, média por página:")
+    for name, value in totals.items():
+        print(f"  {name:<10} {value / len(pages):7.2f} ms ({totals['anterior'] / value:5.1f}x)")
+
+    if failures:
+        print(f"\n❌ {failures} página(s) com saída diferente do analisador anterior")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
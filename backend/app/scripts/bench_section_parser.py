@@ -0,0 +1,289 @@
+"""
+Benchmark e comparação "golden" do parser de seções das respostas do LLM.
+
+Uso:
+    python -m app.scripts.bench_section_parser [pasta_com_respostas] [--iterations 2000]
+
+Compara `_parse_output` e `extract_section` (services/llm.py, sobre
+services/section_parser.py) com cópias fiéis dos parsers anteriores, que
+faziam uma busca no texto por seção. O corpus é gerado a partir dos
+próprios prompts (com variações: títulos em negrito, seções faltando,
+menções a nomes de seção no meio do texto...) e, se informada, inclui uma
+pasta com respostas reais salvas em .txt/.md.
+
+Regras da comparação:
+- resumo e entidades devem ser idênticos;
+- os pontos-chave do parser antigo devem aparecer iguais e na mesma ordem;
+  pontos a mais são seções que o parser antigo perdia (a última seção "###"
+  antes de um título "##" e o SCORE DE PRIORIDADE, que vem com "##");
+- seções do relatório devem ser idênticas, exceto quando o parser antigo
+  não achou a seção ou pegou uma linha de texto que só citava o nome dela.
+
+Sai com código 1 se houver divergência fora dessas regras.
+"""
+import argparse
+import json
+import pathlib
+import re
+import sys
+import timeit
+from typing import Any, Callable, Dict, List, Tuple
+
+from ..services.llm import SUMMARY_PROMPT, KEY_POINT_SECTIONS, _parse_output, _report_section, extract_section
+from ..services.section_parser import SectionIndex
+
+
+REPORT_SECTIONS = [
+    "RESUMO EXECUTIVO EXPANDIDO",
+    "ANÁLISE DE MERCADO",
+    "OPORTUNIDADES DE VENDAS",
+    "STACK TECNOLÓGICO",
+    "ESTRATÉGIA DE ABORDAGEM",
+    "INSIGHTS ADICIONAIS",
+]
+
+
+# ---------------------------------------------------------------------------
+# Parsers anteriores (referência para a comparação)
+# ---------------------------------------------------------------------------
+
+def legacy_parse_output(text: str) -> Dict[str, Any]:
+    summary = text.strip()
+    key_points: List[str] = []
+    entities: Dict[str, Any] = {}
+    try:
+        entities_start = text.find("## ENTIDADES ESTRUTURADAS")
+        if entities_start != -1:
+            json_start = text.find("{", entities_start)
+            json_end = text.rfind("}", json_start)
+            if json_start != -1 and json_end != -1 and json_end > json_start:
+                json_str = text[json_start:json_end + 1]
+            entities = json.loads(json_str)
+    except Exception:
+        pass
+    summary_start = text.find("## RESUMO EXECUTIVO")
+    if summary_start != -1:
+        next_section = text.find("## ", summary_start + 1)
+        if next_section != -1:
+            summary = text[summary_start:next_section].replace("## RESUMO EXECUTIVO", "").strip()
+        else:
+            summary = text[summary_start:].replace("## RESUMO EXECUTIVO", "").strip()
+    for section in KEY_POINT_SECTIONS:
+        section_start = text.find(f"### {section}")
+        if section_start != -1:
+            next_section = text.find("### ", section_start + 1)
+            if next_section == -1:
+                next_section = text.find("## ", section_start + 1)
+            if next_section != -1:
+                section_content = text[section_start:next_section].replace(f"### {section}", "").strip()
+            else:
+                section_content = text[section_start:].replace(f"### {section}", "").strip()
+            section_content = section_content.strip()
+            if section_content and section_content != "Não especificado" and len(section_content) > 3:
+                key_points.append(f"{section}: {section_content}")
+    if not key_points:
+        for line in summary.splitlines():
+            s = line.strip("- *•\t ")
+            if len(s) > 0 and (line.strip().startswith(('-', '*', '•')) or s.endswith(';')):
+                key_points.append(s)
+    return {"summary": summary.strip(), "key_points": key_points, "entities": entities}
+
+
+def legacy_extract_section(content: str, section_name: str) -> str:
+    patterns = [f"=== {section_name} ===", f"### {section_name}", f"## {section_name}", f"# {section_name}", section_name]
+    lines = content.split('\n')
+    section_start = -1
+    section_end = len(lines)
+    for i, line in enumerate(lines):
+        line_upper = line.upper().strip()
+        for pattern in patterns:
+            if pattern.upper() in line_upper:
+                section_start = i + 1
+                break
+        if section_start != -1:
+            break
+    if section_start != -1:
+        for i in range(section_start, len(lines)):
+            line = lines[i].strip()
+            if line.startswith('===') or line.startswith('###') or line.startswith('##') or line.startswith('#'):
+                if i > section_start and any(marker in line for marker in ['===', '###', '##']):
+                    section_end = i
+                    break
+        section_lines = lines[section_start:section_end]
+        while section_lines and not section_lines[0].strip():
+            section_lines.pop(0)
+        while section_lines and not section_lines[-1].strip():
+            section_lines.pop()
+        section_content = '\n'.join(section_lines)
+        section_content = re.sub(r'\(Escreva.*?\)', '', section_content, flags=re.IGNORECASE | re.DOTALL)
+        section_content = section_content.strip()
+        if section_content and len(section_content) > 50:
+            return section_content
+        return f"Conteúdo da seção {section_name} não foi gerado adequadamente. Tente gerar o relatório novamente."
+    return f"Seção {section_name} não encontrada no relatório gerado."
+
+
+# ---------------------------------------------------------------------------
+# Corpus
+# ---------------------------------------------------------------------------
+
+FILLER = (
+    "A Acme Software atende redes de varejo de médio porte no Brasil com uma plataforma de CRM em nuvem. "
+    "Os clientes citados incluem 120 lojas e a empresa anuncia integração com ERPs e gateways de pagamento. "
+)
+
+
+def _fill(template: str) -> str:
+    """Troca os marcadores [..] do prompt por texto de exemplo."""
+    return re.sub(r"\[(?!\")[^\]\n]*\]", lambda m: FILLER[: 40 + len(m.group()) * 3].strip(), template)
+
+
+def summary_samples() -> List[str]:
+    template = SUMMARY_PROMPT.split("IMPORTANTE:")[0].replace("{{", "{").replace("}}", "}")
+    template = template[template.index("## RESUMO EXECUTIVO"):]
+    base = _fill(template)
+    return [
+        base,
+        # Seções com conteúdo longo
+        base.replace("**Core Technologies:**", "**Core Technologies:** " + FILLER * 5),
+        # Sem entidades e sem score
+        base.split("## ENTIDADES ESTRUTURADAS")[0],
+        # Resumo sem nenhuma seção: pontos-chave saem dos bullets
+        "Resumo curto da empresa.\n- Vende CRM para varejo\n- Atende 120 lojas\n* Integra com ERPs;\n",
+        # Entidades com JSON inválido
+        base.replace('"company_name"', "company_name"),
+        # Seção "Não especificado"
+        base.replace(_fill("**Pricing Strategy:** [Estratégia de preços identificada]"), "Não especificado", 1),
+        # Quebras de linha do Windows
+        base.replace("\n", "\r\n"),
+    ]
+
+
+REPORT_TEMPLATE = """Segue o relatório.
+
+=== RESUMO EXECUTIVO EXPANDIDO ===
+{p}
+
+=== ANÁLISE DE MERCADO ===
+(Escreva 200-400 palavras sobre segmento de mercado)
+{p}
+
+=== OPORTUNIDADES DE VENDAS ===
+{p}
+
+=== STACK TECNOLÓGICO ===
+{p}
+# Observação
+{p}
+
+=== ESTRATÉGIA DE ABORDAGEM ===
+**Personas de decisão**
+{p}
+
+=== INSIGHTS ADICIONAIS ===
+{p}
+"""
+
+
+def report_samples() -> List[str]:
+    base = REPORT_TEMPLATE.format(p=FILLER * 3)
+    return [
+        base,
+        # Markdown em vez de ===
+        re.sub(r"=== (.+?) ===", r"## \1", base),
+        # Títulos em negrito
+        re.sub(r"=== (.+?) ===", r"**\1**", base),
+        # Título sem marcação e seção vazia
+        base.replace("=== OPORTUNIDADES DE VENDAS ===", "OPORTUNIDADES DE VENDAS:").replace(
+            "=== INSIGHTS ADICIONAIS ===\n" + FILLER * 3, "=== INSIGHTS ADICIONAIS ===\n-"
+        ),
+        # Texto que cita o nome de uma seção antes do título dela
+        base.replace("Segue o relatório.", "Segue o relatório com a estratégia de abordagem recomendada."),
+        base.replace(FILLER * 3 + "\n\n=== ANÁLISE", FILLER * 3 + "\nA análise de mercado detalha os concorrentes.\n\n=== ANÁLISE", 1),
+        # Resposta truncada
+        base[: len(base) // 2],
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Comparação e benchmark
+# ---------------------------------------------------------------------------
+
+def _is_subsequence(items: List[str], sequence: List[str]) -> bool:
+    it = iter(sequence)
+    return all(item in it for item in items)
+
+
+def compare_summary(text: str) -> Tuple[bool, str]:
+    old, new = legacy_parse_output(text), _parse_output(text)
+    if old["summary"] != new["summary"]:
+        return False, "resumo diferente"
+    if old["entities"] != new["entities"]:
+        return False, "entidades diferentes"
+    if not _is_subsequence(old["key_points"], new["key_points"]):
+        return False, "pontos-chave do parser antigo ausentes ou alterados"
+    recovered = len(new["key_points"]) - len(old["key_points"])
+    return True, f"+{recovered} seções recuperadas" if recovered else "idêntico"
+
+
+def compare_report(text: str) -> Tuple[bool, str]:
+    notes = []
+    for name in REPORT_SECTIONS:
+        old, new = legacy_extract_section(text, name), extract_section(text, name)
+        if old == new:
+            continue
+        old_failed = old.startswith((f"Seção {name}", f"Conteúdo da seção {name}"))
+        # O parser antigo aceitava qualquer linha que citasse o nome da seção
+        first_mention = next(line for line in text.split("\n") if name.upper() in line.upper())
+        old_hit_prose = not first_mention.lstrip().startswith(("#", "=", "**"))
+        if old_failed or old_hit_prose:
+            notes.append(f"{name}: recuperada")
+            continue
+        return False, f"{name}: antigo={old[:80]!r} novo={new[:80]!r}"
+    return True, "; ".join(notes) or "idêntico"
+
+
+def _bench(fn: Callable[[], Any], iterations: int) -> float:
+    """Microssegundos por chamada (melhor de 3 rodadas)."""
+    return min(timeit.repeat(fn, number=iterations, repeat=3)) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("responses", type=pathlib.Path, nargs="?", help="Pasta com respostas reais (.txt/.md)")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    summaries, reports = summary_samples(), report_samples()
+    if args.responses:
+        for path in sorted(args.responses.rglob("*")):
+            if path.suffix.lower() in (".txt", ".md"):
+                text = path.read_text(encoding="utf-8", errors="ignore")
+                (reports if "===" in text else summaries).append(text)
+
+    failures = 0
+    for kind, samples, compare in (("resumo", summaries, compare_summary), ("relatório", reports, compare_report)):
+        for i, text in enumerate(samples):
+            ok, note = compare(text)
+            failures += not ok
+            print(f"{'✅' if ok else '❌'} {kind} #{i}: {note}")
+
+    print()
+    for kind, samples, old_fn, new_fn in (
+        ("_parse_output", summaries, legacy_parse_output, _parse_output),
+        ("extract_section x6", reports,
+         lambda t: [legacy_extract_section(t, n) for n in REPORT_SECTIONS],
+         # Como em generate_detailed_report: um índice para as seis seções
+         lambda t: [_report_section(index, n) for index in (SectionIndex(t),) for n in REPORT_SECTIONS]),
+    ):
+        old_us = _bench(lambda: [old_fn(t) for t in samples], args.iterations) / len(samples)
+        new_us = _bench(lambda: [new_fn(t) for t in samples], args.iterations) / len(samples)
+        print(f"{kind:<20} antigo {old_us:8.1f} µs | novo {new_us:8.1f} µs | {old_us / new_us:4.1f}x")
+
+    if failures:
+        print(f"\n❌ {failures} divergência(s) fora das regras")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark da detecção de tecnologias por regras (services/tech_fingerprint.py).
+
+Uso:
+    python -m app.scripts.bench_tech_fingerprint <pasta_com_paginas_html> [--repeat 20]
+
+Para cada página .html da pasta mostra as tecnologias detectadas (com a
+evidência) e o tempo de `detect_technologies` sobre o HTML bruto, ao lado do
+tempo de testar cada padrão na página inteira, que é o que a extração prévia
+das tags script/link/meta evita.
+"""
+import argparse
+import pathlib
+import re
+import timeit
+
+from ..services.tech_fingerprint import TECHNOLOGY_RULES, detect_technologies
+
+
+def _ms(fn, repeat: int) -> float:
+    return min(timeit.repeat(fn, number=1, repeat=repeat)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", type=pathlib.Path, help="Pasta com arquivos .html/.htm")
+    parser.add_argument("--repeat", type=int, default=20, help="Rodadas por medição (vale a melhor)")
+    args = parser.parse_args()
+
+    pages = sorted(p for p in args.corpus.rglob("*") if p.suffix.lower() in (".html", ".htm"))
+    if not pages:
+        raise SystemExit(f"Nenhuma página .html encontrada em {args.corpus}")
+
+    # Referência: cada padrão "assets" varrendo o HTML inteiro
+    whole_page = [re.compile(p.encode(), re.IGNORECASE) for rule in TECHNOLOGY_RULES.values() for p in rule.get("assets", ())]
+
+    totals = {"regras": 0.0, "página inteira": 0.0}
+    for page in pages:
+        content = page.read_bytes()
+        technologies = detect_technologies(content)
+        timings = {
+            "regras": _ms(lambda: detect_technologies(content), args.repeat),
+            "página inteira": _ms(lambda: [pattern.search(content) for pattern in whole_page], args.repeat),
+        }
+        for name, value in timings.items():
+            totals[name] += value
+        print(
+            f"{page.name:<30} {len(content):>8} bytes | "
+            + " | ".join(f"{name} {value:6.2f} ms" for name, value in timings.items())
+        )
+        for technology in technologies:
+            print(f"    {technology['name']:<20} {technology['category']:<25} {technology['evidence']}")
+
+    print(f"\n{len(pages)} páginas, média por página:")
+    for name, value in totals.items():
+        print(f"  {name:<15} {value / len(pages):6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
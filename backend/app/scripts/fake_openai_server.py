@@ -0,0 +1,444 @@
+"""
+Servidor falso compatível com a API da OpenAI, para testes de carga e latência.
+
+Uso:
+    python -m app.scripts.fake_openai_server [--port 8099] [--latency lognormal:800:0.4]
+        [--rate-429 0.05] [--rate-500 0.02] [--rate-timeout 0.01] [--seed 42]
+
+Atende /v1/chat/completions (com e sem stream) e /v1/embeddings sem gastar
+tokens e sem a variância da API real:
+
+- a latência segue a distribuição escolhida (ms): fixed:300, uniform:200:900,
+  normal:600:150 ou lognormal:<mediana>:<sigma>; no stream ela é o tempo até
+  o primeiro pedaço, e os demais saem a cada --stream-chunk-ms;
+- erros 429 (com Retry-After), 500 e timeouts (a resposta só sai depois de
+  --hang-s) são injetados nas taxas pedidas;
+- os sorteios vêm de --seed e do número da requisição: a n-ésima requisição
+  tem sempre a mesma latência e o mesmo erro, e a mesma mensagem gera sempre
+  a mesma resposta;
+- a resposta segue o formato pedido no próprio prompt, para passar pelos
+  parsers da aplicação: o modelo de seções ("=== TÍTULO ===" ou títulos
+  Markdown, como no SUMMARY_PROMPT e no relatório detalhado) é repetido com
+  os marcadores [..] e as instruções "(Escreva N palavras...)" preenchidos;
+  sem seções, o JSON de exemplo do prompt (fused, sentiment, mercado,
+  estratégia...) volta preenchido; o resto (chat, pedaços de páginas longas)
+  recebe texto corrido, limitado por max_tokens.
+
+Para a aplicação usar o servidor:
+    LLM_PROVIDER=openai_compatible LLM_BASE_URL=http://127.0.0.1:8099/v1
+ou, pelo SDK oficial da OpenAI:
+    LLM_PROVIDER=openai OPENAI_API_BASE=http://127.0.0.1:8099/v1 OPENAI_API_KEY=fake
+
+GET /stats mostra requisições, erros injetados e latências servidas
+(POST /stats/reset zera os contadores).
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+LatencySampler = Callable[[random.Random], float]
+
+# Marcador de conteúdo nos prompts: "[Setor específico]", "[1-10]", "[Alto/Médio/Baixo]"
+_PLACEHOLDER = re.compile(r"\[([^\[\]\n]{1,160})\]")
+_RANGE = re.compile(r"(\d+)-(\d+)")
+_OPTIONS = re.compile(r"[^\s/:\[\]]+(?:/[^\s/:\[\]]+)+")
+# Instrução de conteúdo: "(Escreva 300-500 palavras ...)", "(Parágrafo de 3-4 frases ...)"
+_INSTRUCTION = re.compile(r"^\(([^()]*(?:palavras|frases)[^()]*)\)$", re.IGNORECASE)
+_WORD_COUNT = re.compile(r"(\d+)(?:-\d+)?\s+palavras", re.IGNORECASE)
+_SENTENCE_COUNT = re.compile(r"(\d+)(?:-\d+)?\s+frases", re.IGNORECASE)
+_HEADING = re.compile(r"^(?:={3,}.*={3,}|#{1,6}\s+\S.*)$")
+# Fim do modelo de resposta nos prompts da aplicação
+_TEMPLATE_END = ("IMPORTANTE", "REGRAS", "TEXTO:")
+
+SENTENCES = [
+    "A empresa atende clientes B2B de médio porte com uma plataforma em nuvem.",
+    "O modelo de receita combina assinatura mensal com serviços de implantação.",
+    "Há sinais de expansão comercial para novas regiões e segmentos.",
+    "Os decisores típicos são diretores de operações e de tecnologia.",
+    "Integrações com ERPs e gateways de pagamento aparecem como diferencial.",
+    "O ciclo de vendas estimado fica entre dois e quatro meses.",
+    "A concorrência inclui fornecedores locais e plataformas internacionais.",
+    "Casos de sucesso citados indicam retorno rápido sobre o investimento.",
+    "A maturidade tecnológica parece alta, com APIs públicas documentadas.",
+    "Existe oportunidade de abordagem consultiva focada em eficiência operacional.",
+]
+DEFAULT_PARAGRAPH_WORDS = 80
+
+
+def parse_latency(spec: str) -> LatencySampler:
+    """"fixed:300", "uniform:200:900", "normal:600:150" ou "lognormal:800:0.4" (ms)."""
+    kind, *params = spec.split(":")
+    try:
+        values = [float(p) for p in params]
+        if kind == "fixed":
+            (ms,) = values
+            return lambda rng: ms
+        if kind == "uniform":
+            low, high = values
+            return lambda rng: rng.uniform(low, high)
+        if kind == "normal":
+            mean, std = values
+            return lambda rng: max(0.0, rng.gauss(mean, std))
+        if kind == "lognormal":
+            median, sigma = values
+            return lambda rng: rng.lognormvariate(math.log(median), sigma)
+    except ValueError:
+        pass
+    raise argparse.ArgumentTypeError(f"latência inválida: {spec}")
+
+
+@dataclass
+class FakeServerConfig:
+    latency: LatencySampler = field(default_factory=lambda: parse_latency("fixed:0"))
+    stream_chunk_ms: float = 20.0
+    rate_429: float = 0.0
+    rate_500: float = 0.0
+    rate_timeout: float = 0.0
+    retry_after_s: float = 1.0
+    hang_s: float = 300.0
+    embedding_dim: int = 1536
+    seed: int = 42
+
+
+# ---------------------------------------------------------------------------
+# Respostas
+# ---------------------------------------------------------------------------
+
+def _rng_for(*parts: Any) -> random.Random:
+    digest = hashlib.sha256("\x00".join(str(p) for p in parts).encode("utf-8")).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+
+def paragraph(rng: random.Random, words: int) -> str:
+    """Texto corrido com pelo menos `words` palavras."""
+    chosen: List[str] = []
+    count = 0
+    while count < words:
+        sentence = rng.choice(SENTENCES)
+        chosen.append(sentence)
+        count += len(sentence.split())
+    return " ".join(chosen)
+
+
+def fill_placeholder(label: str, rng: random.Random) -> str:
+    """Valor para um marcador [..] do prompt."""
+    label = label.strip()
+    words = _WORD_COUNT.search(label)
+    if words:
+        return paragraph(rng, int(words.group(1)))
+    if _RANGE.fullmatch(label):
+        low, high = map(int, _RANGE.fullmatch(label).groups())
+        return str((low + high + 1) // 2)
+    options = label.rsplit(":", 1)[-1].strip()
+    if _OPTIONS.fullmatch(options):
+        return options.split("/")[0]
+    return f"{label} (simulado)"
+
+
+def _fill_text(text: str, rng: random.Random) -> str:
+    if not text:
+        return "Não identificado"
+    if _OPTIONS.fullmatch(text):
+        return text.split("/")[0]
+    if "[" not in text and _WORD_COUNT.search(text):
+        return paragraph(rng, int(_WORD_COUNT.search(text).group(1)))
+    return _PLACEHOLDER.sub(lambda m: fill_placeholder(m.group(1), rng), text)
+
+
+def _fill_json(value: Any, rng: random.Random) -> Any:
+    if isinstance(value, dict):
+        return {key: _fill_json(item, rng) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_fill_json(item, rng) for item in value]
+    if isinstance(value, str):
+        return _fill_text(value, rng)
+    return value
+
+
+def _instructions(prompt: str) -> str:
+    """O prompt sem o texto da página (que vem depois de "TEXTO:")."""
+    return prompt.split("TEXTO:", 1)[0]
+
+
+def _template_lines(instructions: str) -> Optional[List[str]]:
+    """Linhas do modelo de seções do prompt (do primeiro título até as regras finais)."""
+    lines = instructions.replace("{{", "{").replace("}}", "}").split("\n")
+    start = next((i for i, line in enumerate(lines) if _HEADING.match(line.strip())), None)
+    if start is None:
+        return None
+    template = []
+    for line in lines[start:]:
+        if line.strip().startswith(_TEMPLATE_END):
+            break
+        template.append(line)
+    headings = sum(1 for line in template if _HEADING.match(line.strip()))
+    return template if headings >= 2 else None
+
+
+def _render_template(template: List[str], rng: random.Random) -> str:
+    rendered = []
+    for line in template:
+        instruction = _INSTRUCTION.match(line.strip())
+        if instruction:
+            words = _WORD_COUNT.search(instruction.group(1))
+            sentences = _SENTENCE_COUNT.search(instruction.group(1))
+            if words:
+                count = int(words.group(1))
+            elif sentences:
+                count = int(sentences.group(1)) * 12
+            else:
+                count = DEFAULT_PARAGRAPH_WORDS
+            rendered.append(paragraph(rng, count))
+        else:
+            rendered.append(_PLACEHOLDER.sub(lambda m: fill_placeholder(m.group(1), rng), line))
+    return "\n".join(rendered).strip()
+
+
+def _json_template(instructions: str) -> Optional[Any]:
+    """Último objeto JSON válido do prompt (o exemplo de resposta vem depois dos dados)."""
+    decoder = json.JSONDecoder()
+    found = None
+    position = instructions.find("{")
+    while position != -1:
+        try:
+            value, end = decoder.raw_decode(instructions, position)
+        except ValueError:
+            position = instructions.find("{", position + 1)
+            continue
+        if isinstance(value, dict):
+            found = value
+        position = instructions.find("{", end)
+    return found
+
+
+def canned_completion(messages: List[Dict[str, Any]], max_tokens: Optional[int] = None) -> str:
+    """Resposta determinística no formato que o prompt pede."""
+    prompt = "\n\n".join(str(m.get("content") or "") for m in messages if m.get("role") != "assistant")
+    user = next((str(m.get("content") or "") for m in reversed(messages) if m.get("role") == "user"), prompt)
+    rng = _rng_for(prompt)
+    instructions = _instructions(user)
+
+    template = _template_lines(instructions)
+    if template:
+        return _render_template(template, rng)
+    example = _json_template(instructions)
+    if example is not None:
+        return json.dumps(_fill_json(example, rng), ensure_ascii=False, indent=2)
+
+    words = DEFAULT_PARAGRAPH_WORDS * 2
+    if max_tokens:
+        words = min(words, max(1, int(max_tokens * 0.75)))
+    return " ".join(paragraph(rng, words).split()[:words])
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def embedding_vector(text: str, dim: int) -> List[float]:
+    """Vetor unitário determinístico para o texto."""
+    rng = _rng_for("embedding", text)
+    values = [rng.gauss(0.0, 1.0) for _ in range(dim)]
+    norm = math.sqrt(sum(v * v for v in values)) or 1.0
+    return [round(v / norm, 6) for v in values]
+
+
+# ---------------------------------------------------------------------------
+# Servidor
+# ---------------------------------------------------------------------------
+
+class _Stats:
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.requests: Dict[str, int] = {}
+        self.injected: Dict[str, int] = {"429": 0, "500": 0, "timeout": 0}
+        self.latencies_ms: List[float] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        ordered = sorted(self.latencies_ms)
+
+        def pct(p: float) -> Optional[float]:
+            return round(ordered[min(len(ordered) - 1, int(len(ordered) * p))], 1) if ordered else None
+
+        return {
+            "requests": self.requests,
+            "injected_errors": self.injected,
+            "latency_ms": {"p50": pct(0.5), "p95": pct(0.95), "p99": pct(0.99)},
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+        }
+
+
+def _error(status: int, message: str, kind: str, headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+    return JSONResponse({"error": {"message": message, "type": kind, "code": None}}, status_code=status, headers=headers)
+
+
+def create_app(config: FakeServerConfig) -> FastAPI:
+    """App do servidor falso (também pode ser montado em processo por scripts de benchmark)."""
+    app = FastAPI(title="Fake OpenAI")
+    stats = _Stats()
+    counter = {"n": 0}
+
+    async def draw(endpoint: str) -> Tuple[int, Optional[JSONResponse]]:
+        """Sorteia erro e latência da requisição; devolve o número da
+        requisição e a resposta de erro, se houver."""
+        counter["n"] += 1
+        n = counter["n"]
+        stats.requests[endpoint] = stats.requests.get(endpoint, 0) + 1
+        rng = _rng_for(config.seed, n)
+        roll = rng.random()
+        if roll < config.rate_429:
+            stats.injected["429"] += 1
+            return n, _error(429, "Rate limit reached (simulado)", "requests",
+                             headers={"Retry-After": str(config.retry_after_s)})
+        if roll < config.rate_429 + config.rate_500:
+            stats.injected["500"] += 1
+            return n, _error(500, "The server had an error (simulado)", "server_error")
+        if roll < config.rate_429 + config.rate_500 + config.rate_timeout:
+            stats.injected["timeout"] += 1
+            await asyncio.sleep(config.hang_s)
+            return n, _error(504, "Timeout (simulado)", "timeout")
+        latency_ms = config.latency(rng)
+        stats.latencies_ms.append(latency_ms)
+        await asyncio.sleep(latency_ms / 1000)
+        return n, None
+
+    @app.middleware("http")
+    async def track_in_flight(request: Request, call_next):
+        stats.in_flight += 1
+        stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+        try:
+            return await call_next(request)
+        finally:
+            stats.in_flight -= 1
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        model = body.get("model", "gpt-4o-mini")
+        content = canned_completion(body.get("messages") or [], body.get("max_tokens"))
+        prompt_tokens = estimate_tokens(json.dumps(body.get("messages") or [], ensure_ascii=False))
+        n, error = await draw("chat.stream" if body.get("stream") else "chat")
+        if error is not None:
+            return error
+        created = int(time.time())
+        completion_id = f"chatcmpl-fake-{n}"
+
+        if not body.get("stream"):
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": estimate_tokens(content),
+                    "total_tokens": prompt_tokens + estimate_tokens(content),
+                },
+            }
+
+        async def events():
+            def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> str:
+                payload = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                }
+                return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+            yield chunk({"role": "assistant"})
+            # Pedaços de ~4 palavras, como os tokens de um stream real
+            pieces = re.findall(r"(?:\S+\s*){1,4}|\s+", content)
+            for i, piece in enumerate(pieces):
+                if i:
+                    await asyncio.sleep(config.stream_chunk_ms / 1000)
+                yield chunk({"content": piece})
+            yield chunk({}, "stop")
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        inputs = body.get("input")
+        texts = inputs if isinstance(inputs, list) else [inputs or ""]
+        _, error = await draw("embeddings")
+        if error is not None:
+            return error
+        tokens = sum(estimate_tokens(str(text)) for text in texts)
+        return {
+            "object": "list",
+            "model": body.get("model", "text-embedding-ada-002"),
+            "data": [
+                {"object": "embedding", "index": i, "embedding": embedding_vector(str(text), config.embedding_dim)}
+                for i, text in enumerate(texts)
+            ],
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats.snapshot()
+
+    @app.post("/stats/reset")
+    async def reset_stats():
+        stats.reset()
+        return stats.snapshot()
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=parse_latency, default=parse_latency("lognormal:800:0.4"),
+                        help="Distribuição da latência em ms (padrão: lognormal:800:0.4)")
+    parser.add_argument("--stream-chunk-ms", type=float, default=20.0, help="Intervalo entre pedaços do stream")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fração de respostas 429")
+    parser.add_argument("--rate-500", type=float, default=0.0, help="Fração de respostas 500")
+    parser.add_argument("--rate-timeout", type=float, default=0.0, help="Fração de requisições que ficam penduradas")
+    parser.add_argument("--retry-after-s", type=float, default=1.0, help="Retry-After enviado com os 429")
+    parser.add_argument("--hang-s", type=float, default=300.0, help="Quanto uma requisição pendurada espera")
+    parser.add_argument("--embedding-dim", type=int, default=1536)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    config = FakeServerConfig(
+        latency=args.latency,
+        stream_chunk_ms=args.stream_chunk_ms,
+        rate_429=args.rate_429,
+        rate_500=args.rate_500,
+        rate_timeout=args.rate_timeout,
+        retry_after_s=args.retry_after_s,
+        hang_s=args.hang_s,
+        embedding_dim=args.embedding_dim,
+        seed=args.seed,
+    )
+    print(f"🤖 OpenAI falso em http://{args.host}:{args.port}/v1")
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,416 @@
+"""
+Teste de carga de ponta a ponta dos endpoints mais usados da API.
+
+Uso:
+    python -m app.scripts.load_test [--rps 20] [--duration 60] [--users 5]
+        [--mix analyze=2,chat=2,dashboard=2,kanban=2,history=2,reports=1]
+        [--database-url sqlite:///./loadtest.db] [--llm-latency lognormal:800:0.4]
+        [--save resultado.json] [--compare baseline.json]
+
+Sobe, a menos que --api-url/--llm-url apontem para servidores já rodando:
+- a API (uvicorn, um processo) no banco de --database-url, SQLite ou
+  Postgres local, com LLM_PROVIDER=openai_compatible apontando para...
+- ...o servidor falso da OpenAI (app/scripts/fake_openai_server.py);
+- e, sempre, um site falso (thread deste processo) com páginas de empresas
+  determinísticas, que o /analyze baixa no lugar da internet.
+
+Registra os usuários, faz login, semeia --seed-analyses análises por
+usuário e dispara requisições em taxa constante (--rps em laço aberto: uma
+resposta lenta não atrasa as próximas, até --max-in-flight simultâneas),
+sorteando a rota pelo mix:
+
+    analyze    POST /analyze/ (metade URL nova, metade já analisada)
+    chat       POST /chat/ (sem busca na web)
+    dashboard  GET /dashboard/
+    kanban     GET /kanban/pipeline
+    history    GET /history/
+    reports    POST /reports/generate/{id}
+
+Ao final mostra, por rota: requisições, vazão, taxa de erro, latência
+p50/p95/p99 e queries SQL por requisição (header X-DB-Queries). --save
+grava o resultado em JSON; com --compare, sai com código 1 se o p95 ou as
+queries médias de alguma rota piorarem além de --max-regression.
+"""
+import argparse
+import asyncio
+import json
+import os
+import pathlib
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+
+
+BACKEND_DIR = pathlib.Path(__file__).resolve().parents[2]
+ROUTES = ("analyze", "chat", "dashboard", "kanban", "history", "reports")
+DEFAULT_MIX = "analyze=2,chat=2,dashboard=2,kanban=2,history=2,reports=1"
+PASSWORD = "loadtest-password"
+
+QUESTIONS = [
+    "Quais empresas analisadas vendem para o varejo?",
+    "Qual o melhor argumento de abordagem para a empresa mais recente?",
+    "Quais tecnologias aparecem com mais frequência nas análises?",
+    "Resuma os principais pain points identificados.",
+]
+
+
+# ---------------------------------------------------------------------------
+# Site falso
+# ---------------------------------------------------------------------------
+
+PRODUCTS = ["CRM para varejo", "ERP em nuvem", "plataforma de pagamentos", "automação de marketing", "BI self-service"]
+SEGMENTS = ["varejo", "indústria", "saúde", "educação", "logística"]
+
+
+def company_page(n: int) -> bytes:
+    """Página determinística da empresa `n`."""
+    rng = random.Random(n)
+    product, segment = rng.choice(PRODUCTS), rng.choice(SEGMENTS)
+    paragraphs = "\n".join(
+        f"<p>A Empresa {n} oferece {product} para clientes de {segment}. "
+        f"Atendemos {rng.randint(20, 900)} clientes no Brasil e integramos com ERPs, gateways de pagamento e "
+        f"ferramentas de atendimento. Nosso time de {rng.randint(10, 400)} pessoas acompanha a implantação.</p>"
+        for _ in range(rng.randint(6, 20))
+    )
+    return f"""<!doctype html><html><head><title>Empresa {n} - {product}</title>
+<meta name="generator" content="WordPress 6.4">
+<script async src="https://www.googletagmanager.com/gtag/js?id=G-{n}"></script></head>
+<body><nav><a href="/">Início</a> <a href="/precos">Preços</a> <a href="/sobre">Sobre</a></nav>
+<h1>Empresa {n}</h1>{paragraphs}
+<h2>Preços</h2><p>Planos a partir de R$ {rng.randint(49, 999)} por mês.</p>
+<footer>contato@empresa{n}.com.br - (11) 4000-{n % 10000:04d}</footer></body></html>""".encode()
+
+
+class _SiteHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        try:
+            n = int(self.path.rstrip("/").rsplit("/", 1)[-1])
+        except ValueError:
+            self.send_error(404)
+            return
+        body = company_page(n)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@contextmanager
+def fake_site(port: int) -> Iterator[str]:
+    server = ThreadingHTTPServer(("127.0.0.1", port), _SiteHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+
+
+# ---------------------------------------------------------------------------
+# Processos auxiliares
+# ---------------------------------------------------------------------------
+
+@contextmanager
+def _process(command: List[str], env: Dict[str, str], health_url: str, name: str) -> Iterator[None]:
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env)
+    try:
+        deadline = time.time() + 30
+        while True:
+            if process.poll() is not None:
+                raise SystemExit(f"❌ {name} terminou com código {process.returncode}")
+            try:
+                if httpx.get(health_url, timeout=1).status_code < 500:
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.time() > deadline:
+                raise SystemExit(f"❌ {name} não respondeu em {health_url}")
+            time.sleep(0.2)
+        print(f"✅ {name} pronto")
+        yield
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def start_fake_llm(port: int, latency: str, stack: ExitStack) -> str:
+    command = [sys.executable, "-m", "app.scripts.fake_openai_server", "--port", str(port), "--latency", latency]
+    stack.enter_context(_process(command, dict(os.environ), f"http://127.0.0.1:{port}/stats", "OpenAI falso"))
+    return f"http://127.0.0.1:{port}/v1"
+
+
+def start_api(port: int, database_url: str, llm_url: str, stack: ExitStack) -> str:
+    env = {
+        **os.environ,
+        "DATABASE_URL": database_url,
+        "LLM_PROVIDER": "openai_compatible",
+        "LLM_BASE_URL": llm_url,
+        "LLM_API_KEY": "fake",
+        "DB_QUERY_COUNT_HEADER": "true",
+        "ANALYZE_ASYNC_DEFAULT": "false",
+    }
+    subprocess.run([sys.executable, "-m", "app.scripts.init_db"], cwd=BACKEND_DIR, env=env, check=True)
+    command = [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"]
+    stack.enter_context(_process(command, env, f"http://127.0.0.1:{port}/health", "API"))
+    return f"http://127.0.0.1:{port}"
+
+
+# ---------------------------------------------------------------------------
+# Carga
+# ---------------------------------------------------------------------------
+
+@dataclass
+class User:
+    email: str
+    headers: Dict[str, str]
+    analyses: List[Tuple[int, str]] = field(default_factory=list)  # (id, url)
+
+
+@dataclass
+class Sample:
+    route: str
+    latency_ms: float
+    status: int                  # 0: exceção no cliente (timeout, conexão)
+    db_queries: Optional[int]
+
+
+class LoadTest:
+    def __init__(self, client: httpx.AsyncClient, site_url: str, seed: int):
+        self.client = client
+        self.site_url = site_url
+        self.rng = random.Random(seed)
+        self.users: List[User] = []
+        self.samples: List[Sample] = []
+        self._next_page = seed * 1_000_000
+
+    def new_page_url(self) -> str:
+        self._next_page += 1
+        return f"{self.site_url}/company/{self._next_page}"
+
+    async def setup_users(self, count: int, seed_analyses: int) -> None:
+        for i in range(count):
+            email = f"loadtest{i}@example.com"
+            await self.client.post("/auth/register", json={"email": email, "password": PASSWORD})  # 400 se já existe
+            resp = await self.client.post("/auth/login", data={"username": email, "password": PASSWORD})
+            resp.raise_for_status()
+            user = User(email, {"Authorization": f"Bearer {resp.json()['access_token']}"})
+            for _ in range(seed_analyses):
+                url = self.new_page_url()
+                resp = await self.client.post("/analyze/", json={"url": url}, headers=user.headers)
+                resp.raise_for_status()
+                user.analyses.append((resp.json()["id"], url))
+            self.users.append(user)
+        print(f"👥 {count} usuários, {count * seed_analyses} análises semeadas")
+
+    async def request(self, route: str) -> None:
+        user = self.rng.choice(self.users)
+        label, method, path, kwargs = self._plan(route, user)
+        started = time.perf_counter()
+        try:
+            resp = await self.client.request(method, path, headers=user.headers, **kwargs)
+            status = resp.status_code
+            queries = resp.headers.get("x-db-queries")
+            if route == "analyze" and status == 200 and label.endswith("(nova)"):
+                user.analyses.append((resp.json()["id"], kwargs["json"]["url"]))
+        except httpx.HTTPError:
+            status, queries = 0, None
+        latency_ms = (time.perf_counter() - started) * 1000
+        self.samples.append(Sample(label, latency_ms, status, int(queries) if queries is not None else None))
+
+    def _plan(self, route: str, user: User) -> Tuple[str, str, str, Dict[str, Any]]:
+        """(rótulo, método, path, kwargs do httpx) da requisição sorteada."""
+        if route == "analyze":
+            if user.analyses and self.rng.random() < 0.5:
+                return "POST /analyze (cache)", "POST", "/analyze/", {"json": {"url": self.rng.choice(user.analyses)[1]}}
+            return "POST /analyze (nova)", "POST", "/analyze/", {"json": {"url": self.new_page_url()}}
+        if route == "chat":
+            body = {"message": self.rng.choice(QUESTIONS), "use_web_search": False, "max_history": 4}
+            return "POST /chat", "POST", "/chat/", {"json": body}
+        if route == "reports":
+            analysis_id = self.rng.choice(user.analyses)[0]
+            return "POST /reports/generate/{id}", "POST", f"/reports/generate/{analysis_id}", {}
+        path = {"dashboard": "/dashboard/", "kanban": "/kanban/pipeline", "history": "/history/"}[route]
+        return f"GET {path.rstrip('/')}", "GET", path, {}
+
+    async def run(self, mix: Dict[str, float], rps: float, duration_s: float, max_in_flight: int) -> float:
+        """Dispara requisições em taxa constante; retorna a duração real."""
+        routes, weights = zip(*mix.items())
+        semaphore = asyncio.Semaphore(max_in_flight)
+        tasks = []
+
+        async def limited(route: str) -> None:
+            async with semaphore:
+                await self.request(route)
+
+        started = time.perf_counter()
+        total = int(rps * duration_s)
+        for i in range(total):
+            # Agenda pelo relógio (laço aberto): atrasos de uma resposta não reduzem a taxa
+            delay = started + i / rps - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(limited(self.rng.choices(routes, weights)[0])))
+        await asyncio.gather(*tasks)
+        return time.perf_counter() - started
+
+
+# ---------------------------------------------------------------------------
+# Relatório
+# ---------------------------------------------------------------------------
+
+def _percentile(ordered: List[float], pct: float) -> Optional[float]:
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def summarize(samples: List[Sample], elapsed_s: float) -> Dict[str, Any]:
+    by_route: Dict[str, List[Sample]] = defaultdict(list)
+    for sample in samples:
+        by_route[sample.route].append(sample)
+
+    routes = {}
+    for route, items in sorted(by_route.items()):
+        ok = sorted(s.latency_ms for s in items if 0 < s.status < 400)
+        errors = [s for s in items if not 0 < s.status < 400]
+        queries = [s.db_queries for s in items if s.db_queries is not None]
+        errors_by_status: Dict[str, int] = defaultdict(int)
+        for sample in errors:
+            errors_by_status[str(sample.status)] += 1
+        routes[route] = {
+            "requests": len(items),
+            "rps": round(len(items) / elapsed_s, 2),
+            "error_rate": round(len(errors) / len(items), 4),
+            "errors_by_status": dict(sorted(errors_by_status.items())),
+            "latency_ms": {name: round(_percentile(ok, pct), 1) if ok else None
+                           for name, pct in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))},
+            "db_queries": {"avg": round(sum(queries) / len(queries), 1) if queries else None,
+                           "max": max(queries) if queries else None},
+        }
+    total_errors = sum(1 for s in samples if not 0 < s.status < 400)
+    return {
+        "elapsed_s": round(elapsed_s, 2),
+        "requests": len(samples),
+        "throughput_rps": round(len(samples) / elapsed_s, 2) if elapsed_s else 0,
+        "error_rate": round(total_errors / len(samples), 4) if samples else 0,
+        "routes": routes,
+    }
+
+
+def print_report(result: Dict[str, Any]) -> None:
+    print(f"\n{result['requests']} requisições em {result['elapsed_s']} s: "
+          f"{result['throughput_rps']} req/s, {result['error_rate']:.1%} de erros\n")
+    print(f"{'rota':<30} {'req':>6} {'req/s':>7} {'erros':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'queries':>8} {'máx':>5}")
+    for route, r in result["routes"].items():
+        lat = r["latency_ms"]
+        fmt = lambda v: f"{v:9.1f}" if v is not None else f"{'-':>9}"
+        queries = r["db_queries"]
+        print(
+            f"{route:<30} {r['requests']:>6} {r['rps']:>7.2f} {r['error_rate']:>7.1%} "
+            f"{fmt(lat['p50'])} {fmt(lat['p95'])} {fmt(lat['p99'])} "
+            f"{queries['avg'] if queries['avg'] is not None else '-':>8} {queries['max'] if queries['max'] is not None else '-':>5}"
+        )
+        if r["errors_by_status"]:
+            print(f"{'':<30} erros por status: {r['errors_by_status']}")
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """Rotas cujo p95 ou média de queries piorou além do limite."""
+    regressions = []
+    for route, r in result["routes"].items():
+        base = baseline.get("routes", {}).get(route)
+        if not base:
+            continue
+        p95, base_p95 = r["latency_ms"]["p95"], base["latency_ms"]["p95"]
+        if p95 and base_p95 and p95 > base_p95 * (1 + max_regression):
+            regressions.append(f"{route}: p95 {base_p95} → {p95} ms")
+        queries, base_queries = r["db_queries"]["avg"], base["db_queries"]["avg"]
+        if queries is not None and base_queries is not None and queries - base_queries >= 1 and queries > base_queries * (1 + max_regression):
+            regressions.append(f"{route}: queries {base_queries} → {queries} por requisição")
+        if r["error_rate"] > base["error_rate"] + 0.01:
+            regressions.append(f"{route}: erros {base['error_rate']:.1%} → {r['error_rate']:.1%}")
+    return regressions
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for item in spec.split(","):
+        route, _, weight = item.partition("=")
+        if route.strip() not in ROUTES:
+            raise argparse.ArgumentTypeError(f"rota desconhecida no mix: {route} (use {', '.join(ROUTES)})")
+        mix[route.strip()] = float(weight or 1)
+    return {route: weight for route, weight in mix.items() if weight > 0}
+
+
+async def _main(args: argparse.Namespace, api_url: str, site_url: str) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+    async with httpx.AsyncClient(base_url=api_url, timeout=args.timeout, limits=limits) as client:
+        test = LoadTest(client, site_url, args.seed)
+        await test.setup_users(args.users, args.seed_analyses)
+        print(f"🚀 {args.rps} req/s por {args.duration} s, mix {args.mix}")
+        elapsed = await test.run(args.mix, args.rps, args.duration, args.max_in_flight)
+        return summarize(test.samples, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rps", type=float, default=10.0, help="Requisições por segundo")
+    parser.add_argument("--duration", type=float, default=30.0, help="Duração da fase de carga (s)")
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--seed-analyses", type=int, default=3, help="Análises criadas por usuário antes da carga")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f"Pesos das rotas (padrão: {DEFAULT_MIX})")
+    parser.add_argument("--max-in-flight", type=int, default=100, help="Requisições simultâneas no máximo")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Timeout por requisição (s)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--api-url", help="API já rodando (senão sobe uma com uvicorn)")
+    parser.add_argument("--api-port", type=int, default=8097)
+    parser.add_argument("--database-url", default="sqlite:///./loadtest.db", help="Banco da API iniciada pelo script")
+    parser.add_argument("--llm-url", help="Endpoint compatível com a OpenAI já rodando (ex.: http://127.0.0.1:8099/v1)")
+    parser.add_argument("--llm-port", type=int, default=8099)
+    parser.add_argument("--llm-latency", default="lognormal:800:0.4", help="Latência do OpenAI falso (ver fake_openai_server)")
+    parser.add_argument("--site-port", type=int, default=8098)
+    parser.add_argument("--save", type=pathlib.Path, help="Grava o resultado em JSON")
+    parser.add_argument("--compare", type=pathlib.Path, help="Resultado anterior (JSON) para detectar regressões")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Piora relativa tolerada no p95 e nas queries")
+    args = parser.parse_args()
+
+    with ExitStack() as stack:
+        site_url = stack.enter_context(fake_site(args.site_port))
+        api_url = args.api_url
+        if not api_url:
+            llm_url = args.llm_url or start_fake_llm(args.llm_port, args.llm_latency, stack)
+            api_url = start_api(args.api_port, args.database_url, llm_url, stack)
+        result = asyncio.run(_main(args, api_url.rstrip("/"), site_url))
+
+    print_report(result)
+    if args.save:
+        args.save.write_text(json.dumps(result, indent=2, ensure_ascii=False))
+        print(f"\n💾 Resultado gravado em {args.save}")
+    if args.compare:
+        regressions = compare(result, json.loads(args.compare.read_text()), args.max_regression)
+        if regressions:
+            print("\n❌ Regressões em relação a", args.compare)
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print(f"\n✅ Sem regressões em relação a {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
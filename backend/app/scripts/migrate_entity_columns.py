@@ -0,0 +1,98 @@
+"""
+Converte page_analyses.entities para JSON e preenche as colunas derivadas
+
+Bancos criados antes das colunas industry, sales_potential, has_enrichment e
+tech_stack não as têm (o create_all do init_db não altera tabelas
+existentes), e no Postgres a coluna entities ainda é TEXT: aqui ela vira
+JSONB (JSON inválido vira NULL, com aviso). No SQLite o tipo JSON já é
+texto e não muda. Idempotente: pode ser executado de novo sem efeito.
+
+Uso:
+    python -m app.scripts.migrate_entity_columns
+"""
+import json
+
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import undefer_group
+
+from ..database import SessionLocal, engine
+from ..models import PageAnalysis
+
+
+BATCH_SIZE = 500
+
+NEW_COLUMNS = {
+    "industry": "VARCHAR(100)",
+    "sales_potential": "VARCHAR(50)",
+    "has_enrichment": "BOOLEAN NOT NULL DEFAULT FALSE",
+    "tech_stack": "JSONB" if engine.dialect.name == "postgresql" else "JSON",
+}
+INDEXED_COLUMNS = ("industry", "sales_potential", "has_enrichment")
+
+
+def ensure_columns() -> None:
+    columns = {column["name"] for column in inspect(engine).get_columns("page_analyses")}
+    with engine.begin() as conn:
+        for name, ddl in NEW_COLUMNS.items():
+            if name not in columns:
+                conn.execute(text(f"ALTER TABLE page_analyses ADD COLUMN {name} {ddl}"))
+                print(f"Coluna {name} criada.")
+        for name in INDEXED_COLUMNS:
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_page_analyses_{name} ON page_analyses ({name})"
+            ))
+
+
+def convert_entities_column() -> None:
+    """TEXT -> JSONB no Postgres."""
+    if engine.dialect.name != "postgresql":
+        return
+    column = next(c for c in inspect(engine).get_columns("page_analyses") if c["name"] == "entities")
+    if column["type"].__class__.__name__ == "JSONB":
+        return
+    with engine.begin() as conn:
+        invalid = []
+        for analysis_id, raw in conn.execute(text("SELECT id, entities FROM page_analyses WHERE entities IS NOT NULL")):
+            try:
+                json.loads(raw)
+            except ValueError:
+                invalid.append(analysis_id)
+        if invalid:
+            print(f"⚠️ {len(invalid)} análises com entities inválido (viram NULL): {invalid[:20]}")
+            conn.execute(text("UPDATE page_analyses SET entities = NULL WHERE id = ANY(:ids)"), {"ids": invalid})
+        conn.execute(text(
+            "ALTER TABLE page_analyses ALTER COLUMN entities TYPE JSONB USING NULLIF(entities, '')::jsonb"
+        ))
+    print("Coluna entities convertida para JSONB.")
+
+
+def backfill() -> int:
+    """Reatribui entities em lotes: o @validates do modelo recalcula as colunas."""
+    db = SessionLocal()
+    updated = 0
+    last_id = 0
+    try:
+        while True:
+            rows = db.query(PageAnalysis).options(undefer_group("content")).filter(
+                PageAnalysis.id > last_id
+            ).order_by(PageAnalysis.id).limit(BATCH_SIZE).all()
+            if not rows:
+                break
+            for analysis in rows:
+                analysis.entities = analysis.entities
+            db.commit()
+            updated += len(rows)
+            last_id = rows[-1].id
+    finally:
+        db.close()
+    return updated
+
+
+def main():
+    ensure_columns()
+    convert_entities_column()
+    print(f"{backfill()} análises atualizadas.")
+
+
+if __name__ == "__main__":
+    main()
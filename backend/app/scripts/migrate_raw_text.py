@@ -0,0 +1,82 @@
+"""
+Move page_analyses.raw_text para page_analysis_texts (comprimido com zlib)
+
+Bancos criados antes da tabela lateral guardam o texto extraído na própria
+linha da análise, que toda listagem lê. Aqui cada texto é comprimido e
+copiado para page_analysis_texts, e a coluna antiga é zerada em lotes (ou
+removida, com --drop-column). Idempotente: pode ser executado de novo sem
+efeito. No Postgres, rode VACUUM FULL page_analyses depois para devolver o
+espaço ao sistema.
+
+Uso:
+    python -m app.scripts.migrate_raw_text [--drop-column]
+"""
+import argparse
+
+from sqlalchemy import inspect, text
+
+from ..database import SessionLocal, engine
+from ..models import PageAnalysisText
+
+
+BATCH_SIZE = 200
+
+
+def has_raw_text_column() -> bool:
+    return any(column["name"] == "raw_text" for column in inspect(engine).get_columns("page_analyses"))
+
+
+def move_texts() -> tuple:
+    """Copia os textos em lotes; devolve (análises, bytes originais, bytes comprimidos)."""
+    db = SessionLocal()
+    moved = original = compressed = 0
+    try:
+        while True:
+            rows = db.execute(text(
+                "SELECT id, raw_text FROM page_analyses WHERE raw_text IS NOT NULL ORDER BY id LIMIT :limit"
+            ), {"limit": BATCH_SIZE}).all()
+            if not rows:
+                break
+            for analysis_id, raw_text in rows:
+                blob = db.merge(PageAnalysisText(analysis_id=analysis_id, text=raw_text))
+                original += blob.size_bytes
+                compressed += len(blob.content)
+            db.flush()
+            db.execute(
+                text("UPDATE page_analyses SET raw_text = NULL WHERE id = :id"),
+                [{"id": analysis_id} for analysis_id, _ in rows],
+            )
+            db.commit()
+            moved += len(rows)
+    finally:
+        db.close()
+    return moved, original, compressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--drop-column", action="store_true", help="Remove page_analyses.raw_text após a cópia")
+    args = parser.parse_args()
+
+    PageAnalysisText.__table__.create(bind=engine, checkfirst=True)
+    if not has_raw_text_column():
+        print("page_analyses.raw_text já não existe; nada a migrar.")
+        return
+
+    moved, original, compressed = move_texts()
+    if moved:
+        print(
+            f"{moved} textos movidos: {original / 1024:.0f} KB → {compressed / 1024:.0f} KB "
+            f"(razão {compressed / max(original, 1):.2f})"
+        )
+    else:
+        print("Nenhum texto a mover.")
+
+    if args.drop_column:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE page_analyses DROP COLUMN raw_text"))
+        print("Coluna raw_text removida.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+Jobs assíncronos de análise
+
+O POST /analyze com `async_job` grava um AnalysisJob e responde 202 na hora;
+um pool de workers asyncio (iniciado no lifespan) consome a fila e roda o
+mesmo `run_analysis` do caminho síncrono. O estado fica no banco, então
+jobs na fila ou interrompidos voltam a ser processados após um restart, e
+o progresso é publicado para assinantes SSE deste processo.
+"""
+import asyncio
+import json
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..config import settings
+from ..database import SessionLocal
+from ..middleware import work_context
+from .analysis_runner import FetchError, run_analysis
+from .llm_client import priority_lane
+
+
+TERMINAL_STATUSES = frozenset({"done", "failed"})
+
+_queue: Optional["asyncio.Queue[int]"] = None
+_workers: List[asyncio.Task] = []
+_running: Set[int] = set()                              # jobs em execução neste processo
+_subscribers: Dict[int, List[asyncio.Queue]] = {}       # assinantes SSE por job
+
+
+def job_payload(job: models.AnalysisJob) -> Dict[str, Any]:
+    """Campos públicos de um job (status endpoint e eventos SSE)."""
+    return {
+        "id": job.id,
+        "url": job.url,
+        "status": job.status,
+        "stage": job.stage,
+        "error": job.error,
+        "analysis_id": job.analysis_id,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+def _insert_job(db: Session, url: str, owner_id: Optional[int], params: Dict[str, Any]) -> models.AnalysisJob:
+    job = models.AnalysisJob(url=url, owner_id=owner_id, params=json.dumps(params), status="queued")
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+async def create_job(db: Session, url: str, owner_id: Optional[int], params: Dict[str, Any]) -> models.AnalysisJob:
+    """Grava o job e o coloca na fila de execução."""
+    # INSERT numa thread; a fila (asyncio.Queue) só é tocada no event loop
+    job = await asyncio.to_thread(_insert_job, db, url, owner_id, params)
+    if _queue is not None:
+        _queue.put_nowait(job.id)
+    else:
+        # Sem workers neste processo: fica na fila do banco até o próximo startup
+        print(f"⚠️ Workers de análise não iniciados; job {job.id} aguardará na fila")
+    return job
+
+
+def _publish(job_id: int, event: str, data: Dict[str, Any]) -> None:
+    for queue in _subscribers.get(job_id, []):
+        queue.put_nowait((event, data))
+
+
+def _claim(db: Session, job_id: int) -> bool:
+    """Marca o job como running se ainda estiver na fila (evita execução dupla)."""
+    now = datetime.utcnow()
+    claimed = db.query(models.AnalysisJob).filter(
+        models.AnalysisJob.id == job_id,
+        models.AnalysisJob.status == "queued",
+    ).update(
+        {
+            models.AnalysisJob.status: "running",
+            models.AnalysisJob.started_at: now,
+            models.AnalysisJob.updated_at: now,
+            models.AnalysisJob.attempts: models.AnalysisJob.attempts + 1,
+        },
+        synchronize_session=False,
+    )
+    db.commit()
+    return claimed == 1
+
+
+async def _run_job(job_id: int) -> None:
+    db = SessionLocal()
+    try:
+        if not _claim(db, job_id):
+            return
+        _running.add(job_id)
+        job = db.get(models.AnalysisJob, job_id)
+        params = json.loads(job.params) if job.params else {}
+        _publish(job_id, "running", {})
+
+        def on_progress(event: str, data: Dict[str, Any]) -> None:
+            if event != "stage":
+                job.stage = event
+                db.commit()
+            _publish(job_id, event, data)
+
+        try:
+            # Jobs em segundo plano não disputam vaga de LLM com o chat/dashboard
+            with priority_lane("batch"), work_context("job:analysis", job.owner_id):
+                analysis = await run_analysis(db, job.url, owner_id=job.owner_id, on_progress=on_progress, **params)
+            job.status = "done"
+            job.analysis_id = analysis.id
+        except FetchError as e:
+            db.rollback()
+            job.status, job.error = "failed", f"Failed to fetch URL: {e}"
+        except Exception as e:
+            db.rollback()
+            job.status, job.error = "failed", str(e)[:1000]
+            print(f"❌ Job de análise {job_id} falhou: {e}")
+        job.finished_at = datetime.utcnow()
+        db.commit()
+        _publish(job_id, job.status, {"analysis_id": job.analysis_id, "error": job.error})
+    finally:
+        _running.discard(job_id)
+        db.close()
+
+
+async def _worker(queue: "asyncio.Queue[int]") -> None:
+    while True:
+        job_id = await queue.get()
+        try:
+            await _run_job(job_id)
+        except Exception as e:  # nunca derruba o worker
+            print(f"❌ Erro no worker de análise (job {job_id}): {e}")
+        finally:
+            queue.task_done()
+
+
+def _recover_jobs(queue: "asyncio.Queue[int]") -> int:
+    """Recoloca na fila jobs pendentes e jobs "running" abandonados (crash)."""
+    db = SessionLocal()
+    try:
+        stale_before = datetime.utcnow() - timedelta(seconds=settings.ANALYSIS_JOB_STALE_S)
+        db.query(models.AnalysisJob).filter(
+            models.AnalysisJob.status == "running",
+            models.AnalysisJob.updated_at < stale_before,
+        ).update({models.AnalysisJob.status: "queued"}, synchronize_session=False)
+        db.commit()
+        pending = db.query(models.AnalysisJob.id).filter(
+            models.AnalysisJob.status == "queued"
+        ).order_by(models.AnalysisJob.id).all()
+        for (job_id,) in pending:
+            queue.put_nowait(job_id)
+        return len(pending)
+    finally:
+        db.close()
+
+
+async def start_workers() -> None:
+    """Inicia os workers e retoma jobs pendentes (chamado no startup)."""
+    global _queue
+    if _queue is not None:
+        return
+    _queue = asyncio.Queue()
+    for _ in range(settings.ANALYSIS_JOB_WORKERS):
+        _workers.append(asyncio.create_task(_worker(_queue)))
+    try:
+        recovered = _recover_jobs(_queue)
+    except Exception as e:  # banco sem a tabela ainda (init_db não rodou)
+        recovered = 0
+        print(f"⚠️ Não foi possível retomar jobs de análise: {str(e)[:100]}")
+    print(f"📋 {settings.ANALYSIS_JOB_WORKERS} workers de análise iniciados ({recovered} jobs retomados)")
+
+
+async def stop_workers() -> None:
+    """Cancela os workers; jobs interrompidos voltam para a fila no banco."""
+    global _queue
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+    _queue = None
+    if _running:
+        db = SessionLocal()
+        try:
+            db.query(models.AnalysisJob).filter(
+                models.AnalysisJob.id.in_(list(_running)),
+                models.AnalysisJob.status == "running",
+            ).update({models.AnalysisJob.status: "queued"}, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+        _running.clear()
+
+
+def _event_name(state: Dict[str, Any]) -> str:
+    # Enquanto roda, o nome do evento é a fase (fetched, summarized, enriched)
+    if state["status"] == "running" and state["stage"]:
+        return state["stage"]
+    return state["status"]
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def job_events(job_id: int, poll_interval_s: float = 2.0) -> AsyncIterator[str]:
+    """Stream SSE do progresso de um job até ele terminar.
+
+    Eventos publicados neste processo chegam na hora; o banco é relido a
+    cada `poll_interval_s`, o que cobre jobs executados por outro worker.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    _subscribers.setdefault(job_id, []).append(queue)
+    last_event = None
+    try:
+        while True:
+            db = SessionLocal()
+            try:
+                job = db.get(models.AnalysisJob, job_id)
+                state = job_payload(job) if job else None
+            finally:
+                db.close()
+            if state is None:
+                yield _sse("failed", {"error": "Job não encontrado"})
+                return
+
+            event = _event_name(state)
+            if event != last_event:
+                yield _sse(event, state)
+                last_event = event
+            if state["status"] in TERMINAL_STATUSES:
+                return
+
+            try:
+                events = [await asyncio.wait_for(queue.get(), timeout=poll_interval_s)]
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            while not queue.empty():
+                events.append(queue.get_nowait())
+            for name, data in events:
+                # Status finais saem com o estado completo relido do banco
+                if name in TERMINAL_STATUSES:
+                    break
+                if name != last_event:
+                    yield _sse(name, {"id": job_id, **data})
+                if name != "stage":
+                    last_event = name
+    finally:
+        _subscribers[job_id].remove(queue)
+        if not _subscribers[job_id]:
+            del _subscribers[job_id]
@@ -0,0 +1,278 @@
+"""
+Execução de uma análise de URL (fetch/crawl + pipeline de LLM + persistência)
+
+Núcleo compartilhado pelo POST /analyze síncrono e pelos jobs assíncronos.
+O progresso é reportado por callback nas fases "fetched", "summarized" e
+"enriched", além do fim de cada estágio do DAG.
+"""
+import asyncio
+import json
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, undefer_group
+
+from .. import models
+from .crawler import crawl_site, page_limit
+from .page_snapshots import check_unchanged, refresh_fetch, save_snapshot
+from .pipeline import AnalysisOutput, run_analysis_pipeline
+from .scraper import FetchResult, fetch_page
+from .singleflight import SingleFlight, db_claim
+from .tech_fingerprint import merge_tech_stack
+from .url_canonical import canonical_key
+
+
+ProgressCallback = Callable[[str, Dict[str, Any]], None]
+
+# Fase reportada quando todos os estágios de um dos conjuntos terminam
+# (modo multi ou modo fused, que entrega tudo de uma vez)
+PHASE_STAGES = {
+    "summarized": ({"summary", "sentiment"}, {"fused"}),
+    "enriched": ({"market", "strategy"}, {"fused"}),
+}
+
+
+# Análises em andamento neste processo, por URL e modo (ver `_flight_key`)
+_flights: "SingleFlight[int]" = SingleFlight()
+
+
+class FetchError(Exception):
+    """Falha ao obter a página (ou o site, no modo crawl)."""
+
+
+def _flight_key(key: str, crawl: bool, max_pages: Optional[int]) -> str:
+    """Chave do single-flight e do claim no banco.
+
+    Página única e crawl (com cada limite de páginas) produzem análises
+    diferentes: só chamadas no mesmo modo compartilham a execução."""
+    return f"{key}|crawl={page_limit(max_pages)}" if crawl else key
+
+
+def _find_analysis_query(url: str, key: Optional[str]):
+    key = key or canonical_key(url)
+    # Resposta de cache devolve resumo, pontos e entidades: carrega junto
+    return select(models.PageAnalysis).options(undefer_group("content")).where(
+        or_(models.PageAnalysis.canonical_key == key, models.PageAnalysis.url == url)
+    ).order_by(models.PageAnalysis.id).limit(1)
+
+
+def find_analysis(db: Session, url: str, key: Optional[str] = None) -> Optional[models.PageAnalysis]:
+    """Busca a análise de uma URL pela chave canônica (ou pela URL exata,
+    para linhas ainda sem `canonical_key`)."""
+    return db.execute(_find_analysis_query(url, key)).scalars().first()
+
+
+async def find_analysis_async(db: AsyncSession, url: str, key: Optional[str] = None) -> Optional[models.PageAnalysis]:
+    """Como `find_analysis`, em sessão assíncrona (cache do POST /analyze)."""
+    return (await db.execute(_find_analysis_query(url, key))).scalars().first()
+
+
+def _stage_tracker(on_progress: ProgressCallback) -> Callable[[str, Dict[str, Any]], None]:
+    """Converte eventos de estágio do DAG em eventos de fase."""
+    done: set = set()
+
+    def on_stage(name: str, timing: Dict[str, Any]) -> None:
+        done.add(name)
+        on_progress("stage", {"stage": name, **timing})
+        for phase, alternatives in PHASE_STAGES.items():
+            if any(name in stages and stages <= done for stages in alternatives):
+                on_progress(phase, {})
+
+    return on_stage
+
+
+async def _fetch(
+    db: Session,
+    url: str,
+    existing: Optional[models.PageAnalysis],
+    crawl: bool,
+    max_pages: Optional[int],
+) -> Optional[Tuple[FetchResult, Optional[Dict[str, Any]], Dict[str, Any]]]:
+    """Obtém o texto da página (ou do site); None se uma análise existente não mudou."""
+    if crawl:
+        # Modo crawl: página inicial + páginas comerciais do mesmo site
+        result = await crawl_site(url, max_pages=max_pages)
+        if existing and await asyncio.to_thread(check_unchanged, db, existing, result.page) is None:
+            return None
+        return result.page, result.stats(), result.extraction_stats()
+    if existing:
+        # Refresh: GET condicional; se nada mudou, pula todo o pipeline de LLM
+        page = await refresh_fetch(db, existing)
+        if page is None:
+            return None
+    else:
+        page = await fetch_page(url)
+    return page, None, page.extraction_stats()
+
+
+def _find_again(db: Session, url: str, key: str) -> Optional[int]:
+    """Relê a análise ignorando o que a sessão já carregou (gravada por outro worker)."""
+    db.expire_all()
+    done = find_analysis(db, url, key)
+    return done.id if done else None
+
+
+def _load_analysis(db: Session, analysis_id: int) -> models.PageAnalysis:
+    """Carrega a análise com o conteúdo: quem recebe não faz lazy load no event loop."""
+    return db.get(
+        models.PageAnalysis, analysis_id, options=[undefer_group("content")], populate_existing=True,
+    )
+
+
+async def run_analysis(
+    db: Session,
+    url: str,
+    owner_id: Optional[int] = None,
+    refresh: bool = False,
+    crawl: bool = False,
+    max_pages: Optional[int] = None,
+    on_progress: Optional[ProgressCallback] = None,
+    fetch_semaphore: Optional[asyncio.Semaphore] = None,
+    llm_semaphore: Optional[asyncio.Semaphore] = None,
+) -> models.PageAnalysis:
+    """Analisa `url` e persiste o resultado, reaproveitando o cache quando possível.
+
+    Chamadas concorrentes para a mesma URL compartilham uma única execução
+    (single-flight no processo + claim no banco entre processos).
+    `fetch_semaphore`/`llm_semaphore` limitam, em lotes, quantas análises
+    estão ao mesmo tempo na fase de fetch e na fase de LLM.
+
+    Raises:
+        FetchError: se a página não puder ser obtida
+    """
+    progress = on_progress or (lambda event, data: None)
+
+    # Evita reprocessar a mesma URL (cache no banco, pela chave canônica)
+    key = canonical_key(url)
+    # Cada passo de banco da sessão síncrona roda numa thread: o event loop
+    # segue atendendo as outras requisições enquanto a query espera o banco
+    existing = await asyncio.to_thread(find_analysis, db, url, key)
+    if existing and not refresh:
+        progress("cached", {"analysis_id": existing.id})
+        return existing
+    if existing is None:
+        # Nada carregado na sessão: encerra a transação de leitura para a
+        # conexão voltar ao pool durante o claim e o fetch
+        await asyncio.to_thread(db.commit)
+
+    flight_key = _flight_key(key, crawl, max_pages)
+
+    async def analyze_exclusive() -> int:
+        async with db_claim(f"analysis:{flight_key}") as waited:
+            if waited:
+                # Outro worker acabou de analisar a mesma URL: reaproveita
+                done_id = await asyncio.to_thread(_find_again, db, url, key)
+                if done_id:
+                    progress("deduplicated", {"analysis_id": done_id})
+                    return done_id
+            return await _analyze_uncached(
+                db, url, existing, owner_id, refresh, crawl, max_pages, progress, fetch_semaphore, llm_semaphore,
+            )
+
+    analysis_id, shared = await _flights.do(flight_key, analyze_exclusive)
+    # Relê do banco também quando o resultado foi gravado pela sessão de outro chamador
+    analysis = await asyncio.to_thread(_load_analysis, db, analysis_id)
+    if shared:
+        progress("deduplicated", {"analysis_id": analysis_id})
+    return analysis
+
+
+async def _analyze_uncached(
+    db: Session,
+    url: str,
+    existing: Optional[models.PageAnalysis],
+    owner_id: Optional[int],
+    refresh: bool,
+    crawl: bool,
+    max_pages: Optional[int],
+    progress: ProgressCallback,
+    fetch_semaphore: Optional[asyncio.Semaphore],
+    llm_semaphore: Optional[asyncio.Semaphore],
+) -> int:
+    """Fetch + pipeline de LLM + persistência (roda sob o single-flight).
+
+    Returns:
+        id da análise gravada (ou da existente, se nada mudou)
+    """
+    existing_id = existing.id if existing else None
+    try:
+        async with fetch_semaphore or nullcontext():
+            fetched = await _fetch(db, url, existing, crawl, max_pages)
+    except Exception as e:
+        raise FetchError(str(e)) from e
+    if fetched is None:
+        progress("cached", {"analysis_id": existing_id})
+        return existing_id
+    page, crawl_stats, extraction = fetched
+
+    # A URL pode redirecionar para um endereço já analisado (acme.io -> acme.com)
+    final_key = canonical_key(page.url)
+    if existing is None and final_key != canonical_key(url):
+        redirected = await asyncio.to_thread(find_analysis, db, page.url, final_key)
+        if redirected and not refresh:
+            progress("cached", {"analysis_id": redirected.id})
+            return redirected.id
+        existing_id = redirected.id if redirected else None
+    progress("fetched", {"chars": len(page.text)})
+    # Encerra a transação de leitura: a conexão volta ao pool enquanto o LLM
+    # responde (segundos) e a sessão pega outra só para gravar o resultado
+    await asyncio.to_thread(db.commit)
+
+    # Resumo, sentiment, mercado e estratégia como DAG (estágios independentes em paralelo)
+    async with llm_semaphore or nullcontext():
+        output = await run_analysis_pipeline(page.text, on_stage=_stage_tracker(progress))
+    entities = output.entities
+    entities["pipeline"] = output.timings
+    # Stack detectada por regras no HTML/headers vem antes da citada pelo LLM
+    if page.technologies:
+        entities["tech_stack"] = merge_tech_stack(page.technologies, entities.get("tech_stack"))
+        entities["technologies"] = page.technologies
+    # Quanto do texto da página sobrou após remover boilerplate
+    entities["extraction"] = extraction
+    if crawl_stats:
+        entities["crawl"] = crawl_stats
+
+    return await asyncio.to_thread(_persist, db, url, existing_id, owner_id, final_key, page, output, entities)
+
+
+def _persist(
+    db: Session,
+    url: str,
+    existing_id: Optional[int],
+    owner_id: Optional[int],
+    final_key: str,
+    page: FetchResult,
+    output: AnalysisOutput,
+    entities: Dict[str, Any],
+) -> int:
+    """Grava o resultado da análise e o snapshot da página (numa thread, fora do event loop)."""
+    if existing_id:
+        # Conteúdo mudou: reprocessa mantendo dados de enriquecimento já coletados
+        analysis = db.get(models.PageAnalysis, existing_id)
+        previous = analysis.entities or {}
+        if previous.get("enriched_data"):
+            entities["enriched_data"] = previous["enriched_data"]
+    else:
+        # Persiste resultado com deduplicação
+        analysis = models.PageAnalysis(url=url, owner_id=owner_id)
+        db.add(analysis)
+
+    analysis.canonical_key = final_key
+    analysis.title = page.title
+    analysis.raw_text = page.text
+    analysis.summary = output.summary
+    analysis.key_points = json.dumps(output.key_points)
+    analysis.entities = entities
+    try:
+        db.flush()
+    except IntegrityError:
+        # Último recurso (ex.: claim expirado no meio da análise): vale a linha já gravada
+        db.rollback()
+        print(f"⚠️ Análise concorrente de {url} já gravada; descartando duplicata")
+        return db.query(models.PageAnalysis.id).filter(models.PageAnalysis.url == url).scalar()
+    save_snapshot(db, analysis.url, page, analysis_id=analysis.id)
+    db.commit()
+    return analysis.id
@@ -0,0 +1,274 @@
+"""
+Extração do conteúdo principal (remoção de boilerplate)
+
+Menus, banners de cookies, rodapés e listas de links ocupavam boa parte dos
+caracteres enviados ao LLM. Este estágio segmenta o HTML em blocos (p, li,
+div, h1...) durante o mesmo parsing em streaming de `html_text`, pontua cada
+bloco por densidade de texto e densidade de links e descarta o que é
+boilerplate. No crawl multi-página, blocos repetidos entre páginas do mesmo
+site (menus e rodapés que escaparam das heurísticas) também são removidos.
+"""
+import hashlib
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Union
+
+from .html_text import _collect, _TextCollector
+
+
+# Tags que delimitam blocos de texto
+BLOCK_TAGS = frozenset({
+    "p", "div", "section", "article", "main", "li", "ul", "ol", "dl", "dt", "dd",
+    "td", "th", "tr", "table", "blockquote", "pre", "h1", "h2", "h3", "h4", "h5", "h6",
+    "header", "footer", "nav", "aside", "form", "figure", "figcaption", "br", "hr",
+})
+HEADING_TAGS = frozenset({"h1", "h2", "h3", "h4", "h5", "h6"})
+
+# Contêineres semânticos que são boilerplate por definição
+BOILERPLATE_TAGS = frozenset({"nav", "footer", "aside", "form", "header"})
+
+# Pistas de class/id de contêineres de boilerplate
+BOILERPLATE_HINT = re.compile(
+    r"cookie|consent|gdpr|lgpd|banner|navbar|\bnav\b|menu|breadcrumb|footer|sidebar"
+    r"|newsletter|subscribe|social|share|modal|popup|skip-link|\bads?\b|advert",
+    re.I,
+)
+
+# Contêineres de página/conteúdo: classes como "sidebar-visible" no <body> não contam
+HINT_EXEMPT_TAGS = frozenset({"html", "body", "main", "article"})
+
+# Elementos vazios nunca recebem tag de fechamento
+VOID_TAGS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link",
+    "meta", "param", "source", "track", "wbr",
+})
+
+# Limiares de classificação
+MIN_GOOD_WORDS = 10          # bloco "longo" o bastante para ser conteúdo
+MAX_LINK_DENSITY = 0.33      # acima disso, bloco curto é lista de links
+MAX_GOOD_LINK_DENSITY = 0.5  # acima disso, nem bloco longo é conteúdo
+MIN_TEXT_DENSITY = 4.0       # palavras por tag dentro do bloco
+
+# Abaixo destes limites a extração é considerada falha e o texto completo é usado
+MIN_MAIN_CHARS = 200
+MIN_MAIN_RATIO = 0.05
+
+
+@dataclass
+class Block:
+    """Trecho de texto contínuo entre duas fronteiras de bloco."""
+    text: str
+    link_chars: int
+    tags: int
+    heading: bool
+    boilerplate: bool
+
+    @property
+    def words(self) -> int:
+        return len(self.text.split())
+
+    @property
+    def link_density(self) -> float:
+        return self.link_chars / max(1, len(self.text))
+
+    @property
+    def text_density(self) -> float:
+        return self.words / (1 + self.tags)
+
+
+@dataclass
+class MainContent:
+    """Resultado da extração: conteúdo principal + métricas de encolhimento."""
+    title: str
+    text: str
+    full_chars: int
+    blocks: List[str] = field(default_factory=list)
+    links: List[str] = field(default_factory=list)
+
+    @property
+    def shrink_ratio(self) -> float:
+        """Fração do texto original que sobrou (1.0 = nada removido)."""
+        return round(len(self.text) / self.full_chars, 3) if self.full_chars else 1.0
+
+
+class _BlockCollector(_TextCollector):
+    """Coletor que, além do texto completo, segmenta o documento em blocos."""
+
+    def __init__(self):
+        super().__init__()
+        self.blocks: List[Block] = []
+        self._stack: List[tuple] = []        # (tag, é boilerplate)
+        self._boilerplate_depth = 0
+        self._link_depth = 0
+        self._block_parts: List[str] = []
+        self._block_link_chars = 0
+        self._block_tags = 0
+        self._block_heading = False
+
+    def start(self, tag: str, attrs: Dict[str, Optional[str]]) -> None:
+        super().start(tag, attrs)
+        tag = tag.lower()
+        if tag in BLOCK_TAGS:
+            self._end_block()
+            self._block_heading = tag in HEADING_TAGS
+        else:
+            self._block_tags += 1
+        if tag == "a":
+            self._link_depth += 1
+        if tag in VOID_TAGS:
+            return
+
+        hint = "" if tag in HINT_EXEMPT_TAGS else " ".join(
+            filter(None, (attrs.get("class"), attrs.get("id"), attrs.get("role")))
+        )
+        is_boilerplate = tag in BOILERPLATE_TAGS or bool(hint and BOILERPLATE_HINT.search(hint))
+        # <header> de <article> costuma trazer o título do conteúdo
+        if tag == "header" and not self._boilerplate_depth and any(t == "article" for t, _ in self._stack):
+            is_boilerplate = False
+        self._stack.append((tag, is_boilerplate))
+        if is_boilerplate:
+            self._boilerplate_depth += 1
+
+    def end(self, tag: str) -> None:
+        super().end(tag)
+        tag = tag.lower()
+        if tag in BLOCK_TAGS:
+            self._end_block()
+        if tag == "a" and self._link_depth:
+            self._link_depth -= 1
+        # HTML real tem tags sem fechamento: desempilha até a tag correspondente
+        if not any(t == tag for t, _ in self._stack):
+            return
+        while self._stack:
+            open_tag, is_boilerplate = self._stack.pop()
+            if is_boilerplate:
+                self._boilerplate_depth -= 1
+            if open_tag == tag:
+                break
+
+    def close(self) -> None:
+        super().close()
+        self._end_block()
+
+    def _flush(self) -> None:
+        if self._buffer and not self._in_title:
+            chunk = "".join(self._buffer)
+            self._block_parts.append(chunk)
+            if self._link_depth:
+                self._block_link_chars += len(chunk.strip())
+        super()._flush()
+
+    def _end_block(self) -> None:
+        self._flush()
+        text = " ".join(" ".join(self._block_parts).split())
+        if text:
+            self.blocks.append(Block(
+                text=text,
+                link_chars=min(self._block_link_chars, len(text)),
+                tags=self._block_tags,
+                heading=self._block_heading,
+                boilerplate=self._boilerplate_depth > 0,
+            ))
+        self._block_parts = []
+        self._block_link_chars = 0
+        self._block_tags = 0
+        self._block_heading = False
+
+
+def _classify(block: Block) -> str:
+    """Classifica um bloco como "good", "bad", "short" ou "heading"."""
+    if block.boilerplate:
+        return "bad"
+    # Títulos costumam ser âncoras para si mesmos; a densidade de links não se aplica
+    if block.heading:
+        return "heading"
+    if block.link_density > MAX_GOOD_LINK_DENSITY:
+        return "bad"
+    if block.link_density <= MAX_LINK_DENSITY and (
+        block.words >= MIN_GOOD_WORDS or (block.words >= 5 and block.text_density >= MIN_TEXT_DENSITY)
+    ):
+        return "good"
+    return "short"
+
+
+def select_blocks(blocks: List[Block]) -> List[str]:
+    """Mantém os blocos de conteúdo principal, na ordem do documento.
+
+    Blocos curtos e títulos só ficam quando estão cercados de conteúdo: um
+    título precisa de um bloco "good" logo adiante, e um bloco curto precisa
+    de vizinhos "good" dos dois lados (ignorando outros curtos no caminho).
+    """
+    classes = [_classify(block) for block in blocks]
+
+    def neighbor(index: int, step: int, limit: int) -> Optional[str]:
+        position = index + step
+        while 0 <= position < len(classes) and abs(position - index) <= limit:
+            if classes[position] not in ("short", "heading"):
+                return classes[position]
+            position += step
+        return None
+
+    kept = []
+    for index, (block, cls) in enumerate(zip(blocks, classes)):
+        if cls == "good":
+            kept.append(block.text)
+        elif cls == "heading" and neighbor(index, 1, 3) == "good":
+            kept.append(block.text)
+        elif cls == "short" and neighbor(index, -1, 2) == "good" and neighbor(index, 1, 2) == "good":
+            kept.append(block.text)
+    return kept
+
+
+def block_key(text: str) -> str:
+    """Chave de comparação de blocos entre páginas (case/espaços normalizados)."""
+    return hashlib.sha1(" ".join(text.lower().split()).encode("utf-8")).hexdigest()
+
+
+def extract_main_content(
+    html: Union[str, bytes],
+    encoding: Optional[str] = None,
+    engine: str = "auto",
+) -> MainContent:
+    """Extrai o conteúdo principal de um documento HTML.
+
+    Faz um único parsing: o texto completo sai junto com os blocos, para que
+    o encolhimento possa ser medido e para cair no texto completo quando a
+    heurística não encontrar conteúdo suficiente (páginas só com listas, SPAs).
+    """
+    collector = _collect(html, encoding, engine, _BlockCollector)
+    title = (collector.title or "").strip()
+    full_text = " ".join(" ".join(collector.parts).split())
+    blocks = select_blocks(collector.blocks)
+    text = "\n".join(blocks)
+
+    if len(text) < MIN_MAIN_CHARS or len(text) < len(full_text) * MIN_MAIN_RATIO:
+        blocks = [block.text for block in collector.blocks]
+        text = full_text
+    return MainContent(title=title, text=text, full_chars=len(full_text), blocks=blocks, links=collector.links)
+
+
+def drop_repeated_blocks(pages: List[List[str]], min_pages: int = 2) -> List[List[str]]:
+    """Remove blocos que aparecem em `min_pages` ou mais páginas do mesmo site.
+
+    Menus, rodapés e CTAs repetidos em todo o site não dizem nada sobre a
+    empresa que a página inicial já não diga; o bloco só fica na primeira
+    página em que aparece.
+    """
+    if len(pages) < min_pages:
+        return pages
+    counts = Counter(key for blocks in pages for key in {block_key(block) for block in blocks})
+    repeated = {key for key, count in counts.items() if count >= min_pages}
+    seen: set = set()
+    result = []
+    for blocks in pages:
+        kept = []
+        for block in blocks:
+            key = block_key(block)
+            if key in repeated:
+                if key in seen:
+                    continue
+                seen.add(key)
+            kept.append(block)
+        result.append(kept)
+    return result
@@ -0,0 +1,198 @@
+"""
+Análise em lote de URLs (listas de leads)
+
+Recebe centenas de URLs de uma vez, descarta duplicatas e as já analisadas
+(respondidas como "cached" sem custo) e processa o resto com concorrência
+limitada separadamente para fetch e para LLM. Os resultados são emitidos
+conforme cada URL termina, para o endpoint transmitir como NDJSON.
+"""
+import asyncio
+import csv
+import io
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from pydantic import AnyHttpUrl, ValidationError, parse_obj_as
+from sqlalchemy import or_
+
+from .. import models
+from ..config import settings
+from ..database import SessionLocal
+from .analysis_runner import FetchError, run_analysis
+from .llm_client import priority_lane
+from .url_canonical import canonical_key
+
+
+# Nomes de coluna reconhecidos no CSV (o primeiro encontrado vence)
+CSV_URL_COLUMNS = ("url", "website", "site", "domain", "dominio", "domínio", "homepage")
+
+
+def normalize_url(raw: str) -> str:
+    """Limpa a URL informada; sem esquema assume https."""
+    url = (raw or "").strip().strip('"').strip("'")
+    if url and "://" not in url:
+        url = f"https://{url}"
+    return url
+
+
+def parse_url_csv(content: bytes) -> List[str]:
+    """Extrai URLs de um CSV exportado de CRM/planilha.
+
+    Usa a coluna de URL pelo cabeçalho (url, website, site...); sem cabeçalho
+    reconhecido, pega a primeira célula de cada linha que pareça um domínio.
+    """
+    text = content.decode("utf-8-sig", errors="replace")
+    try:
+        dialect = csv.Sniffer().sniff(text[:4096], delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    rows = list(csv.reader(io.StringIO(text), dialect))
+    if not rows:
+        return []
+
+    header = [cell.strip().lower() for cell in rows[0]]
+    column = next((header.index(name) for name in CSV_URL_COLUMNS if name in header), None)
+    if column is not None:
+        return [row[column] for row in rows[1:] if len(row) > column and row[column].strip()]
+
+    urls = []
+    for row in rows:
+        cell = next((c for c in row if "." in c and " " not in c.strip()), None)
+        if cell:
+            urls.append(cell)
+    return urls
+
+
+def _dedupe(urls: List[str]) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """Normaliza e remove duplicatas (pela chave canônica); URLs inválidas
+    viram resultados de falha."""
+    seen = set()
+    valid: List[str] = []
+    invalid: List[Dict[str, Any]] = []
+    for raw in urls:
+        url = normalize_url(raw)
+        if not url:
+            continue
+        key = canonical_key(url)
+        if key in seen:
+            continue
+        seen.add(key)
+        try:
+            valid.append(str(parse_obj_as(AnyHttpUrl, url)))
+        except ValidationError:
+            invalid.append({"url": raw, "status": "failed", "error": "URL inválida"})
+    return valid, invalid
+
+
+async def _analyze_one(
+    url: str,
+    owner_id: Optional[int],
+    crawl: bool,
+    slots: asyncio.Semaphore,
+    fetch_semaphore: asyncio.Semaphore,
+    llm_semaphore: asyncio.Semaphore,
+) -> Dict[str, Any]:
+    # A sessão só é aberta com vaga no lote: cada análise em andamento pode
+    # segurar uma conexão do pool síncrono (sem vaga, o checkout esperaria)
+    async with slots:
+        return await _run_one(url, owner_id, crawl, fetch_semaphore, llm_semaphore)
+
+
+async def _run_one(
+    url: str,
+    owner_id: Optional[int],
+    crawl: bool,
+    fetch_semaphore: asyncio.Semaphore,
+    llm_semaphore: asyncio.Semaphore,
+) -> Dict[str, Any]:
+    # Cada tarefa usa a própria sessão: sessões SQLAlchemy não são concorrentes
+    db = SessionLocal()
+    started = time.perf_counter()
+    try:
+        with priority_lane("batch"):
+            analysis = await run_analysis(
+                db,
+                url,
+                owner_id=owner_id,
+                crawl=crawl,
+                fetch_semaphore=fetch_semaphore,
+                llm_semaphore=llm_semaphore,
+            )
+        return {
+            "url": url,
+            "status": "succeeded",
+            "analysis_id": analysis.id,
+            "title": analysis.title,
+            "elapsed_ms": int((time.perf_counter() - started) * 1000),
+        }
+    except FetchError as e:
+        return {"url": url, "status": "failed", "error": f"Failed to fetch URL: {e}"}
+    except Exception as e:
+        print(f"❌ Erro na análise em lote de {url}: {e}")
+        return {"url": url, "status": "failed", "error": str(e)[:500]}
+    finally:
+        db.close()
+
+
+async def analyze_bulk(
+    urls: List[str],
+    owner_id: Optional[int] = None,
+    crawl: bool = False,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Analisa um lote de URLs emitindo um resultado por URL e um resumo final.
+
+    Cada item traz `status` ("cached", "succeeded" ou "failed") e o
+    progresso acumulado; o último item é `{"summary": {...}}`.
+    """
+    started = time.perf_counter()
+    valid, invalid = _dedupe(urls)
+    counts = {"cached": 0, "succeeded": 0, "failed": 0}
+    total = len(valid) + len(invalid)
+
+    def emit(item: Dict[str, Any]) -> Dict[str, Any]:
+        counts[item["status"]] += 1
+        return {**item, "progress": {**counts, "done": sum(counts.values()), "total": total}}
+
+    for item in invalid:
+        yield emit(item)
+
+    # URLs já analisadas saem direto do banco, sem fetch nem LLM
+    keys = {url: canonical_key(url) for url in valid}
+    db = SessionLocal()
+    try:
+        rows = db.query(
+            models.PageAnalysis.url, models.PageAnalysis.canonical_key, models.PageAnalysis.id, models.PageAnalysis.title
+        ).filter(or_(
+            models.PageAnalysis.canonical_key.in_(list(keys.values())),
+            models.PageAnalysis.url.in_(valid),
+        )).order_by(models.PageAnalysis.id).all() if valid else []
+    finally:
+        db.close()
+    by_key: Dict[str, Tuple[int, Optional[str]]] = {}
+    for row_url, row_key, analysis_id, title in rows:
+        by_key.setdefault(row_key or canonical_key(row_url), (analysis_id, title))
+    existing = {url: by_key[key] for url, key in keys.items() if key in by_key}
+    for url, (analysis_id, title) in existing.items():
+        yield emit({"url": url, "status": "cached", "analysis_id": analysis_id, "title": title})
+
+    # Análises vivas (e sessões abertas) por lote; dentro delas, fetch e LLM
+    # têm limites próprios
+    slots = asyncio.Semaphore(settings.BULK_ACTIVE_ANALYSES)
+    fetch_semaphore = asyncio.Semaphore(settings.BULK_FETCH_CONCURRENCY)
+    llm_semaphore = asyncio.Semaphore(settings.BULK_LLM_CONCURRENCY)
+    tasks = [
+        asyncio.create_task(_analyze_one(url, owner_id, crawl, slots, fetch_semaphore, llm_semaphore))
+        for url in valid if url not in existing
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield emit(await next_done)
+    finally:
+        # Cliente desconectou no meio do stream: não deixa análises órfãs rodando
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    elapsed_ms = int((time.perf_counter() - started) * 1000)
+    print(f"📦 Lote de {total} URLs em {elapsed_ms} ms: {counts}")
+    yield {"summary": {**counts, "total": total, "elapsed_ms": elapsed_ms}}
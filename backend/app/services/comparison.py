@@ -8,6 +8,7 @@ e recomendações sobre qual empresa abordar primeiro.
 from typing import List, Dict, Any
 import json
 from ..config import settings
+from .llm_client import chat_completion
 
 
 async def compare_companies(analyses: List[Any]) -> Dict[str, Any]:
@@ -30,7 +31,7 @@ async def compare_companies(analyses: List[Any]) -> Dict[str, Any]:
         # Monta contexto de cada empresa
         companies_context = []
         for i, analysis in enumerate(analyses, 1):
-            entities = json.loads(analysis.entities) if analysis.entities else {}
+            entities = analysis.entities or {}
             key_points = json.loads(analysis.key_points) if analysis.key_points else []
             
             context = f"""
@@ -65,9 +66,6 @@ ENTIDADES:
 async def _generate_ai_comparison(companies_context: List[str], analyses: List[Any]) -> Dict[str, Any]:
     """Gera comparação detalhada usando IA."""
     try:
-        import openai
-        openai.api_key = settings.OPENAI_API_KEY
-        
         # Monta prompt
         context_text = "\n\n".join(companies_context)
         company_names = [f"Empresa {i+1}: {a.title or a.url}" for i, a in enumerate(analyses)]
@@ -128,7 +126,8 @@ REGRAS:
 - Seja consultivo e estratégico
 - Foque em diferenciais de cada empresa"""
 
-        response = await openai.ChatCompletion.acreate(
+        response = await chat_completion(
+            "comparison",
             model=settings.OPENAI_MODEL,
             messages=[
                 {"role": "system", "content": "Você é um especialista em análise comparativa para vendas B2B."},
@@ -271,7 +270,7 @@ def _generate_basic_comparison(analyses: List[Any]) -> Dict[str, Any]:
     pricing_comparison = []
     
     for i, analysis in enumerate(analyses, 1):
-        entities = json.loads(analysis.entities) if analysis.entities else {}
+        entities = analysis.entities or {}
         
         companies.append({
             "id": analysis.id,
@@ -0,0 +1,339 @@
+"""
+Crawl multi-página para análise de empresas
+
+Além da URL informada, descobre as páginas que importam para vendas
+(pricing, sobre, clientes, carreiras...) via sitemap.xml e links do mesmo
+domínio, ranqueia por heurísticas de URL e busca as melhores em paralelo,
+com limite de concorrência por domínio, orçamento total de bytes e deadline.
+"""
+import asyncio
+import html
+import re
+import time
+import weakref
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urldefrag, urljoin, urlparse
+
+import httpx
+
+from ..config import settings
+from .boilerplate import drop_repeated_blocks
+from .parse_pool import html_technologies, html_to_main_content, html_to_text_and_links
+from .scraper import FetchResult, text_hash
+from .tech_fingerprint import merge_technologies
+
+
+# Padrões de URL por relevância comercial (maior peso = mais prioritário)
+URL_PRIORITY_PATTERNS: List[Tuple[re.Pattern, int]] = [
+    (re.compile(r"pric|pre[cç]o|planos?\b|plans?\b|assinatura", re.I), 10),
+    (re.compile(r"about|sobre|quem-somos|empresa|company|nossa-historia", re.I), 8),
+    (re.compile(r"customer|clientes?|cases?\b|case-stud|success|depoimento", re.I), 7),
+    (re.compile(r"careers?|carreiras?|jobs|vagas|trabalhe", re.I), 6),
+    (re.compile(r"product|produto|solu[cç]|features|platform|plataforma|servi[cç]os?", re.I), 5),
+    (re.compile(r"team|equipe|leadership|lideran[cç]a", re.I), 4),
+    (re.compile(r"partners?|parceiros?|integra", re.I), 3),
+    (re.compile(r"contact|contato", re.I), 2),
+]
+
+# URLs que nunca valem o fetch
+URL_EXCLUDE_PATTERN = re.compile(
+    r"\.(pdf|jpe?g|png|gif|svg|webp|zip|mp4|mp3|css|js|xml|ico)$"
+    r"|/(login|signin|sign-in|signup|sign-up|cadastro|cart|carrinho|checkout|wp-admin|feed)\b"
+    r"|privacy|privacidade|terms|termos|cookie",
+    re.I,
+)
+
+_LOC_RE = re.compile(r"<loc>\s*([^<\s]+)\s*</loc>", re.I)
+
+# Semáforos por domínio compartilhados entre crawls simultâneos do mesmo site
+_domain_semaphores: "weakref.WeakValueDictionary[str, asyncio.Semaphore]" = weakref.WeakValueDictionary()
+
+
+@dataclass
+class _Budget:
+    """Orçamento de bytes compartilhado por todas as requisições de um crawl."""
+    limit: int
+    used: int = 0
+
+    @property
+    def exhausted(self) -> bool:
+        return self.used >= self.limit
+
+
+@dataclass
+class _Body:
+    """Resposta já lida (possivelmente truncada pelo orçamento)."""
+    url: str
+    status_code: int
+    headers: httpx.Headers
+    content: bytes
+    encoding: Optional[str]
+
+
+@dataclass
+class CrawlResult:
+    """Páginas obtidas no crawl e o texto consolidado para o LLM."""
+    page: FetchResult                      # página "virtual" com o texto mesclado
+    pages: List[FetchResult] = field(default_factory=list)
+    bytes_fetched: int = 0
+    elapsed_ms: int = 0
+    timed_out: bool = False
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "pages": [p.url for p in self.pages],
+            "bytes_fetched": self.bytes_fetched,
+            "elapsed_ms": self.elapsed_ms,
+            "timed_out": self.timed_out,
+        }
+
+    def extraction_stats(self) -> Dict[str, object]:
+        """Encolhimento somado das páginas (antes do corte de `merge_pages`)."""
+        full_chars = sum(p.full_chars for p in self.pages)
+        main_chars = sum(len(p.text) for p in self.pages)
+        return {
+            "full_chars": full_chars,
+            "main_chars": main_chars,
+            "shrink_ratio": round(main_chars / full_chars, 3) if full_chars else 1.0,
+        }
+
+
+def _site_key(url: str) -> str:
+    host = (urlparse(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def _domain_semaphore(url: str) -> asyncio.Semaphore:
+    key = _site_key(url)
+    semaphore = _domain_semaphores.get(key)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(settings.CRAWL_DOMAIN_CONCURRENCY)
+        _domain_semaphores[key] = semaphore
+    return semaphore
+
+
+def score_url(url: str) -> int:
+    """Pontua uma URL candidata; <= 0 significa descartar."""
+    path = urlparse(url).path.rstrip("/")
+    if not path or URL_EXCLUDE_PATTERN.search(url):
+        return 0
+    score = max((weight for pattern, weight in URL_PRIORITY_PATTERNS if pattern.search(path)), default=0)
+    if not score:
+        return 0
+    # Páginas rasas tendem a ser as institucionais; posts de blog ficam para trás
+    depth = path.count("/")
+    return score * 10 - depth * 3 - (15 if "/blog" in path or "/news" in path else 0)
+
+
+def rank_candidates(start_url: str, urls: List[str], limit: int) -> List[str]:
+    """Normaliza, filtra pelo mesmo site e ordena candidatas por relevância."""
+    site = _site_key(start_url)
+    start = urldefrag(start_url)[0].rstrip("/")
+    seen = {start}
+    ranked: List[Tuple[int, int, str]] = []
+    for position, raw in enumerate(urls):
+        url = urldefrag(urljoin(start_url, raw.strip()))[0].split("?")[0].rstrip("/")
+        if url in seen or urlparse(url).scheme not in ("http", "https") or _site_key(url) != site:
+            continue
+        seen.add(url)
+        score = score_url(url)
+        if score > 0:
+            ranked.append((-score, position, url))
+    ranked.sort()
+    return [url for _, _, url in ranked[:limit]]
+
+
+async def _get_limited(client: httpx.AsyncClient, url: str, budget: _Budget, max_bytes: Optional[int] = None) -> Optional[_Body]:
+    """GET em streaming que para de ler quando o orçamento de bytes acaba."""
+    if budget.exhausted:
+        return None
+    async with _domain_semaphore(url):
+        async with client.stream("GET", url) as resp:
+            if resp.status_code != 200:
+                return None
+            chunks: List[bytes] = []
+            size = 0
+            async for chunk in resp.aiter_bytes():
+                chunks.append(chunk)
+                size += len(chunk)
+                budget.used += len(chunk)
+                if budget.exhausted or (max_bytes and size >= max_bytes):
+                    break
+            return _Body(
+                url=str(resp.url),
+                status_code=resp.status_code,
+                headers=resp.headers,
+                content=b"".join(chunks),
+                encoding=resp.encoding,
+            )
+
+
+async def _fetch_html(client: httpx.AsyncClient, url: str, budget: _Budget) -> Optional[Tuple[FetchResult, List[str]]]:
+    resp = await _get_limited(client, url, budget)
+    if resp is None or "html" not in resp.headers.get("content-type", "text/html"):
+        return None
+    # Texto e stack em paralelo (em páginas grandes, os dois no pool de parsing)
+    extract = html_to_main_content if settings.BOILERPLATE_REMOVAL else html_to_text_and_links
+    parsed, technologies = await asyncio.gather(
+        extract(resp.content, resp.encoding),
+        html_technologies(resp.content, resp.headers),
+    )
+    if settings.BOILERPLATE_REMOVAL:
+        title, text, links, full_chars, blocks = parsed.title, parsed.text, parsed.links, parsed.full_chars, parsed.blocks
+    else:
+        title, text, links = parsed
+        full_chars, blocks = len(text), []
+    result = FetchResult(
+        url=resp.url,
+        status_code=resp.status_code,
+        title=title,
+        text=text[:200000],
+        etag=resp.headers.get("etag"),
+        last_modified=resp.headers.get("last-modified"),
+        content_hash=text_hash(text),
+        full_chars=full_chars,
+        blocks=blocks,
+        technologies=technologies,
+    )
+    return result, links
+
+
+async def _sitemap_urls(client: httpx.AsyncClient, start_url: str, budget: _Budget) -> List[str]:
+    """Lê /sitemap.xml (e até 3 sitemaps filhos se for um índice)."""
+    root = f"{urlparse(start_url).scheme}://{urlparse(start_url).netloc}/sitemap.xml"
+    try:
+        resp = await _get_limited(client, root, budget, max_bytes=settings.CRAWL_SITEMAP_MAX_BYTES)
+        if resp is None:
+            return []
+        body = resp.content.decode(resp.encoding or "utf-8", errors="replace")
+        locs = [html.unescape(loc) for loc in _LOC_RE.findall(body)]
+        if "<sitemapindex" not in body:
+            return locs
+        urls: List[str] = []
+        for child in locs[:3]:
+            child_resp = await _get_limited(client, child, budget, max_bytes=settings.CRAWL_SITEMAP_MAX_BYTES)
+            if child_resp is not None:
+                child_body = child_resp.content.decode(child_resp.encoding or "utf-8", errors="replace")
+                urls.extend(html.unescape(loc) for loc in _LOC_RE.findall(child_body))
+        return urls
+    except Exception as e:
+        print(f"    ⚠️ Sitemap indisponível para {start_url}: {str(e)[:100]}")
+        return []
+
+
+def strip_repeated_boilerplate(pages: List[FetchResult]) -> None:
+    """Remove das páginas os blocos repetidos pelo site (menus/rodapés residuais)."""
+    if not all(page.blocks for page in pages):
+        return
+    for page, blocks in zip(pages, drop_repeated_blocks([page.blocks for page in pages])):
+        page.blocks = blocks
+        page.text = "\n".join(blocks)
+
+
+def merge_pages(pages: List[FetchResult], char_budget: int) -> str:
+    """Concatena o texto das páginas repartindo `char_budget` de forma justa.
+
+    Páginas curtas cedem a sobra para as seguintes, assim todas as páginas
+    relevantes aparecem na janela de texto enviada ao LLM.
+    """
+    remaining_budget = char_budget
+    parts = []
+    for index, page in enumerate(pages):
+        share = remaining_budget // (len(pages) - index)
+        text = page.text[:share]
+        remaining_budget -= len(text)
+        parts.append(f"=== PÁGINA: {page.url} ===\n{text}")
+    return "\n\n".join(parts)
+
+
+def page_limit(max_pages: Optional[int] = None) -> int:
+    """Páginas que o crawl de fato visita para o `max_pages` pedido."""
+    return max(1, min(max_pages or settings.CRAWL_MAX_PAGES, settings.CRAWL_MAX_PAGES_LIMIT))
+
+
+async def crawl_site(url: str, max_pages: Optional[int] = None) -> CrawlResult:
+    """Faz o crawl da URL inicial e das páginas mais relevantes do mesmo site.
+
+    Args:
+        url: URL informada pelo usuário (sempre é a primeira página)
+        max_pages: Total de páginas incluindo a inicial (padrão: CRAWL_MAX_PAGES)
+
+    Returns:
+        CrawlResult com a página mesclada pronta para `summarize_text`
+    """
+    max_pages = page_limit(max_pages)
+    budget = _Budget(limit=settings.CRAWL_BYTE_BUDGET)
+    started = time.perf_counter()
+    deadline = started + settings.CRAWL_DEADLINE_S
+    timed_out = False
+
+    async with httpx.AsyncClient(
+        timeout=settings.CRAWL_PAGE_TIMEOUT_S,
+        headers={"User-Agent": "Mozilla/5.0"},
+        follow_redirects=True,
+    ) as client:
+        # Página inicial e sitemap em paralelo; a inicial é obrigatória
+        home_task = asyncio.create_task(_fetch_html(client, url, budget))
+        sitemap_task = asyncio.create_task(_sitemap_urls(client, url, budget))
+        home = None
+        try:
+            home = await asyncio.wait_for(home_task, timeout=settings.CRAWL_DEADLINE_S)
+        finally:
+            if home is None:
+                # Sem página inicial (None, erro, timeout ou cancelamento) o sitemap
+                # não serve: encerra a tarefa antes de o cliente ser fechado
+                sitemap_task.cancel()
+                await asyncio.gather(sitemap_task, return_exceptions=True)
+        if home is None:
+            raise RuntimeError(f"Não foi possível obter {url}")
+        home_page, home_links = home
+
+        try:
+            sitemap = await asyncio.wait_for(sitemap_task, timeout=max(0.1, deadline - time.perf_counter()))
+        except asyncio.TimeoutError:
+            sitemap, timed_out = [], True
+
+        candidates = rank_candidates(home_page.url, home_links + sitemap, max_pages - 1)
+        tasks = [asyncio.create_task(_fetch_html(client, candidate, budget)) for candidate in candidates]
+        done: set = set()
+        if tasks:
+            try:
+                done, _ = await asyncio.wait(tasks, timeout=max(0.1, deadline - time.perf_counter()))
+            finally:
+                # Prazo estourado (ou crawl cancelado): cancela os fetches restantes
+                # e espera terminarem, antes de o cliente ser fechado
+                pending = [task for task in tasks if not task.done()]
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+            timed_out = timed_out or bool(pending)
+
+    # Mantém a ordem do ranking (e a página inicial em primeiro lugar)
+    pages = [home_page]
+    for task in tasks:
+        if task in done and not task.cancelled() and task.exception() is None and task.result() is not None:
+            pages.append(task.result()[0])
+
+    strip_repeated_boilerplate(pages)
+    merged_text = merge_pages(pages, settings.CRAWL_MERGED_TEXT_CHARS)
+    merged = FetchResult(
+        url=home_page.url,
+        status_code=home_page.status_code,
+        title=home_page.title,
+        text=merged_text,
+        etag=home_page.etag,
+        last_modified=home_page.last_modified,
+        content_hash=text_hash(merged_text),
+        full_chars=sum(page.full_chars for page in pages),
+        technologies=merge_technologies(page.technologies for page in pages),
+    )
+    elapsed_ms = int((time.perf_counter() - started) * 1000)
+    print(f"🕸️ Crawl de {url}: {len(pages)} páginas em {elapsed_ms} ms")
+    return CrawlResult(
+        page=merged,
+        pages=pages,
+        bytes_fetched=budget.used,
+        elapsed_ms=elapsed_ms,
+        timed_out=timed_out,
+    )
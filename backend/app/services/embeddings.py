@@ -5,6 +5,7 @@ Usa OpenAI Embeddings API para criar vetores semânticos
 from typing import List, Dict, Any
 import numpy as np
 from ..config import settings
+from .llm_client import create_embedding
 
 
 async def generate_embedding(text: str) -> List[float]:
@@ -18,19 +19,11 @@ async def generate_embedding(text: str) -> List[float]:
         Lista de floats representando o vetor de embedding
     """
     try:
-        import openai
-        openai.api_key = settings.OPENAI_API_KEY
-        
         # Trunca texto para evitar erro de limite
         text = text[:8000]
         
-        # Usa modelo de embeddings da OpenAI (ada-002 é o melhor custo-benefício)
-        response = await openai.Embedding.acreate(
-            model="text-embedding-ada-002",
-            input=text
-        )
-        
-        return response['data'][0]['embedding']
+        # Modelo de embeddings da OpenAI (padrão ada-002, melhor custo-benefício)
+        return await create_embedding("embeddings", text)
     except Exception as e:
         print(f"Erro ao gerar embedding: {e}")
         # Fallback: retorna vetor zero
@@ -91,7 +84,7 @@ async def find_similar_analyses(query: str, analyses: List[Dict[str, Any]], top_
         Título: {analysis.get('title', '')}
         URL: {analysis.get('url', '')}
         Resumo: {analysis.get('summary', '')}
-        Texto: {analysis.get('raw_text', '')[:3000]}
+        Texto: {(analysis.get('raw_text') or '')[:3000]}
         """
         
         # Gera embedding do documento
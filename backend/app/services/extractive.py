@@ -0,0 +1,101 @@
+"""
+Pré-sumarização extrativa (TextRank) antes dos prompts de LLM
+
+Em vez de cortar o texto às cegas em N caracteres, divide em frases, monta a
+matriz de similaridade TF-IDF entre frases (NumPy), ranqueia com TextRank
+por iteração de potência e mantém as frases mais centrais, na ordem
+original, até caber no orçamento. Roda em milissegundos na CPU.
+"""
+import math
+import re
+from collections import Counter
+from typing import List
+
+import numpy as np
+
+
+# Fim de frase seguido de espaço, ou quebra de linha (blocos do extrator de HTML)
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?…])\s+|\n+")
+_WORD = re.compile(r"\w{2,}", re.UNICODE)
+
+STOPWORDS = frozenset("""
+a ao aos as com como da das de do dos e em entre é na nas no nos o os ou para pela pelo por que se sem seu sua
+são um uma the and or of to in for on with by is are be as at an this that from it its we our you your
+""".split())
+
+DAMPING = 0.85
+MAX_SENTENCES = 2000       # acima disso, só as primeiras entram no ranking
+MAX_SENTENCE_CHARS = 600   # frases enormes (tabelas, listas sem pontuação) são cortadas
+
+
+def split_sentences(text: str) -> List[str]:
+    sentences = []
+    for raw in _SENTENCE_SPLIT.split(text or ""):
+        sentence = " ".join(raw.split())
+        if len(sentence) > MAX_SENTENCE_CHARS:
+            sentence = sentence[:MAX_SENTENCE_CHARS].rsplit(" ", 1)[0] + "…"
+        if sentence:
+            sentences.append(sentence)
+    return sentences
+
+
+def _tfidf(sentences: List[str]) -> np.ndarray:
+    """Matriz frases x termos TF-IDF com linhas normalizadas (L2)."""
+    docs = [[w for w in _WORD.findall(s.lower()) if w not in STOPWORDS] for s in sentences]
+    vocab = {term: i for i, term in enumerate(sorted({w for doc in docs for w in doc}))}
+    matrix = np.zeros((len(docs), len(vocab)), dtype=np.float32)
+    for row, doc in enumerate(docs):
+        for term, count in Counter(doc).items():
+            matrix[row, vocab[term]] = 1.0 + math.log(count)
+    df = np.count_nonzero(matrix, axis=0)
+    matrix *= np.log((1.0 + len(docs)) / (1.0 + df)) + 1.0
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def textrank(sentences: List[str], tol: float = 1e-6, max_iter: int = 100) -> np.ndarray:
+    """Score de centralidade de cada frase (PageRank no grafo de similaridade)."""
+    n = len(sentences)
+    if n == 0:
+        return np.zeros(0, dtype=np.float32)
+    vectors = _tfidf(sentences)
+    similarity = vectors @ vectors.T
+    np.fill_diagonal(similarity, 0.0)
+
+    # Matriz de transição; frases sem vizinhos distribuem o peso igualmente
+    out_weight = similarity.sum(axis=1, keepdims=True)
+    transition = np.where(out_weight > 0, similarity / np.where(out_weight > 0, out_weight, 1.0), 1.0 / n)
+
+    scores = np.full(n, 1.0 / n, dtype=np.float32)
+    for _ in range(max_iter):
+        updated = (1 - DAMPING) / n + DAMPING * (transition.T @ scores)
+        if np.abs(updated - scores).sum() < tol:
+            return updated
+        scores = updated
+    return scores
+
+
+def extractive_summary(text: str, max_chars: int) -> str:
+    """Frases mais centrais do texto, na ordem original, em até `max_chars`
+    caracteres (~4 caracteres por token). Textos que já cabem voltam intactos."""
+    if len(text) <= max_chars:
+        return text
+    sentences = split_sentences(text)[:MAX_SENTENCES]
+    if len(sentences) < 2:
+        return text[:max_chars]
+
+    scores = textrank(sentences)
+    chosen = []
+    seen = set()
+    used = 0
+    for index in np.argsort(-scores, kind="stable"):
+        size = len(sentences[index]) + 1
+        if used + size > max_chars or sentences[index] in seen:
+            continue
+        chosen.append(index)
+        seen.add(sentences[index])
+        used += size
+    if not chosen:
+        return text[:max_chars]
+    return "\n".join(sentences[i] for i in sorted(chosen))
@@ -0,0 +1,176 @@
+"""
+Modo de análise "fused": uma única chamada ao LLM com saída JSON estruturada
+
+O modo padrão ("multi") manda o texto da página para quatro prompts (resumo,
+sentiment, mercado e estratégia). No modo fused, um só prompt pede tudo de
+uma vez em JSON, validado contra `FusedAnalysis`: o texto é enviado uma vez
+só e três idas e voltas à API desaparecem. Se a resposta não validar, o
+pipeline volta para o modo multi.
+"""
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field, ValidationError
+
+from ..config import settings
+from .extractive import extractive_summary
+from .llm_client import chat_completion
+
+
+class _Section(BaseModel):
+    """Seção livre: os campos listados são os esperados, extras são mantidos."""
+
+    class Config:
+        extra = "allow"
+
+
+class Entities(_Section):
+    company_name: Optional[str] = None
+    industry: Optional[str] = None
+    company_size: Optional[str] = None
+    products: List[str] = []
+    pricing_model: Optional[str] = None
+    tech_stack: List[str] = []
+    contacts: List[str] = []
+    market_position: Optional[str] = None
+    growth_stage: Optional[str] = None
+    sales_potential: Optional[str] = None
+    decision_makers: List[str] = []
+    pain_points: List[str] = []
+    competitors: List[str] = []
+    partnership_potential: Optional[str] = None
+
+
+class SentimentAnalysis(_Section):
+    overall_tone: str = "Neutro"
+    confidence_level: str = "Médio"
+    key_emotions: List[str] = []
+    brand_perception: Optional[str] = None
+
+
+class MarketContext(_Section):
+    industry_trends: Optional[str] = None
+    competitive_landscape: Optional[str] = None
+    market_maturity: Optional[str] = None
+    innovation_level: Optional[str] = None
+
+
+class SalesInsights(_Section):
+    urgency_indicators: List[str] = []
+    budget_signals: Optional[str] = None
+    decision_timeline: Optional[str] = None
+    stakeholder_complexity: Optional[str] = None
+
+
+class RiskAssessment(_Section):
+    business_risks: List[str] = []
+    market_risks: List[str] = []
+    technology_risks: List[str] = []
+    overall_risk_level: str = "Médio"
+
+
+class MarketAnalysis(_Section):
+    market_trends: Dict[str, Any] = {}
+    competitive_analysis: Dict[str, Any] = {}
+    sales_opportunities: Dict[str, Any] = {}
+    risk_factors: Dict[str, Any] = {}
+
+
+class SalesStrategy(_Section):
+    approach_strategy: Dict[str, Any] = {}
+    stakeholder_mapping: Dict[str, Any] = {}
+    sales_process: Dict[str, Any] = {}
+    success_metrics: Dict[str, Any] = {}
+
+
+class FusedAnalysis(BaseModel):
+    """Tudo o que os quatro prompts do modo multi produzem, em um só objeto."""
+    summary: str = Field(..., min_length=20)
+    key_points: List[str] = Field(..., min_items=1)
+    entities: Entities
+    sentiment_analysis: SentimentAnalysis = SentimentAnalysis()
+    market_context: MarketContext = MarketContext()
+    sales_insights: SalesInsights = SalesInsights()
+    risk_assessment: RiskAssessment = RiskAssessment()
+    market_analysis: MarketAnalysis = MarketAnalysis()
+    sales_strategy: SalesStrategy = SalesStrategy()
+
+
+FUSED_PROMPT = """Você é um especialista em análise de empresas para vendas B2B com 15+ anos de experiência.
+
+Analise o texto do site da empresa e responda APENAS com um objeto JSON válido, sem texto fora dele, exatamente com estas chaves:
+
+{
+  "summary": "Resumo executivo de 150-250 palavras: proposta de valor, mercado de atuação, diferenciação competitiva e potencial de vendas",
+  "key_points": [
+    "🎯 ICP (Ideal Customer Profile): tamanho da empresa, setor, perfil técnico, pain points, budget",
+    "🛍️ PRODUTOS/SERVIÇOS: produtos principais, proposta de valor, vantagens competitivas",
+    "💰 PRICING & BUSINESS MODEL: estratégia de preços, modelo de negócio, fontes de receita",
+    "🔧 STACK TECNOLÓGICO: tecnologias, infraestrutura, integrações, segurança",
+    "📊 ANÁLISE DE MERCADO: tamanho, estágio de crescimento, competição, tendências",
+    "🎯 OPORTUNIDADES DE VENDAS: abordagem, decisores, ciclo de vendas, riscos",
+    "💡 INSIGHTS ESTRATÉGICOS: pontos únicos de venda, ameaças, parcerias, expansão",
+    "SCORE DE PRIORIDADE: Sales Priority, Budget Potential, Timing e Fit Score de 1-10 com justificativa"
+  ],
+  "entities": {
+    "company_name": "", "industry": "", "company_size": "", "products": [], "pricing_model": "",
+    "tech_stack": [], "contacts": [], "market_position": "", "growth_stage": "",
+    "sales_potential": "Alto/Médio/Baixo", "decision_makers": [], "pain_points": [], "competitors": [],
+    "partnership_potential": "Alto/Médio/Baixo"
+  },
+  "sentiment_analysis": {"overall_tone": "Positivo/Neutro/Negativo", "confidence_level": "Alto/Médio/Baixo", "key_emotions": [], "brand_perception": ""},
+  "market_context": {"industry_trends": "", "competitive_landscape": "", "market_maturity": "Emergente/Estabelecido/Declínio", "innovation_level": "Alto/Médio/Baixo"},
+  "sales_insights": {"urgency_indicators": [], "budget_signals": "", "decision_timeline": "", "stakeholder_complexity": ""},
+  "risk_assessment": {"business_risks": [], "market_risks": [], "technology_risks": [], "overall_risk_level": "Alto/Médio/Baixo"},
+  "market_analysis": {
+    "market_trends": {"industry_growth": "", "key_trends": [], "market_drivers": [], "regulatory_impact": ""},
+    "competitive_analysis": {"market_position": "", "competitive_advantages": [], "threats": [], "opportunities": []},
+    "sales_opportunities": {"high_value_prospects": [], "upsell_potential": "", "cross_sell_opportunities": [], "partnership_potential": ""},
+    "risk_factors": {"market_risks": [], "technology_risks": [], "business_risks": [], "mitigation_strategies": []}
+  },
+  "sales_strategy": {
+    "approach_strategy": {"primary_approach": "", "messaging_framework": "", "value_proposition": "", "objection_handling": []},
+    "stakeholder_mapping": {"decision_makers": [], "influencers": [], "champions": [], "gatekeepers": []},
+    "sales_process": {"discovery_questions": [], "demo_focus": "", "proof_points": [], "next_steps": []},
+    "success_metrics": {"kpis": [], "success_indicators": [], "timeline": "", "budget_indicators": []}
+  }
+}
+
+IMPORTANTE:
+- Cada item de key_points começa com o nome da seção seguido de ":" e traz o conteúdo real da empresa
+- Seja específico e factual; use dados concretos do texto
+- Se alguma informação não estiver disponível, escreva "Não identificado"
+- Foque em insights acionáveis para vendas"""
+
+
+def parse_fused(text: str) -> Optional[FusedAnalysis]:
+    """Valida a resposta do LLM contra o schema; None se não for um JSON válido."""
+    match = re.search(r"\{.*\}", text or "", re.DOTALL)
+    if not match:
+        return None
+    try:
+        return FusedAnalysis.parse_obj(json.loads(match.group()))
+    except (ValueError, ValidationError) as e:
+        print(f"⚠️ Resposta do modo fused fora do schema: {str(e)[:300]}")
+        return None
+
+
+async def analyze_fused(raw_text: str) -> Optional[Dict[str, Any]]:
+    """Análise completa em uma chamada.
+
+    Returns:
+        Dict com as mesmas chaves do modo multi (summary, key_points,
+        entities, sentiment_analysis, market_context, sales_insights,
+        risk_assessment, market_analysis, sales_strategy), ou None se a
+        resposta não validou.
+    """
+    resp = await chat_completion(
+        "analysis.fused",
+        model=settings.OPENAI_MODEL,
+        messages=[{"role": "user", "content": f"{FUSED_PROMPT}\n\nTEXTO:\n{extractive_summary(raw_text, 8000)}"}],
+        temperature=0.1,
+        response_format={"type": "json_object"},
+    )
+    parsed = parse_fused(resp["choices"][0]["message"]["content"])
+    return parsed.dict() if parsed else None
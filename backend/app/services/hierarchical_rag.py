@@ -5,7 +5,7 @@ Implementa a abordagem de resumos automáticos sem dependência de índices veto
 import json
 from typing import List, Dict, Any, Tuple
 from ..config import settings
-import openai
+from .llm_client import chat_completion
 
 
 class HierarchicalRAG:
@@ -70,7 +70,8 @@ class HierarchicalRAG:
         """
         
         try:
-            response = await openai.ChatCompletion.acreate(
+            response = await chat_completion(
+                "rag.split_sections",
                 model=self.section_selector_model,
                 messages=[{"role": "user", "content": split_prompt}],
                 temperature=0.3
@@ -98,7 +99,8 @@ class HierarchicalRAG:
         """
         
         try:
-            response = await openai.ChatCompletion.acreate(
+            response = await chat_completion(
+                "rag.section_summary",
                 model=self.section_selector_model,
                 messages=[{"role": "user", "content": summary_prompt}],
                 temperature=0.3,
@@ -162,7 +164,8 @@ class HierarchicalRAG:
         """
         
         try:
-            response = await openai.ChatCompletion.acreate(
+            response = await chat_completion(
+                "rag.select_sections",
                 model=self.section_selector_model,
                 messages=[{"role": "user", "content": selection_prompt}],
                 temperature=0.2
@@ -213,7 +216,8 @@ class HierarchicalRAG:
         """
         
         try:
-            response = await openai.ChatCompletion.acreate(
+            response = await chat_completion(
+                "rag.answer",
                 model=self.response_generator_model,
                 messages=[{"role": "user", "content": response_prompt}],
                 temperature=0.7,
@@ -247,7 +251,8 @@ class HierarchicalRAG:
         """
         
         try:
-            response = await openai.ChatCompletion.acreate(
+            response = await chat_completion(
+                "rag.test_questions",
                 model=self.evaluator_model,
                 messages=[{"role": "user", "content": test_prompt}],
                 temperature=0.5
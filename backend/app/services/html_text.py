@@ -0,0 +1,189 @@
+"""
+Motor de extração de texto de HTML
+
+Substitui o caminho BeautifulSoup (árvore completa + decompose) por um parser
+em streaming que descarta script/style/noscript enquanto lê o documento, sem
+nunca construir a árvore. Usa lxml (interface "target") quando disponível e
+cai para o html.parser da biblioteca padrão caso contrário.
+"""
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple, Type, Union
+
+try:  # lxml é opcional: acelera o parsing mas não é obrigatório
+    from lxml import etree as _lxml_etree  # type: ignore
+except Exception:  # pragma: no cover
+    _lxml_etree = None
+
+
+# Tags cujo conteúdo nunca entra no texto final
+SKIP_TAGS = frozenset({"script", "style", "noscript"})
+
+
+class _TextCollector:
+    """Acumula texto visível e título; compartilhado pelos dois engines."""
+
+    def __init__(self):
+        self.parts: List[str] = []
+        self.links: List[str] = []
+        self.title: Optional[str] = None
+        self._buffer: List[str] = []
+        self._skip_depth = 0
+        self._in_title = False
+        self._title_parts: List[str] = []
+
+    def start(self, tag: str, attrs: Dict[str, Optional[str]]) -> None:
+        self._flush()
+        tag = tag.lower()
+        if tag == "a" and attrs.get("href"):
+            self.links.append(attrs["href"])
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag == "title" and self.title is None and not self._skip_depth:
+            self._in_title = True
+
+    def end(self, tag: str) -> None:
+        self._flush()
+        tag = tag.lower()
+        if tag in SKIP_TAGS:
+            if self._skip_depth:
+                self._skip_depth -= 1
+        elif tag == "title" and self._in_title:
+            self._in_title = False
+            self.title = "".join(self._title_parts)
+
+    def data(self, data: str) -> None:
+        if not self._skip_depth:
+            self._buffer.append(data)
+
+    def close(self) -> None:
+        self._flush()
+        if self._in_title:
+            self.title = "".join(self._title_parts)
+            self._in_title = False
+
+    def _flush(self) -> None:
+        # Cada nó de texto vira uma "parte" separada por espaço, igual ao
+        # get_text(separator=" ") do BeautifulSoup
+        if not self._buffer:
+            return
+        chunk = "".join(self._buffer)
+        self._buffer = []
+        self.parts.append(chunk)
+        if self._in_title:
+            self._title_parts.append(chunk)
+
+
+class StreamingTextParser(HTMLParser):
+    """HTMLParser que extrai texto visível sem montar árvore DOM."""
+
+    def __init__(self, collector: Optional[_TextCollector] = None):
+        super().__init__(convert_charrefs=True)
+        self.collector = collector or _TextCollector()
+
+    def handle_starttag(self, tag, attrs):
+        self.collector.start(tag, dict(attrs))
+
+    def handle_startendtag(self, tag, attrs):
+        # Tags auto-fechadas (<br/>, <img/>) não abrem subárvore
+        self.collector.start(tag, dict(attrs))
+        self.collector.end(tag)
+
+    def handle_endtag(self, tag):
+        self.collector.end(tag)
+
+    def handle_data(self, data):
+        self.collector.data(data)
+
+    def close(self):
+        super().close()
+        self.collector.close()
+
+
+class _LxmlTarget:
+    """Alvo de eventos para o parser HTML do lxml (também sem árvore)."""
+
+    def __init__(self, collector: _TextCollector):
+        self.collector = collector
+
+    def start(self, tag, attrib):
+        self.collector.start(tag, attrib)
+
+    def end(self, tag):
+        self.collector.end(tag)
+
+    def data(self, data):
+        self.collector.data(data)
+
+    def comment(self, text):
+        pass
+
+    def close(self):
+        self.collector.close()
+        return self.collector
+
+
+def lxml_available() -> bool:
+    """Indica se o engine lxml pode ser usado neste ambiente."""
+    return _lxml_etree is not None
+
+
+def _collect_stdlib(html: str, collector: _TextCollector) -> _TextCollector:
+    parser = StreamingTextParser(collector)
+    parser.feed(html)
+    parser.close()
+    return parser.collector
+
+
+def _collect_lxml(html: Union[str, bytes], encoding: Optional[str], collector: _TextCollector) -> _TextCollector:
+    parser = _lxml_etree.HTMLParser(target=_LxmlTarget(collector), encoding=encoding if isinstance(html, bytes) else None)
+    parser.feed(html)
+    return parser.close()
+
+
+def _collect(
+    html: Union[str, bytes],
+    encoding: Optional[str],
+    engine: str,
+    collector_cls: Type[_TextCollector] = _TextCollector,
+) -> _TextCollector:
+    """Roda o engine escolhido alimentando uma instância de `collector_cls`."""
+    use_lxml = engine == "lxml" or (engine == "auto" and lxml_available())
+    if use_lxml and not lxml_available():
+        raise RuntimeError("lxml package not installed")
+
+    if use_lxml:
+        return _collect_lxml(html, encoding, collector_cls())
+    if isinstance(html, bytes):
+        html = html.decode(encoding or "utf-8", errors="replace")
+    return _collect_stdlib(html, collector_cls())
+
+
+def extract_text(
+    html: Union[str, bytes],
+    encoding: Optional[str] = None,
+    engine: str = "auto",
+) -> Tuple[str, str]:
+    """Extrai (título, texto limpo) de um documento HTML.
+
+    Args:
+        html: Documento como str ou bytes
+        encoding: Encoding dos bytes (padrão: utf-8 com substituição)
+        engine: "auto" (lxml se disponível), "lxml" ou "stdlib"
+
+    Returns:
+        Tupla (título ou "", texto com espaços normalizados)
+    """
+    title, text, _ = extract_text_and_links(html, encoding, engine)
+    return title, text
+
+
+def extract_text_and_links(
+    html: Union[str, bytes],
+    encoding: Optional[str] = None,
+    engine: str = "auto",
+) -> Tuple[str, str, List[str]]:
+    """Como `extract_text`, mas também devolve os hrefs dos <a> na ordem do documento."""
+    collector = _collect(html, encoding, engine)
+    title = (collector.title or "").strip()
+    text = " ".join(" ".join(collector.parts).split())
+    return title, text, collector.links
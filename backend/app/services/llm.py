@@ -1,6 +1,13 @@
 from typing import List, Dict, Any
+import asyncio
 import json
+import re
 from ..config import settings
+from .extractive import extractive_summary
+from .llm_client import chat_completion
+from .llm_providers import llm_enabled
+from .offline_analyzer import analyze_offline
+from .section_parser import SectionIndex
 
 SUMMARY_PROMPT = """Você é um especialista em análise de empresas para vendas B2B com 15+ anos de experiência. 
 
@@ -89,42 +96,45 @@ IMPORTANTE:
 
 
 async def summarize_text(raw_text: str) -> Dict[str, Any]:
-    provider = settings.LLM_PROVIDER.lower()
-    if provider == "openai":
-        try:
-            import openai  # type: ignore
-        except Exception:  # pragma: no cover
-            raise RuntimeError("openai package not installed")
-
-        openai.api_key = settings.OPENAI_API_KEY
-        
+    """Resumo principal + análise de sentiment/contexto, em paralelo."""
+    result, sentiment_analysis = await asyncio.gather(
+        summarize_main(raw_text),
+        analyze_sentiment(raw_text),
+    )
+    result.update(sentiment_analysis)
+    return result
+
+
+async def summarize_main(raw_text: str) -> Dict[str, Any]:
+    """Análise principal (resumo + entidades estruturadas) de uma página."""
+    if llm_enabled():
         # Análise principal
         content = (
-            f"{SUMMARY_PROMPT}\n\nTEXTO:\n" + raw_text[:8000]  # Aumentado limite
+            f"{SUMMARY_PROMPT}\n\nTEXTO:\n" + extractive_summary(raw_text, 8000)  # frases mais centrais
         )
-        resp = await openai.ChatCompletion.acreate(
+        resp = await chat_completion(
+            "analysis.summary",
             model=settings.OPENAI_MODEL,
             messages=[{"role": "user", "content": content}],
             temperature=0.1,  # Mais determinístico
         )
         text = resp["choices"][0]["message"]["content"]
-        
-        # Análise adicional de sentiment e contexto
-        sentiment_analysis = await _analyze_sentiment_and_context(raw_text)
-        
-        result = _parse_output(text)
-        result.update(sentiment_analysis)
-        return result
+        return _parse_output(text)
 
     # Fallback de resumo inteligente se não houver provider/chave
-    return _extract_mock_analysis(raw_text)
+    return analyze_offline(raw_text)
+
+
+async def analyze_sentiment(raw_text: str) -> Dict[str, Any]:
+    """Sentiment e contexto de mercado; só depende do texto bruto."""
+    if not llm_enabled():
+        return {}
+    return await _analyze_sentiment_and_context(raw_text)
 
 
 async def _analyze_sentiment_and_context(raw_text: str) -> Dict[str, Any]:
     """Análise adicional de sentiment e contexto para insights mais profundos."""
     try:
-        import openai  # type: ignore
-        
         sentiment_prompt = f"""
         Analise o texto da empresa e forneça insights adicionais em formato JSON:
         
@@ -155,10 +165,11 @@ async def _analyze_sentiment_and_context(raw_text: str) -> Dict[str, Any]:
             }}
         }}
         
-        TEXTO: {raw_text[:4000]}
+        TEXTO: {extractive_summary(raw_text, 4000)}
         """
         
-        resp = await openai.ChatCompletion.acreate(
+        resp = await chat_completion(
+            "analysis.sentiment",
             model=settings.OPENAI_MODEL,
             messages=[{"role": "user", "content": sentiment_prompt}],
             temperature=0.3,
@@ -168,7 +179,6 @@ async def _analyze_sentiment_and_context(raw_text: str) -> Dict[str, Any]:
         
         # Tenta extrair JSON
         try:
-            import re
             json_match = re.search(r'\{.*\}', sentiment_text, re.DOTALL)
             if json_match:
                 return json.loads(json_match.group())
@@ -191,347 +201,56 @@ async def _analyze_sentiment_and_context(raw_text: str) -> Dict[str, Any]:
         }
 
 
+# Seções do SUMMARY_PROMPT que viram pontos-chave, na ordem de exibição
+KEY_POINT_SECTIONS = [
+    "🎯 ICP (Ideal Customer Profile)",
+    "🛍️ PRODUTOS/SERVIÇOS",
+    "💰 PRICING & BUSINESS MODEL",
+    "🔧 STACK TECNOLÓGICO",
+    "📊 ANÁLISE DE MERCADO",
+    "🎯 OPORTUNIDADES DE VENDAS",
+    "💡 INSIGHTS ESTRATÉGICOS",
+    "SCORE DE PRIORIDADE",
+]
+
+
 def _parse_output(text: str) -> Dict[str, Any]:
     """Parser melhorado para extrair informações estruturadas do texto formatado."""
     summary = text.strip()
     key_points: List[str] = []
     entities: Dict[str, Any] = {}
-    
+    sections = SectionIndex(text)
+
     # Extrai JSON das entidades estruturadas
-    try:
-        # Procura por seção "ENTIDADES ESTRUTURADAS"
-        entities_start = text.find("## ENTIDADES ESTRUTURADAS")
-        if entities_start != -1:
-            json_start = text.find("{", entities_start)
-            json_end = text.rfind("}", json_start)
-            if json_start != -1 and json_end != -1 and json_end > json_start:
-                json_str = text[json_start:json_end + 1]
-            entities = json.loads(json_str)
-    except Exception:
-        pass
-    
+    entities_text = sections.body("ENTIDADES ESTRUTURADAS", prefix=True)
+    if entities_text:
+        json_start = entities_text.find("{")
+        json_end = entities_text.rfind("}")
+        if 0 <= json_start < json_end:
+            try:
+                entities = json.loads(entities_text[json_start:json_end + 1])
+            except ValueError:
+                pass
+
     # Extrai resumo executivo
-    summary_start = text.find("## RESUMO EXECUTIVO")
-    if summary_start != -1:
-        # Pega o texto até a próxima seção
-        next_section = text.find("## ", summary_start + 1)
-        if next_section != -1:
-            summary = text[summary_start:next_section].replace("## RESUMO EXECUTIVO", "").strip()
-        else:
-            summary = text[summary_start:].replace("## RESUMO EXECUTIVO", "").strip()
-    
+    summary_text = sections.body("RESUMO EXECUTIVO", prefix=True)
+    if summary_text is not None:
+        summary = summary_text
+
     # Extrai pontos-chave das seções principais
-    sections_to_extract = [
-        "🎯 ICP (Ideal Customer Profile)",
-        "🛍️ PRODUTOS/SERVIÇOS", 
-        "💰 PRICING & BUSINESS MODEL",
-        "🔧 STACK TECNOLÓGICO",
-        "📊 ANÁLISE DE MERCADO",
-        "🎯 OPORTUNIDADES DE VENDAS",
-        "💡 INSIGHTS ESTRATÉGICOS",
-        "SCORE DE PRIORIDADE"
-    ]
-    
-    for section in sections_to_extract:
-        section_start = text.find(f"### {section}")
-        if section_start != -1:
-            # Pega o conteúdo da seção até a próxima ### ou ##
-            next_section = text.find("### ", section_start + 1)
-            if next_section == -1:
-                next_section = text.find("## ", section_start + 1)
-            
-            if next_section != -1:
-                section_content = text[section_start:next_section].replace(f"### {section}", "").strip()
-            else:
-                section_content = text[section_start:].replace(f"### {section}", "").strip()
-            
-            # Limpa o conteúdo e verifica se é válido
-            section_content = section_content.strip()
-            if section_content and section_content != "Não especificado" and len(section_content) > 3:
-                key_points.append(f"{section}: {section_content}")
-    
+    for section in KEY_POINT_SECTIONS:
+        section_content = sections.body(section, prefix=True)
+        if section_content and section_content != "Não especificado" and len(section_content) > 3:
+            key_points.append(f"{section}: {section_content}")
+
     # Se não encontrou seções estruturadas, usa o parser antigo
     if not key_points:
         for line in summary.splitlines():
             s = line.strip("- *•\t ")
             if len(s) > 0 and (line.strip().startswith(('-', '*', '•')) or s.endswith(';')):
                 key_points.append(s)
-    
-    return {"summary": summary.strip(), "key_points": key_points, "entities": entities}
-
-
-def _extract_mock_analysis(raw_text: str) -> Dict[str, Any]:
-    """Análise mock inteligente que extrai informações básicas do texto."""
-    import re
-    
-    # Extrai título (primeira linha significativa)
-    lines = [line.strip() for line in raw_text.split('\n') if line.strip()]
-    title = lines[0] if lines else "Título não encontrado"
-    
-    # Gera resumo estruturado
-    summary = f"""## RESUMO EXECUTIVO
-{_generate_smart_summary(raw_text, title)}
-
-## INFORMAÇÕES PRINCIPAIS
-
-### 🎯 ICP (Ideal Customer Profile)
-{_extract_icp(raw_text)}
-
-### 🛍️ PRODUTOS/SERVIÇOS
-{_extract_products_formatted(raw_text)}
-
-### 💰 PRICING
-{_extract_pricing(raw_text)}
-
-### 🔧 STACK TECNOLÓGICO
-{_extract_tech_stack_formatted(raw_text)}
-
-### 📞 CONTATOS
-{_extract_contacts_formatted(raw_text)}
-
-### 🏢 SOBRE A EMPRESA
-{_extract_company_info(raw_text)}
-
-### 🎯 OPORTUNIDADES DE VENDAS
-{_extract_opportunities(raw_text)}"""
-    
-    # Extrai pontos-chave das seções
-    key_points = []
-    sections = [
-        ("🎯 ICP (Ideal Customer Profile)", _extract_icp(raw_text)),
-        ("🛍️ PRODUTOS/SERVIÇOS", _extract_products_formatted(raw_text)),
-        ("💰 PRICING", _extract_pricing(raw_text)),
-        ("🔧 STACK TECNOLÓGICO", _extract_tech_stack_formatted(raw_text)),
-        ("📞 CONTATOS", _extract_contacts_formatted(raw_text)),
-        ("🏢 SOBRE A EMPRESA", _extract_company_info(raw_text)),
-        ("🎯 OPORTUNIDADES DE VENDAS", _extract_opportunities(raw_text))
-    ]
-    
-    for section_title, content in sections:
-        if content and content != "Não especificado" and len(content.strip()) > 3:
-            key_points.append(f"{section_title}: {content}")
-    
-    # Extrai entidades básicas
-    entities = {
-        "company_name": _extract_company_name(raw_text),
-        "products": _extract_products(raw_text),
-        "pricing": _extract_pricing(raw_text),
-        "tech_stack": _extract_tech_stack(raw_text),
-        "contacts": _extract_contacts(raw_text)
-    }
-    
-    return {
-        "summary": summary,
-        "key_points": key_points,
-        "entities": entities
-    }
-
-
-def _extract_company_name(text: str) -> str:
-    """Extrai nome da empresa do texto."""
-    lines = [line.strip() for line in text.split('\n') if line.strip()]
-    if lines:
-        # Primeira linha geralmente é o título/nome
-        return lines[0][:50]  # Limita o tamanho
-    return "Nome da empresa não identificado"
-
-
-def _extract_products(text: str) -> List[str]:
-    """Extrai produtos/serviços mencionados."""
-    products = []
-    text_lower = text.lower()
-    
-    if 'software' in text_lower:
-        products.append("Software")
-    if 'app' in text_lower or 'aplicativo' in text_lower:
-        products.append("Aplicativo")
-    if 'api' in text_lower:
-        products.append("API")
-    if 'ia' in text_lower or 'ai' in text_lower:
-        products.append("Soluções de IA")
-    if 'automação' in text_lower or 'automation' in text_lower:
-        products.append("Automação")
-    
-    return products if products else ["Produtos não especificados"]
-
-
-def _extract_pricing(text: str) -> str:
-    """Extrai informações de preço."""
-    import re
-    price_patterns = [
-        r'\$\d+',
-        r'€\d+',
-        r'R\$\s*\d+',
-        r'\d+\s*reais',
-        r'preço.*?\d+',
-        r'price.*?\d+'
-    ]
-    
-    for pattern in price_patterns:
-        matches = re.findall(pattern, text, re.IGNORECASE)
-        if matches:
-            return matches[0]
-    
-    return "Preços não especificados"
-
-
-def _extract_tech_stack(text: str) -> List[str]:
-    """Extrai tecnologias mencionadas."""
-    tech_stack = []
-    text_lower = text.lower()
-    
-    technologies = [
-        'python', 'javascript', 'react', 'node', 'vue', 'angular',
-        'aws', 'azure', 'gcp', 'docker', 'kubernetes',
-        'mysql', 'postgresql', 'mongodb', 'redis',
-        'tensorflow', 'pytorch', 'openai', 'gpt'
-    ]
-    
-    for tech in technologies:
-        if tech in text_lower:
-            tech_stack.append(tech.title())
-    
-    return tech_stack if tech_stack else ["Stack não especificado"]
-
-
-def _extract_contacts(text: str) -> List[str]:
-    """Extrai informações de contato."""
-    import re
-    contacts = []
-    
-    # Busca emails
-    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-    emails = re.findall(email_pattern, text)
-    contacts.extend(emails)
-    
-    # Busca telefones
-    phone_pattern = r'(\+?55\s?)?(\(?\d{2}\)?\s?)?\d{4,5}-?\d{4}'
-    phones = re.findall(phone_pattern, text)
-    if phones:
-        contacts.append("Telefone encontrado")
-    
-    return contacts if contacts else ["Contatos não fornecidos"]
-
 
-def _generate_smart_summary(text: str, title: str) -> str:
-    """Gera resumo inteligente baseado no conteúdo."""
-    # Pega as primeiras 2-3 frases significativas
-    sentences = [s.strip() for s in text.split('.') if len(s.strip()) > 20]
-    
-    if len(sentences) >= 2:
-        summary = f"{title}. {sentences[0]}. {sentences[1]}."
-    elif len(sentences) == 1:
-        summary = f"{title}. {sentences[0]}."
-    else:
-        summary = f"{title}. {text[:200]}..."
-    
-    return summary[:400] + ("..." if len(summary) > 400 else "")
-
-
-def _extract_icp(text: str) -> str:
-    """Extrai informações sobre ICP."""
-    text_lower = text.lower()
-    icp_indicators = []
-    
-    if any(word in text_lower for word in ['b2b', 'business', 'empresa', 'corporação']):
-        icp_indicators.append("Empresas B2B")
-    if any(word in text_lower for word in ['startup', 'pequena', 'média']):
-        icp_indicators.append("Startups e PMEs")
-    if any(word in text_lower for word in ['grande', 'enterprise', 'corporativo']):
-        icp_indicators.append("Grandes corporações")
-    if any(word in text_lower for word in ['tech', 'tecnologia', 'software']):
-        icp_indicators.append("Empresas de tecnologia")
-    
-    return ", ".join(icp_indicators) if icp_indicators else "Não especificado"
-
-
-def _extract_products_formatted(text: str) -> str:
-    """Extrai produtos formatados."""
-    products = _extract_products(text)
-    if products and products != ["Produtos não especificados"]:
-        return ", ".join(products)
-    return "Não especificado"
-
-
-def _extract_tech_stack_formatted(text: str) -> str:
-    """Extrai stack tecnológico formatado."""
-    tech_stack = _extract_tech_stack(text)
-    if tech_stack and tech_stack != ["Stack não especificado"]:
-        return ", ".join(tech_stack)
-    return "Não especificado"
-
-
-def _extract_contacts_formatted(text: str) -> str:
-    """Extrai contatos formatados."""
-    contacts = _extract_contacts(text)
-    if contacts and contacts != ["Contatos não fornecidos"]:
-        return ", ".join(contacts)
-    return "Não especificado"
-
-
-def _extract_company_info(text: str) -> str:
-    """Extrai informações sobre a empresa."""
-    text_lower = text.lower()
-    info = []
-    
-    if any(word in text_lower for word in ['fundada', 'criada', 'estabelecida']):
-        info.append("Empresa estabelecida")
-    if any(word in text_lower for word in ['startup', 'inovação', 'disruptiva']):
-        info.append("Empresa inovadora")
-    if any(word in text_lower for word in ['global', 'internacional', 'mundial']):
-        info.append("Presença global")
-    if any(word in text_lower for word in ['local', 'brasil', 'nacional']):
-        info.append("Presença nacional")
-    
-    return ", ".join(info) if info else "Não especificado"
-
-
-def _extract_opportunities(text: str) -> str:
-    """Extrai oportunidades de vendas."""
-    text_lower = text.lower()
-    opportunities = []
-    
-    # Palavras-chave para crescimento
-    if any(word in text_lower for word in ['crescimento', 'expansão', 'escalar', 'crescer', 'expandir']):
-        opportunities.append("Oportunidade de crescimento")
-    
-    # Palavras-chave para automação
-    if any(word in text_lower for word in ['automação', 'otimização', 'eficiência', 'automatizar', 'otimizar']):
-        opportunities.append("Necessidade de automação")
-    
-    # Palavras-chave para transformação digital
-    if any(word in text_lower for word in ['digital', 'transformação', 'modernização', 'digitalizar']):
-        opportunities.append("Transformação digital")
-    
-    # Palavras-chave para IA
-    if any(word in text_lower for word in ['ia', 'ai', 'inteligência artificial', 'machine learning', 'ml']):
-        opportunities.append("Adoção de IA")
-    
-    # Palavras-chave para inovação
-    if any(word in text_lower for word in ['inovação', 'inovador', 'disruptivo', 'tecnologia']):
-        opportunities.append("Empresa inovadora")
-    
-    # Palavras-chave para problemas/desafios
-    if any(word in text_lower for word in ['desafio', 'problema', 'dificuldade', 'limitação']):
-        opportunities.append("Possíveis pain points identificados")
-    
-    # Palavras-chave para mercado
-    if any(word in text_lower for word in ['mercado', 'competição', 'concorrência', 'diferencial']):
-        opportunities.append("Análise de mercado necessária")
-    
-    # Se não encontrou oportunidades específicas, gera insights baseados no contexto
-    if not opportunities:
-        # Analisa o tipo de empresa baseado no conteúdo
-        if any(word in text_lower for word in ['startup', 'pequena', 'média empresa']):
-            opportunities.append("Empresa em crescimento - oportunidades de parceria")
-        elif any(word in text_lower for word in ['grande', 'corporação', 'enterprise']):
-            opportunities.append("Empresa estabelecida - foco em ROI e eficiência")
-        elif any(word in text_lower for word in ['tech', 'tecnologia', 'software']):
-            opportunities.append("Empresa de tecnologia - foco em inovação")
-        else:
-            opportunities.append("Análise de necessidades específicas recomendada")
-    
-    return ", ".join(opportunities)
+    return {"summary": summary.strip(), "key_points": key_points, "entities": entities}
 
 
 async def generate_detailed_report(analysis: Any) -> Dict[str, Any]:
@@ -545,9 +264,6 @@ async def generate_detailed_report(analysis: Any) -> Dict[str, Any]:
         Dict com seções detalhadas do relatório
     """
     try:
-        import openai
-        openai.api_key = settings.OPENAI_API_KEY
-        
         # Monta o contexto da análise
         context = f"""
         ANÁLISE ORIGINAL:
@@ -555,7 +271,7 @@ async def generate_detailed_report(analysis: Any) -> Dict[str, Any]:
         Título: {analysis.title or 'N/A'}
         Resumo: {analysis.summary or 'N/A'}
         Pontos-chave: {analysis.key_points or 'N/A'}
-        Entidades: {analysis.entities or 'N/A'}
+        Entidades: {json.dumps(analysis.entities, ensure_ascii=False) if analysis.entities else 'N/A'}
         """
         
         # Prompt para gerar relatório detalhado
@@ -597,7 +313,8 @@ REGRAS IMPORTANTES:
 - Se alguma informação não estiver disponível, faça inferências razoáveis baseadas no contexto"""
 
         # Chama GPT-4 para gerar o relatório detalhado
-        response = await openai.ChatCompletion.acreate(
+        response = await chat_completion(
+            "report.detailed",
             model=settings.OPENAI_MODEL,
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -615,14 +332,15 @@ REGRAS IMPORTANTES:
         print(content[:500])  # Primeiros 500 caracteres
         print(f"... (total: {len(content)} caracteres)")
         
-        # Extrai as seções do relatório
+        # Extrai as seções do relatório (títulos indexados uma vez só)
+        index = SectionIndex(content)
         sections = {
-            'expanded_summary': extract_section(content, 'RESUMO EXECUTIVO EXPANDIDO'),
-            'market_analysis': extract_section(content, 'ANÁLISE DE MERCADO'),
-            'sales_opportunities': extract_section(content, 'OPORTUNIDADES DE VENDAS'),
-            'tech_stack': extract_section(content, 'STACK TECNOLÓGICO'),
-            'approach_strategy': extract_section(content, 'ESTRATÉGIA DE ABORDAGEM'),
-            'additional_insights': extract_section(content, 'INSIGHTS ADICIONAIS')
+            'expanded_summary': _report_section(index, 'RESUMO EXECUTIVO EXPANDIDO'),
+            'market_analysis': _report_section(index, 'ANÁLISE DE MERCADO'),
+            'sales_opportunities': _report_section(index, 'OPORTUNIDADES DE VENDAS'),
+            'tech_stack': _report_section(index, 'STACK TECNOLÓGICO'),
+            'approach_strategy': _report_section(index, 'ESTRATÉGIA DE ABORDAGEM'),
+            'additional_insights': _report_section(index, 'INSIGHTS ADICIONAIS')
         }
         
         # Log das seções extraídas para debug
@@ -645,6 +363,31 @@ REGRAS IMPORTANTES:
         }
 
 
+# Instruções do prompt que o LLM às vezes repete, ex.: "(Escreva 300-500 palavras...)"
+_WRITING_INSTRUCTION = re.compile(r'\(Escreva.*?\)', re.IGNORECASE | re.DOTALL)
+
+
+def _report_section(index: SectionIndex, section_name: str) -> str:
+    """Conteúdo de uma seção do relatório já indexado, ou mensagem padrão."""
+    try:
+        section_content = index.body(section_name, unmarked=True)
+        if section_content is None:
+            return f"Seção {section_name} não encontrada no relatório gerado."
+
+        # Remove possíveis instruções como "(Escreva 300-500 palavras...)"
+        section_content = _WRITING_INSTRUCTION.sub('', section_content).strip()
+
+        if section_content and len(section_content) > 50:  # Pelo menos 50 caracteres
+            return section_content
+        return f"Conteúdo da seção {section_name} não foi gerado adequadamente. Tente gerar o relatório novamente."
+
+    except Exception as e:
+        print(f"Erro ao extrair seção {section_name}: {e}")
+        import traceback
+        traceback.print_exc()
+        return f"Erro ao processar seção {section_name}: {str(e)}"
+
+
 def extract_section(content: str, section_name: str) -> str:
     """
     Extrai uma seção específica do conteúdo gerado.
@@ -656,69 +399,4 @@ def extract_section(content: str, section_name: str) -> str:
     Returns:
         Conteúdo da seção ou mensagem padrão
     """
-    try:
-        # Padrões de marcação de seção que vamos procurar
-        patterns = [
-            f"=== {section_name} ===",
-            f"### {section_name}",
-            f"## {section_name}",
-            f"# {section_name}",
-            section_name
-        ]
-        
-        lines = content.split('\n')
-        section_start = -1
-        section_end = len(lines)
-        
-        # Procura o início da seção
-        for i, line in enumerate(lines):
-            line_upper = line.upper().strip()
-            for pattern in patterns:
-                if pattern.upper() in line_upper:
-                    section_start = i + 1  # Começa na linha APÓS o título
-                    break
-            if section_start != -1:
-                break
-        
-        # Se encontrou o início, procura o fim (próxima seção)
-        if section_start != -1:
-            for i in range(section_start, len(lines)):
-                line = lines[i].strip()
-                # Verifica se é início de nova seção
-                if line.startswith('===') or line.startswith('###') or line.startswith('##') or line.startswith('#'):
-                    # Verifica se não é uma linha dentro de um parágrafo
-                    if i > section_start and any(marker in line for marker in ['===', '###', '##']):
-                        section_end = i
-                        break
-            
-            # Extrai o conteúdo
-            section_lines = lines[section_start:section_end]
-            
-            # Remove linhas vazias do início e fim
-            while section_lines and not section_lines[0].strip():
-                section_lines.pop(0)
-            while section_lines and not section_lines[-1].strip():
-                section_lines.pop()
-            
-            # Remove instruções entre parênteses (se houver)
-            section_content = '\n'.join(section_lines)
-            
-            # Remove possíveis instruções como "(Escreva 300-500 palavras...)"
-            import re
-            section_content = re.sub(r'\(Escreva.*?\)', '', section_content, flags=re.IGNORECASE | re.DOTALL)
-            section_content = section_content.strip()
-            
-            if section_content and len(section_content) > 50:  # Pelo menos 50 caracteres
-                return section_content
-            else:
-                return f"Conteúdo da seção {section_name} não foi gerado adequadamente. Tente gerar o relatório novamente."
-        
-        return f"Seção {section_name} não encontrada no relatório gerado."
-        
-    except Exception as e:
-        print(f"Erro ao extrair seção {section_name}: {e}")
-        import traceback
-        traceback.print_exc()
-        return f"Erro ao processar seção {section_name}: {str(e)}"
-
-
+    return _report_section(SectionIndex(content), section_name)
@@ -0,0 +1,264 @@
+"""
+Cache persistente de respostas do LLM
+
+Prompts idênticos (reanálise de texto que não mudou, insights do dashboard
+sobre os mesmos dados, comparações repetidas) eram reenviados à API. As
+respostas ficam na tabela llm_cache_entries, com chave
+sha256(model, messages, temperature, max_tokens), TTL por call site e
+despejo por tamanho (LRU pelo último acerto) quando o total passa de
+LLM_CACHE_MAX_BYTES.
+
+As funções daqui fazem I/O síncrono no banco: o gateway as chama via
+asyncio.to_thread. Acertos são contados em memória e gravados em lote
+(como os registros de uso em llm_usage), a cada
+LLM_CACHE_HIT_FLUSH_INTERVAL_S e antes de cada despejo.
+"""
+import asyncio
+import hashlib
+import json
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, func, update
+from sqlalchemy.exc import IntegrityError
+
+from .. import models
+from ..config import settings
+from ..database import SessionLocal
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """Política de cache de um call site.
+
+    ttl_s: validade das entradas (0 desliga o cache do call site)
+    max_temperature: acima disso a chamada é "criativa" e não usa o cache
+    """
+    ttl_s: int
+    max_temperature: float = 0.5
+
+
+DAY = 24 * 3600
+
+# Call sites conhecidos; os demais usam LLM_CACHE_DEFAULT_TTL_S
+CACHE_POLICIES: Dict[str, CachePolicy] = {
+    "analysis.summary": CachePolicy(ttl_s=30 * DAY),
+    "analysis.sentiment": CachePolicy(ttl_s=30 * DAY),
+    "analysis.fused": CachePolicy(ttl_s=30 * DAY),
+    "analysis.chunk": CachePolicy(ttl_s=30 * DAY),
+    "market.trends": CachePolicy(ttl_s=7 * DAY),
+    "market.strategy": CachePolicy(ttl_s=7 * DAY),
+    # Relatório, comparação e insights amostram com temperatura 0.7: "gerar de
+    # novo" deve trazer outro texto, então ficam fora do cache (max_temperature
+    # padrão); só entram se passarem a chamar o LLM com temperatura baixa
+    "report.detailed": CachePolicy(ttl_s=DAY),
+    "comparison": CachePolicy(ttl_s=DAY),
+    "dashboard.insights": CachePolicy(ttl_s=3600),
+    "objections.evaluate": CachePolicy(ttl_s=7 * DAY),
+    # Objeções de treino devem variar a cada sessão
+    "objections.generate": CachePolicy(ttl_s=0),
+}
+
+_stats: Dict[str, Dict[str, int]] = {}
+_writes_since_eviction = 0
+# Acertos ainda não gravados: chave -> (quantidade, último acerto)
+_pending_hits: Dict[str, Tuple[int, datetime]] = {}
+# Lookups e gravações rodam em threads (asyncio.to_thread)
+_lock = threading.Lock()
+_flusher: Optional[asyncio.Task] = None
+
+
+def _count(call_site: str, field: str) -> None:
+    with _lock:
+        site = _stats.setdefault(call_site, {"hits": 0, "misses": 0, "bypassed": 0})
+        site[field] += 1
+
+
+def record_bypass(call_site: str) -> None:
+    _count(call_site, "bypassed")
+
+
+def cache_stats() -> Dict[str, Any]:
+    """Acertos/erros por call site neste processo + tamanho da tabela."""
+    db = SessionLocal()
+    try:
+        entries, total_bytes = db.query(
+            func.count(models.LLMCacheEntry.id), func.coalesce(func.sum(models.LLMCacheEntry.size_bytes), 0)
+        ).one()
+    finally:
+        db.close()
+    return {
+        "enabled": settings.LLM_CACHE_ENABLED,
+        "entries": entries,
+        "total_bytes": int(total_bytes),
+        "max_bytes": settings.LLM_CACHE_MAX_BYTES,
+        "call_sites": _stats,
+    }
+
+
+def policy_for(call_site: str) -> CachePolicy:
+    return CACHE_POLICIES.get(call_site, CachePolicy(ttl_s=settings.LLM_CACHE_DEFAULT_TTL_S))
+
+
+def cache_key(model: str, messages: List[Dict[str, Any]], temperature: Optional[float], max_tokens: Optional[int]) -> str:
+    """Impressão digital do prompt (só os parâmetros que mudam a resposta)."""
+    payload = json.dumps(
+        {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def is_cacheable(call_site: str, temperature: Optional[float], opt_out: bool = False) -> bool:
+    policy = policy_for(call_site)
+    if opt_out or not settings.LLM_CACHE_ENABLED or policy.ttl_s <= 0:
+        return False
+    return (temperature or 0.0) <= policy.max_temperature
+
+
+def get_cached(call_site: str, key: str) -> Optional[Dict[str, Any]]:
+    """Resposta em cache ainda válida para `key`, ou None."""
+    db = SessionLocal()
+    try:
+        row = db.query(models.LLMCacheEntry.response, models.LLMCacheEntry.expires_at).filter(
+            models.LLMCacheEntry.key == key
+        ).first()
+    finally:
+        db.close()
+    now = datetime.utcnow()
+    if row is None or row.expires_at < now:
+        _count(call_site, "misses")
+        return None
+    # Sem UPDATE por acerto: o contador vai para o banco no próximo flush
+    with _lock:
+        hits, _ = _pending_hits.get(key, (0, now))
+        _pending_hits[key] = (hits + 1, now)
+    _count(call_site, "hits")
+    return json.loads(row.response)
+
+
+def flush_hits() -> int:
+    """Grava os acertos pendentes (hits e last_hit_at); retorna quantas chaves."""
+    with _lock:
+        pending = dict(_pending_hits)
+        _pending_hits.clear()
+    if not pending:
+        return 0
+    db = SessionLocal()
+    try:
+        db.connection().execute(
+            update(models.LLMCacheEntry)
+            .where(models.LLMCacheEntry.key == bindparam("entry_key"))
+            .values(hits=models.LLMCacheEntry.hits + bindparam("new_hits"), last_hit_at=bindparam("hit_at")),
+            [{"entry_key": key, "new_hits": hits, "hit_at": hit_at} for key, (hits, hit_at) in pending.items()],
+        )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️ Falha ao gravar acertos de {len(pending)} entradas do cache de LLM: {e}")
+        return 0
+    finally:
+        db.close()
+    return len(pending)
+
+
+def store(call_site: str, key: str, model: str, response: Dict[str, Any]) -> None:
+    """Grava a resposta e, periodicamente, aplica o limite de tamanho."""
+    global _writes_since_eviction
+    body = json.dumps(response, ensure_ascii=False)
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        entry = db.query(models.LLMCacheEntry).filter(models.LLMCacheEntry.key == key).first()
+        if entry is None:
+            entry = models.LLMCacheEntry(key=key, hits=0)
+            db.add(entry)
+        entry.call_site = call_site
+        entry.model = model
+        entry.response = body
+        entry.size_bytes = len(body.encode("utf-8"))
+        entry.created_at = now
+        entry.last_hit_at = now
+        entry.expires_at = now + timedelta(seconds=policy_for(call_site).ttl_s)
+        try:
+            db.commit()
+        except IntegrityError:  # outro worker gravou a mesma chave ao mesmo tempo
+            db.rollback()
+            return
+    finally:
+        db.close()
+
+    with _lock:
+        _writes_since_eviction += 1
+        due = _writes_since_eviction >= settings.LLM_CACHE_EVICT_EVERY
+        if due:
+            _writes_since_eviction = 0
+    if due:
+        evict()
+
+
+def evict() -> int:
+    """Remove expiradas e, se o total passar de LLM_CACHE_MAX_BYTES, as menos
+    usadas recentemente até voltar a 90% do limite."""
+    # last_hit_at atualizado antes de escolher as menos usadas
+    flush_hits()
+    db = SessionLocal()
+    try:
+        removed = db.query(models.LLMCacheEntry).filter(
+            models.LLMCacheEntry.expires_at < datetime.utcnow()
+        ).delete(synchronize_session=False)
+        db.commit()
+
+        total = db.query(func.coalesce(func.sum(models.LLMCacheEntry.size_bytes), 0)).scalar() or 0
+        target = int(settings.LLM_CACHE_MAX_BYTES * 0.9)
+        if total > settings.LLM_CACHE_MAX_BYTES:
+            victims = []
+            rows = db.query(models.LLMCacheEntry.id, models.LLMCacheEntry.size_bytes).order_by(
+                models.LLMCacheEntry.last_hit_at
+            ).all()
+            for entry_id, size in rows:
+                if total <= target:
+                    break
+                victims.append(entry_id)
+                total -= size
+            for start in range(0, len(victims), 500):
+                db.query(models.LLMCacheEntry).filter(
+                    models.LLMCacheEntry.id.in_(victims[start:start + 500])
+                ).delete(synchronize_session=False)
+            db.commit()
+            removed += len(victims)
+        if removed:
+            print(f"🧹 Cache de LLM: {removed} entradas removidas")
+        return removed
+    finally:
+        db.close()
+
+
+async def _flush_loop() -> None:
+    while True:
+        await asyncio.sleep(settings.LLM_CACHE_HIT_FLUSH_INTERVAL_S)
+        try:
+            await asyncio.to_thread(flush_hits)
+        except Exception as e:  # nunca derruba o flusher
+            print(f"⚠️ Erro no flush de acertos do cache de LLM: {e}")
+
+
+def start_flusher() -> None:
+    global _flusher
+    if _flusher is None:
+        _flusher = asyncio.create_task(_flush_loop())
+
+
+async def stop_flusher() -> None:
+    global _flusher
+    if _flusher is not None:
+        _flusher.cancel()
+        try:
+            await _flusher
+        except asyncio.CancelledError:
+            pass
+        _flusher = None
+    flush_hits()
@@ -0,0 +1,406 @@
+"""
+Gateway único de chamadas ao LLM
+
+Todos os serviços passam por `chat_completion` (ou `stream_chat_completion`
+e `create_embedding`), que identifica quem chamou (`call_site`, ex.:
+"analysis.summary"), envia ao backend de LLM_PROVIDER
+(services/llm_providers.py) e aplica, nesta ordem:
+
+- cache persistente de respostas (services/llm_cache.py);
+- limite global de chamadas simultâneas, com faixas de prioridade: a faixa
+  "interactive" (chat, dashboard) é servida antes e nunca fica sem vaga, a
+  faixa "batch" (jobs, lotes) tem teto próprio;
+- prazo por tentativa e prazo total da chamada;
+- retries em 429/5xx/timeout com backoff exponencial com jitter, respeitando
+  o Retry-After devolvido pela API;
+- métricas por call site (latência, tokens, erros, retries) em memória e um
+  registro por chamada em llm_call_records (services/llm_usage.py).
+
+A faixa vem do parâmetro `priority` ou do contexto (`with priority_lane("batch")`),
+que é herdado pelas tasks criadas dentro dele.
+"""
+import asyncio
+import contextvars
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Iterator, List, Optional
+
+import httpx
+
+from ..config import settings
+from . import llm_cache, llm_usage
+from .llm_providers import LLMProvider, get_provider
+
+
+# Faixas de prioridade (menor valor = atendida primeiro)
+LANES = {"interactive": 0, "default": 1, "batch": 2}
+
+_current_lane: contextvars.ContextVar[str] = contextvars.ContextVar("llm_lane", default="default")
+
+# Status HTTP que valem nova tentativa
+RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+
+@contextmanager
+def priority_lane(lane: str) -> Iterator[None]:
+    """Define a faixa de prioridade das chamadas feitas dentro do bloco."""
+    if lane not in LANES:
+        raise ValueError(f"Faixa de prioridade desconhecida: {lane}")
+    token = _current_lane.set(lane)
+    try:
+        yield
+    finally:
+        _current_lane.reset(token)
+
+
+class _LaneLimiter:
+    """Semáforo com fila por prioridade e teto para a faixa batch."""
+
+    def __init__(self):
+        self.in_use: Dict[str, int] = {lane: 0 for lane in LANES}
+        self._waiters: List[List[Any]] = []  # [prioridade, ordem, faixa, future]
+        self._seq = 0
+
+    def _has_room(self, lane: str) -> bool:
+        if sum(self.in_use.values()) >= settings.LLM_MAX_CONCURRENCY:
+            return False
+        return lane != "batch" or self.in_use["batch"] < settings.LLM_BATCH_MAX_CONCURRENCY
+
+    def _wake(self) -> None:
+        for waiter in sorted(self._waiters):
+            _, _, lane, future = waiter
+            if future.done():
+                self._waiters.remove(waiter)
+            elif self._has_room(lane):
+                self._waiters.remove(waiter)
+                self.in_use[lane] += 1
+                future.set_result(None)
+
+    async def acquire(self, lane: str) -> None:
+        if not self._waiters and self._has_room(lane):
+            self.in_use[lane] += 1
+            return
+        self._seq += 1
+        future = asyncio.get_running_loop().create_future()
+        waiter = [LANES[lane], self._seq, lane, future]
+        self._waiters.append(waiter)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release(lane)  # vaga concedida junto com o cancelamento
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+
+    def release(self, lane: str) -> None:
+        self.in_use[lane] -= 1
+        self._wake()
+
+    def stats(self) -> Dict[str, Any]:
+        waiting: Dict[str, int] = {lane: 0 for lane in LANES}
+        for _, _, lane, future in self._waiters:
+            if not future.done():
+                waiting[lane] += 1
+        return {
+            "max_concurrency": settings.LLM_MAX_CONCURRENCY,
+            "batch_max_concurrency": settings.LLM_BATCH_MAX_CONCURRENCY,
+            "in_use": dict(self.in_use),
+            "waiting": waiting,
+        }
+
+
+_limiter = _LaneLimiter()
+_metrics: Dict[str, Dict[str, Any]] = {}
+
+
+def _site_metrics(call_site: str) -> Dict[str, Any]:
+    return _metrics.setdefault(call_site, {
+        "calls": 0,
+        "errors": 0,
+        "retries": 0,
+        "timeouts": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "latencies_ms": deque(maxlen=500),
+    })
+
+
+def _percentile(values: Deque[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * pct))], 1)
+
+
+def gateway_stats() -> Dict[str, Any]:
+    """Métricas por call site (neste processo) e ocupação das faixas."""
+    call_sites = {}
+    for site, m in _metrics.items():
+        latencies = m["latencies_ms"]
+        call_sites[site] = {
+            **{k: v for k, v in m.items() if k != "latencies_ms"},
+            "latency_ms": {
+                "avg": round(sum(latencies) / len(latencies), 1) if latencies else None,
+                "p50": _percentile(latencies, 0.5),
+                "p95": _percentile(latencies, 0.95),
+            },
+        }
+    return {"limiter": _limiter.stats(), "call_sites": call_sites}
+
+
+def _retry_after_s(error: Exception) -> Optional[float]:
+    """Espera pedida pela API (Retry-After / retry-after-ms), se houver."""
+    headers = getattr(error, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):  # Retry-After em formato de data: usa o backoff
+        return None
+    return None
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+    status = getattr(error, "http_status", None)
+    if status is not None:
+        return status in RETRY_STATUSES or status >= 500
+    # Erros de rede sem status (conexão recusada, timeout do cliente HTTP)
+    if isinstance(error, httpx.TransportError):
+        return True
+    return type(error).__name__ in {"APIConnectionError", "Timeout", "TryAgain", "ServiceUnavailableError"}
+
+
+def _backoff_s(attempt: int) -> float:
+    """Backoff exponencial com jitter completo."""
+    return random.uniform(0, min(settings.LLM_BACKOFF_MAX_S, settings.LLM_BACKOFF_BASE_S * 2 ** attempt))
+
+
+def _retry_wait(call_site: str, m: Dict[str, Any], error: Exception, attempt: int, deadline: float) -> float:
+    """Tempo até a próxima tentativa; relança `error` se não vale tentar de novo."""
+    if isinstance(error, asyncio.TimeoutError):
+        m["timeouts"] += 1
+    wait = _retry_after_s(error)
+    wait = wait if wait is not None else _backoff_s(attempt)
+    if (
+        not _is_retryable(error)
+        or attempt >= settings.LLM_MAX_RETRIES
+        or asyncio.get_running_loop().time() + wait >= deadline
+    ):
+        m["errors"] += 1
+        print(f"❌ LLM [{call_site}] falhou após {attempt + 1} tentativa(s): {type(error).__name__}: {error}")
+        raise error
+    m["retries"] += 1
+    print(f"🔁 LLM [{call_site}] {type(error).__name__}; nova tentativa em {wait:.1f}s ({attempt + 1}/{settings.LLM_MAX_RETRIES})")
+    return wait
+
+
+async def _call(
+    call_site: str,
+    request: Callable[[float], Awaitable[Dict[str, Any]]],
+    priority: Optional[str],
+    deadline_s: Optional[float],
+    provider: LLMProvider,
+    model: str,
+) -> Dict[str, Any]:
+    """Executa `request(timeout)` com fila de prioridade, prazos, retries e métricas."""
+    lane = priority or _current_lane.get()
+    m = _site_metrics(call_site)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + (deadline_s or settings.LLM_DEADLINE_S)
+    call_started = time.perf_counter()
+    attempt = 0
+    while True:
+        remaining = deadline - loop.time()
+        await asyncio.wait_for(_limiter.acquire(lane), timeout=max(remaining, 0.001))
+        started = time.perf_counter()
+        try:
+            timeout = min(settings.LLM_REQUEST_TIMEOUT_S, deadline - loop.time())
+            resp = await asyncio.wait_for(request(timeout), timeout=max(timeout, 0.001))
+        except Exception as e:
+            error = e
+        else:
+            m["calls"] += 1
+            m["latencies_ms"].append((time.perf_counter() - started) * 1000)
+            usage = resp.get("usage") or {}
+            m["prompt_tokens"] += usage.get("prompt_tokens") or 0
+            m["completion_tokens"] += usage.get("completion_tokens") or 0
+            llm_usage.record_call(
+                call_site, provider.name, model, (time.perf_counter() - call_started) * 1000,
+                prompt_tokens=usage.get("prompt_tokens"),
+                completion_tokens=usage.get("completion_tokens"),
+                attempts=attempt + 1,
+            )
+            return resp
+        finally:
+            _limiter.release(lane)
+
+        try:
+            wait = _retry_wait(call_site, m, error, attempt, deadline)
+        except Exception:
+            llm_usage.record_call(
+                call_site, provider.name, model, (time.perf_counter() - call_started) * 1000,
+                attempts=attempt + 1, error=error,
+            )
+            raise
+        await asyncio.sleep(wait)
+        attempt += 1
+
+
+def _chat_params(
+    provider: LLMProvider,
+    messages: List[Dict[str, Any]],
+    model: Optional[str],
+    temperature: Optional[float],
+    max_tokens: Optional[int],
+    extra: Dict[str, Any],
+) -> Dict[str, Any]:
+    params: Dict[str, Any] = {"model": provider.resolve_model(model), "messages": messages, **extra}
+    if temperature is not None:
+        params["temperature"] = temperature
+    if max_tokens is not None:
+        params["max_tokens"] = max_tokens
+    return params
+
+
+async def chat_completion(
+    call_site: str,
+    messages: List[Dict[str, Any]],
+    model: Optional[str] = None,
+    temperature: Optional[float] = None,
+    max_tokens: Optional[int] = None,
+    cache: bool = True,
+    priority: Optional[str] = None,
+    deadline_s: Optional[float] = None,
+    **kwargs: Any,
+) -> Dict[str, Any]:
+    """Equivalente a `openai.ChatCompletion.acreate` passando pelo gateway.
+
+    Args:
+        call_site: Nome estável do ponto de chamada (política de cache e métricas)
+        messages: Mensagens do chat
+        model: Modelo (padrão: OPENAI_MODEL; providers locais usam LLM_MODEL)
+        temperature: Temperatura; acima do limite da política não usa cache
+        max_tokens: Limite de tokens da resposta
+        cache: False força a ida à API (respostas que devem variar)
+        priority: Faixa ("interactive", "default", "batch"); padrão: a do contexto
+        deadline_s: Prazo total da chamada (padrão: LLM_DEADLINE_S)
+
+    Returns:
+        Resposta no formato da API (dict com "choices")
+    """
+    provider = get_provider()
+    params = _chat_params(provider, messages, model, temperature, max_tokens, kwargs)
+    use_cache = llm_cache.is_cacheable(call_site, temperature, opt_out=not cache)
+    key = llm_cache.cache_key(params["model"], messages, temperature, max_tokens) if use_cache else None
+    if key:
+        lookup_started = time.perf_counter()
+        cached = await asyncio.to_thread(llm_cache.get_cached, call_site, key)
+        if cached is not None:
+            llm_usage.record_call(
+                call_site, provider.name, params["model"], (time.perf_counter() - lookup_started) * 1000,
+                cache_hit=True,
+            )
+            return cached
+    else:
+        llm_cache.record_bypass(call_site)
+
+    resp = await _call(
+        call_site, lambda timeout: provider.chat(params, timeout), priority, deadline_s, provider, params["model"]
+    )
+    if key:
+        await asyncio.to_thread(llm_cache.store, call_site, key, params["model"], resp)
+    return resp
+
+
+async def stream_chat_completion(
+    call_site: str,
+    messages: List[Dict[str, Any]],
+    model: Optional[str] = None,
+    temperature: Optional[float] = None,
+    max_tokens: Optional[int] = None,
+    priority: Optional[str] = None,
+    deadline_s: Optional[float] = None,
+    **kwargs: Any,
+) -> AsyncIterator[str]:
+    """Como `chat_completion`, mas emite o texto conforme o modelo gera.
+
+    Retries só acontecem antes do primeiro trecho; a vaga na faixa fica
+    ocupada até o fim do stream. Sem cache.
+    """
+    provider = get_provider()
+    params = _chat_params(provider, messages, model, temperature, max_tokens, kwargs)
+    lane = priority or _current_lane.get()
+    m = _site_metrics(call_site)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + (deadline_s or settings.LLM_DEADLINE_S)
+    call_started = time.perf_counter()
+    attempt = 0
+    while True:
+        await asyncio.wait_for(_limiter.acquire(lane), timeout=max(deadline - loop.time(), 0.001))
+        started = time.perf_counter()
+        timeout = min(settings.LLM_REQUEST_TIMEOUT_S, deadline - loop.time())
+        stream = provider.stream_chat(params, max(timeout, 0.001))
+        try:
+            first = await asyncio.wait_for(stream.__anext__(), timeout=max(timeout, 0.001))
+            break
+        except StopAsyncIteration:
+            _limiter.release(lane)
+            return
+        except Exception as e:
+            _limiter.release(lane)
+            await stream.aclose()
+            try:
+                wait = _retry_wait(call_site, m, e, attempt, deadline)
+            except Exception:
+                llm_usage.record_call(
+                    call_site, provider.name, params["model"], (time.perf_counter() - call_started) * 1000,
+                    attempts=attempt + 1, error=e,
+                )
+                raise
+        except BaseException:
+            _limiter.release(lane)
+            await stream.aclose()
+            raise
+        await asyncio.sleep(wait)
+        attempt += 1
+
+    try:
+        yield first
+        async for delta in stream:
+            yield delta
+        m["calls"] += 1
+        m["latencies_ms"].append((time.perf_counter() - started) * 1000)
+        # A API não devolve contagem de tokens no stream
+        llm_usage.record_call(
+            call_site, provider.name, params["model"], (time.perf_counter() - call_started) * 1000,
+            attempts=attempt + 1,
+        )
+    finally:
+        _limiter.release(lane)
+        await stream.aclose()
+
+
+async def create_embedding(
+    call_site: str,
+    text: str,
+    model: Optional[str] = None,
+    priority: Optional[str] = None,
+) -> List[float]:
+    """Embedding de um texto passando pelo gateway (sem cache)."""
+    provider = get_provider()
+    embedding_model = provider.resolve_embedding_model(model)
+    resp = await _call(
+        call_site,
+        lambda timeout: provider.embedding(embedding_model, text, timeout),
+        priority,
+        None,
+        provider,
+        embedding_model,
+    )
+    return resp["data"][0]["embedding"]
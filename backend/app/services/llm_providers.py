@@ -0,0 +1,216 @@
+"""
+Backends de LLM usados pelo gateway (services/llm_client.py)
+
+- "openai": SDK oficial da OpenAI (OPENAI_API_BASE troca o endpoint, ex.:
+  pelo servidor falso de testes de carga);
+- "ollama", "openai_compatible" e "gemini": qualquer servidor que fale a API
+  de chat da OpenAI (Ollama, vLLM, llama.cpp server, endpoint compatível do
+  Gemini), via HTTP em LLM_BASE_URL. Um único httpx.AsyncClient por processo
+  mantém as conexões abertas entre chamadas, e as respostas podem vir em
+  streaming (SSE).
+
+Qualquer outro valor de LLM_PROVIDER (ex.: "mock") desliga o LLM: os
+serviços usam as análises heurísticas de fallback.
+"""
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+
+from ..config import settings
+
+
+# Endpoint padrão de cada provider compatível (sobrescrito por LLM_BASE_URL)
+DEFAULT_BASE_URLS = {
+    "ollama": "http://localhost:11434/v1",
+    "openai_compatible": "http://localhost:8000/v1",
+    "gemini": "https://generativelanguage.googleapis.com/v1beta/openai",
+}
+
+PROVIDERS = {"openai", *DEFAULT_BASE_URLS}
+
+
+class LLMHTTPError(Exception):
+    """Resposta de erro do endpoint compatível.
+
+    Tem os mesmos atributos `http_status` e `headers` dos erros do SDK da
+    OpenAI, para o gateway decidir retries e respeitar o Retry-After.
+    """
+
+    def __init__(self, message: str, http_status: int, headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.http_status = http_status
+        self.headers = headers or {}
+
+
+class LLMProvider:
+    """Interface comum dos backends."""
+
+    name = ""
+
+    def resolve_model(self, model: Optional[str]) -> str:
+        return model or settings.OPENAI_MODEL
+
+    def resolve_embedding_model(self, model: Optional[str]) -> str:
+        return model or settings.OPENAI_EMBEDDING_MODEL
+
+    async def chat(self, params: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def stream_chat(self, params: Dict[str, Any], timeout: float) -> AsyncIterator[str]:
+        raise NotImplementedError
+
+    async def embedding(self, model: str, text: str, timeout: float) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    async def aclose(self) -> None:
+        pass
+
+
+class OpenAISDKProvider(LLMProvider):
+    """API da OpenAI pelo SDK oficial."""
+
+    name = "openai"
+
+    def __init__(self):
+        try:
+            import openai  # type: ignore
+        except Exception:  # pragma: no cover
+            raise RuntimeError("openai package not installed")
+        if not openai.api_key:
+            openai.api_key = settings.OPENAI_API_KEY
+        if settings.OPENAI_API_BASE:
+            openai.api_base = settings.OPENAI_API_BASE
+        self._openai = openai
+
+    async def chat(self, params: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        return await self._openai.ChatCompletion.acreate(**params, request_timeout=timeout)
+
+    async def stream_chat(self, params: Dict[str, Any], timeout: float) -> AsyncIterator[str]:
+        chunks = await self._openai.ChatCompletion.acreate(**params, stream=True, request_timeout=timeout)
+        async for chunk in chunks:
+            delta = chunk["choices"][0].get("delta", {}).get("content")
+            if delta:
+                yield delta
+
+    async def embedding(self, model: str, text: str, timeout: float) -> Dict[str, Any]:
+        return await self._openai.Embedding.acreate(model=model, input=text, request_timeout=timeout)
+
+
+class OpenAICompatibleProvider(LLMProvider):
+    """Servidor compatível com a API da OpenAI, via HTTP com conexões reutilizadas."""
+
+    def __init__(self, name: str, base_url: str, api_key: str = ""):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def resolve_model(self, model: Optional[str]) -> str:
+        # Um servidor local costuma servir um único modelo: LLM_MODEL vale para todos os call sites
+        return settings.LLM_MODEL or model or settings.OPENAI_MODEL
+
+    def resolve_embedding_model(self, model: Optional[str]) -> str:
+        return settings.LLM_EMBEDDING_MODEL or model or settings.OPENAI_EMBEDDING_MODEL
+
+    def _http(self) -> httpx.AsyncClient:
+        # O cliente pertence ao event loop em que foi criado
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._client_loop is not loop:
+            headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=headers,
+                limits=httpx.Limits(
+                    max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+                ),
+            )
+            self._client_loop = loop
+        return self._client
+
+    @staticmethod
+    def _raise_for_status(response: httpx.Response, body: bytes) -> None:
+        if response.status_code < 400:
+            return
+        try:
+            detail = json.loads(body).get("error", {})
+            message = detail.get("message") if isinstance(detail, dict) else str(detail)
+        except (ValueError, AttributeError):
+            message = body[:300].decode("utf-8", errors="replace")
+        raise LLMHTTPError(f"HTTP {response.status_code}: {message}", response.status_code, dict(response.headers))
+
+    async def _post(self, path: str, payload: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        response = await self._http().post(path, json=payload, timeout=timeout)
+        self._raise_for_status(response, response.content)
+        return response.json()
+
+    async def chat(self, params: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        return await self._post("/chat/completions", params, timeout)
+
+    async def stream_chat(self, params: Dict[str, Any], timeout: float) -> AsyncIterator[str]:
+        payload = {**params, "stream": True}
+        async with self._http().stream("POST", "/chat/completions", json=payload, timeout=timeout) as response:
+            if response.status_code >= 400:
+                self._raise_for_status(response, await response.aread())
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                choices = json.loads(data).get("choices") or [{}]
+                delta = (choices[0].get("delta") or {}).get("content")
+                if delta:
+                    yield delta
+
+    async def embedding(self, model: str, text: str, timeout: float) -> Dict[str, Any]:
+        return await self._post("/embeddings", {"model": model, "input": text}, timeout)
+
+    async def aclose(self) -> None:
+        if self._client is not None and not self._client.is_closed:
+            try:
+                await self._client.aclose()
+            except RuntimeError:  # loop do cliente já foi encerrado
+                pass
+        self._client = None
+
+
+_provider: Optional[LLMProvider] = None
+
+
+def provider_name() -> str:
+    return settings.LLM_PROVIDER.lower()
+
+
+def llm_enabled() -> bool:
+    """True se LLM_PROVIDER aponta para um backend real (senão: fallback heurístico)."""
+    return provider_name() in PROVIDERS
+
+
+def get_provider() -> LLMProvider:
+    """Backend configurado em LLM_PROVIDER (instância única por processo)."""
+    global _provider
+    name = provider_name()
+    if _provider is None or _provider.name != name:
+        if name == "openai":
+            _provider = OpenAISDKProvider()
+        elif name in DEFAULT_BASE_URLS:
+            _provider = OpenAICompatibleProvider(
+                name,
+                settings.LLM_BASE_URL or DEFAULT_BASE_URLS[name],
+                settings.LLM_API_KEY,
+            )
+        else:
+            raise RuntimeError(f"LLM_PROVIDER '{settings.LLM_PROVIDER}' não tem backend de LLM")
+    return _provider
+
+
+async def close_provider() -> None:
+    """Fecha as conexões HTTP abertas (chamado no shutdown da aplicação)."""
+    global _provider
+    if _provider is not None:
+        await _provider.aclose()
+        _provider = None
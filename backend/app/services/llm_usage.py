@@ -0,0 +1,207 @@
+"""
+Contabilidade de tokens e latência de cada chamada ao LLM
+
+O gateway (services/llm_client.py) registra toda chamada: call site, modelo,
+tokens de entrada/saída, latência, acerto de cache, tentativas e erro, com o
+endpoint e o usuário que a originaram (app/middleware.py). Os registros são
+acumulados em memória e gravados em lote na tabela llm_call_records (somente
+inserção) a cada LLM_USAGE_FLUSH_INTERVAL_S ou LLM_USAGE_FLUSH_EVERY
+registros; `rollup` agrega por endpoint, usuário, call site, modelo ou dia.
+
+Na API, `record_call` só enfileira e acorda o flusher, que grava (e expurga
+registros antigos) em thread, fora do event loop; o flush síncrono fica
+para o encerramento e para scripts sem flusher.
+"""
+import asyncio
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..config import settings
+from ..database import SessionLocal
+from ..middleware import current_endpoint, current_user_id
+
+
+GROUP_COLUMNS = {
+    "endpoint": models.LLMCallRecord.endpoint,
+    "user": models.LLMCallRecord.user_id,
+    "call_site": models.LLMCallRecord.call_site,
+    "model": models.LLMCallRecord.model,
+}
+
+_buffer: List[Dict[str, Any]] = []
+_flusher: Optional[asyncio.Task] = None
+_flush_requested: Optional[asyncio.Event] = None
+
+
+def record_call(
+    call_site: str,
+    provider: str,
+    model: str,
+    latency_ms: float,
+    prompt_tokens: int = 0,
+    completion_tokens: int = 0,
+    cache_hit: bool = False,
+    attempts: int = 1,
+    error: Optional[BaseException] = None,
+) -> None:
+    """Enfileira o registro de uma chamada (gravado no próximo flush)."""
+    if not settings.LLM_USAGE_ENABLED:
+        return
+    _buffer.append({
+        "created_at": datetime.utcnow(),
+        "call_site": call_site,
+        "endpoint": (current_endpoint() or "")[:200] or None,
+        "user_id": current_user_id(),
+        "provider": provider,
+        "model": model,
+        "prompt_tokens": prompt_tokens or 0,
+        "completion_tokens": completion_tokens or 0,
+        "latency_ms": int(latency_ms),
+        "cache_hit": cache_hit,
+        "attempts": attempts,
+        "error": f"{type(error).__name__}: {error}"[:300] if error is not None else None,
+    })
+    if len(_buffer) >= settings.LLM_USAGE_FLUSH_EVERY:
+        if _flush_requested is not None:
+            # Nunca grava no caminho da chamada: o flusher faz em thread
+            _flush_requested.set()
+        else:
+            flush()
+
+
+def flush() -> int:
+    """Grava os registros pendentes; retorna quantos foram gravados."""
+    if not _buffer:
+        return 0
+    pending = _buffer[:]
+    del _buffer[:len(pending)]
+    db = SessionLocal()
+    try:
+        db.bulk_insert_mappings(models.LLMCallRecord, pending)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️ Falha ao gravar {len(pending)} registros de uso do LLM: {e}")
+        return 0
+    finally:
+        db.close()
+    return len(pending)
+
+
+def purge_old(db: Session) -> int:
+    """Remove registros além de LLM_USAGE_RETENTION_DAYS."""
+    cutoff = datetime.utcnow() - timedelta(days=settings.LLM_USAGE_RETENTION_DAYS)
+    removed = db.query(models.LLMCallRecord).filter(
+        models.LLMCallRecord.created_at < cutoff
+    ).delete(synchronize_session=False)
+    db.commit()
+    return removed
+
+
+def _purge() -> int:
+    db = SessionLocal()
+    try:
+        return purge_old(db)
+    finally:
+        db.close()
+
+
+async def _flush_loop() -> None:
+    last_purge = datetime.min
+    while True:
+        # Acorda a cada intervalo ou quando o buffer enche
+        try:
+            await asyncio.wait_for(_flush_requested.wait(), timeout=settings.LLM_USAGE_FLUSH_INTERVAL_S)
+        except asyncio.TimeoutError:
+            pass
+        _flush_requested.clear()
+        try:
+            await asyncio.to_thread(flush)
+            if datetime.utcnow() - last_purge > timedelta(hours=1):
+                await asyncio.to_thread(_purge)
+                last_purge = datetime.utcnow()
+        except Exception as e:  # nunca derruba o flusher
+            print(f"⚠️ Erro no flush de uso do LLM: {e}")
+
+
+def start_flusher() -> None:
+    global _flusher, _flush_requested
+    if _flusher is None:
+        _flush_requested = asyncio.Event()
+        _flusher = asyncio.create_task(_flush_loop())
+
+
+async def stop_flusher() -> None:
+    global _flusher, _flush_requested
+    if _flusher is not None:
+        _flusher.cancel()
+        try:
+            await _flusher
+        except asyncio.CancelledError:
+            pass
+        _flusher = None
+        _flush_requested = None
+    flush()
+
+
+def _percentile(ordered: List[int], pct: float) -> Optional[int]:
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def rollup(db: Session, group_by: str = "endpoint", days: int = 7) -> List[Dict[str, Any]]:
+    """Agrega os registros dos últimos `days` dias.
+
+    Args:
+        group_by: "endpoint", "user", "call_site", "model" ou "day"
+
+    Returns:
+        Uma linha por grupo (mais tokens primeiro) com chamadas, erros,
+        acertos de cache, tokens, tokens/dia e latência p50/p95 das chamadas
+        que foram à API.
+    """
+    if group_by != "day" and group_by not in GROUP_COLUMNS:
+        raise ValueError(f"group_by inválido: {group_by}")
+    flush()
+    since = datetime.utcnow() - timedelta(days=days)
+    R = models.LLMCallRecord
+    key_column = R.created_at if group_by == "day" else GROUP_COLUMNS[group_by]
+    rows = db.query(
+        key_column, R.prompt_tokens, R.completion_tokens, R.latency_ms, R.cache_hit, R.error
+    ).filter(R.created_at >= since).yield_per(5000)
+
+    groups: Dict[Any, Dict[str, Any]] = defaultdict(lambda: {
+        "calls": 0, "errors": 0, "cache_hits": 0, "prompt_tokens": 0, "completion_tokens": 0, "latencies": [],
+    })
+    for key, prompt_tokens, completion_tokens, latency_ms, cache_hit, error in rows:
+        if group_by == "day":
+            key = key.date().isoformat()
+        g = groups[key]
+        g["calls"] += 1
+        g["prompt_tokens"] += prompt_tokens
+        g["completion_tokens"] += completion_tokens
+        if error:
+            g["errors"] += 1
+        if cache_hit:
+            g["cache_hits"] += 1
+        elif not error:
+            g["latencies"].append(latency_ms)
+
+    result = []
+    for key, g in groups.items():
+        latencies = sorted(g.pop("latencies"))
+        total_tokens = g["prompt_tokens"] + g["completion_tokens"]
+        result.append({
+            group_by: key,
+            **g,
+            "total_tokens": total_tokens,
+            "tokens_per_day": round(total_tokens / (1 if group_by == "day" else days), 1),
+            "latency_ms": {"p50": _percentile(latencies, 0.5), "p95": _percentile(latencies, 0.95)},
+        })
+    result.sort(key=lambda row: row["total_tokens"], reverse=True)
+    return result
@@ -0,0 +1,121 @@
+"""
+Map-reduce para páginas longas
+
+Os prompts de análise enxergam 8.000 caracteres do texto (4.000 no
+sentiment), escolhidos por pré-sumarização extrativa (services/extractive.py),
+e o fetch guarda até 200.000. A seleção de frases dá conta de textos de até
+algumas vezes a janela; acima de LONG_DOC_THRESHOLD_CHARS o texto é dividido
+em pedaços, cada pedaço é condensado em paralelo por um modelo mais barato
+(LONG_DOC_CHUNK_MODEL, com concorrência limitada) e os estágios de análise
+recebem a junção dos resumos, que cabe na mesma janela de 8.000 caracteres.
+
+O número de pedaços é limitado por LONG_DOC_MAX_CHUNKS: documentos maiores
+usam pedaços maiores (até LONG_DOC_MAX_CHUNK_CHARS), então custo e
+latência dependem da quantidade de pedaços, não do tamanho da página.
+"""
+import asyncio
+import math
+from typing import List
+
+from ..config import settings
+from .extractive import extractive_summary
+from .llm_client import chat_completion
+from .llm_providers import llm_enabled
+
+
+# Janela de texto dos prompts de análise (summarize_main usa 8.000 caracteres)
+DIGEST_CHARS = 8000
+
+CHUNK_PROMPT = """Você está lendo a parte {index} de {total} do site de uma empresa.
+Extraia os fatos relevantes para uma equipe de vendas B2B: o que a empresa faz, produtos e serviços, preços e planos, clientes e setores atendidos, tecnologias e integrações, números (clientes, funcionários, receita, crescimento), contatos e sinais de orçamento ou expansão.
+
+Responda em tópicos curtos, no idioma do texto, com no máximo {max_chars} caracteres. Não invente nada; se o trecho não tiver fatos relevantes, responda apenas "-".
+
+TRECHO:
+{chunk}"""
+
+
+def split_chunks(text: str, chunk_chars: int) -> List[str]:
+    """Divide o texto em pedaços de até `chunk_chars`, preferindo quebras de
+    bloco (linhas) e, dentro de blocos longos, fim de frase ou espaço."""
+    chunks: List[str] = []
+    current = ""
+    for block in text.split("\n"):
+        block = block.strip()
+        if not block:
+            continue
+        while len(block) > chunk_chars:
+            cut = max(block.rfind(". ", 0, chunk_chars), block.rfind(" ", 0, chunk_chars))
+            cut = cut + 1 if cut > chunk_chars // 2 else chunk_chars
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(block[:cut].strip())
+            block = block[cut:].strip()
+        if current and len(current) + 1 + len(block) > chunk_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n{block}" if current else block
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def plan_chunks(text: str) -> List[str]:
+    """Pedaços para o map: no máximo LONG_DOC_MAX_CHUNKS, aumentando o tamanho
+    de cada um quando o texto é longo (o excedente final é descartado)."""
+    chunk_chars = max(
+        settings.LONG_DOC_CHUNK_CHARS,
+        min(settings.LONG_DOC_MAX_CHUNK_CHARS, math.ceil(len(text) / settings.LONG_DOC_MAX_CHUNKS)),
+    )
+    chunks = split_chunks(text, chunk_chars)
+    if len(chunks) > settings.LONG_DOC_MAX_CHUNKS:
+        print(f"✂️ Texto longo: usando {settings.LONG_DOC_MAX_CHUNKS} de {len(chunks)} pedaços")
+    return chunks[:settings.LONG_DOC_MAX_CHUNKS]
+
+
+async def _summarize_chunk(chunk: str, index: int, total: int, max_chars: int, semaphore: asyncio.Semaphore) -> str:
+    async with semaphore:
+        try:
+            resp = await chat_completion(
+                "analysis.chunk",
+                model=settings.LONG_DOC_CHUNK_MODEL or settings.OPENAI_MODEL,
+                messages=[{
+                    "role": "user",
+                    "content": CHUNK_PROMPT.format(index=index, total=total, max_chars=max_chars, chunk=chunk),
+                }],
+                temperature=0.1,
+                max_tokens=max(64, max_chars // 3),
+            )
+            summary = resp["choices"][0]["message"]["content"].strip()
+        except Exception as e:
+            # Sem o resumo do LLM, as frases centrais do próprio pedaço
+            print(f"⚠️ Falha ao resumir pedaço {index}/{total}: {e}")
+            summary = extractive_summary(chunk, max_chars)
+    return summary[:max_chars]
+
+
+async def condense_text(raw_text: str) -> str:
+    """Texto que os estágios de análise devem receber.
+
+    Textos até LONG_DOC_THRESHOLD_CHARS (ou sem LLM configurado) passam
+    inalterados; os maiores viram a junção dos resumos de cada pedaço, com
+    no máximo DIGEST_CHARS caracteres.
+    """
+    if len(raw_text) <= settings.LONG_DOC_THRESHOLD_CHARS or not llm_enabled():
+        return raw_text
+
+    chunks = plan_chunks(raw_text)
+    total = len(chunks)
+    header = "[Parte {}/{}]\n"
+    # Cada resumo recebe uma fatia igual da janela final
+    max_chars = DIGEST_CHARS // total - len(header.format(total, total)) - 2
+    semaphore = asyncio.Semaphore(settings.LONG_DOC_CONCURRENCY)
+    summaries = await asyncio.gather(*(
+        _summarize_chunk(chunk, i, total, max_chars, semaphore) for i, chunk in enumerate(chunks, 1)
+    ))
+    digest = "\n\n".join(
+        header.format(i, total) + summary for i, summary in enumerate(summaries, 1) if summary.strip() != "-"
+    )
+    print(f"🧩 Map-reduce: {len(raw_text)} caracteres em {total} pedaços → resumo de {len(digest)} caracteres")
+    return digest
@@ -4,6 +4,7 @@ Serviço de análise de mercado e tendências
 from typing import Dict, List, Any
 import json
 from ..config import settings
+from .llm_client import chat_completion
 
 
 async def analyze_market_trends(company_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -11,8 +12,6 @@ async def analyze_market_trends(company_data: Dict[str, Any]) -> Dict[str, Any]:
     Analisa tendências de mercado baseadas nos dados da empresa
     """
     try:
-        import openai  # type: ignore
-        
         market_prompt = f"""
         Com base nos dados da empresa, analise tendências de mercado e oportunidades:
         
@@ -48,7 +47,8 @@ async def analyze_market_trends(company_data: Dict[str, Any]) -> Dict[str, Any]:
         }}
         """
         
-        resp = await openai.ChatCompletion.acreate(
+        resp = await chat_completion(
+            "market.trends",
             model=settings.OPENAI_MODEL,
             messages=[{"role": "user", "content": market_prompt}],
             temperature=0.2,
@@ -78,8 +78,6 @@ async def generate_sales_strategy(company_data: Dict[str, Any]) -> Dict[str, Any
     Gera estratégia de vendas personalizada para a empresa
     """
     try:
-        import openai  # type: ignore
-        
         strategy_prompt = f"""
         Com base nos dados da empresa, crie uma estratégia de vendas personalizada:
         
@@ -115,7 +113,8 @@ async def generate_sales_strategy(company_data: Dict[str, Any]) -> Dict[str, Any
         }}
         """
         
-        resp = await openai.ChatCompletion.acreate(
+        resp = await chat_completion(
+            "market.strategy",
             model=settings.OPENAI_MODEL,
             messages=[{"role": "user", "content": strategy_prompt}],
             temperature=0.3,
@@ -8,7 +8,8 @@ import asyncio
 from typing import Dict, Any, Optional, List
 from bs4 import BeautifulSoup
 from ..config import settings
-import openai
+from .parse_pool import run_parse
+from .llm_client import chat_completion
 
 class MultiSourceEnrichment:
     """
@@ -113,12 +114,10 @@ class MultiSourceEnrichment:
             async with httpx.AsyncClient(timeout=self.timeout, follow_redirects=True) as client:
                 resp = await client.get(url, headers=self.headers)
                 if resp.status_code == 200:
-                    soup = BeautifulSoup(resp.text, 'html.parser')
-                    
                     # Busca informações básicas na página
                     return {
                         "name": company_name,
-                        "description": self._extract_meta_description(soup),
+                        "description": await run_parse(_parse_meta_description, resp.content, resp.encoding),
                         "url": url,
                         "source": "crunchbase_scraping"
                     }
@@ -201,13 +200,11 @@ class MultiSourceEnrichment:
                 resp = await client.get(url, headers=self.headers)
                 
                 if resp.status_code == 200:
-                    soup = BeautifulSoup(resp.text, 'html.parser')
-                    
                     # Extrai informações básicas
                     return {
                         "company_name": company_name,
                         "url": url,
-                        "description": self._extract_meta_description(soup),
+                        "description": await run_parse(_parse_meta_description, resp.content, resp.encoding),
                         "source": "linkedin_basic"
                     }
                     
@@ -261,17 +258,7 @@ class MultiSourceEnrichment:
                 resp = await client.get(url, headers=self.headers)
                 
                 if resp.status_code == 200:
-                    soup = BeautifulSoup(resp.text, 'html.parser')
-                    articles = soup.find_all('article', limit=5)
-                    
-                    news_list = []
-                    for article in articles:
-                        title_elem = article.find('h3') or article.find('h4')
-                        if title_elem:
-                            news_list.append({
-                                "title": title_elem.get_text(strip=True),
-                                "source": "google_news"
-                            })
+                    news_list = await run_parse(_parse_news_titles, resp.content, resp.encoding)
                     
                     if news_list:
                         return {
@@ -297,10 +284,8 @@ class MultiSourceEnrichment:
                 resp = await client.get(url, headers=self.headers)
                 
                 if resp.status_code == 200:
-                    soup = BeautifulSoup(resp.text, 'html.parser')
-                    
                     # Tenta extrair rating (estrutura do G2 muda frequentemente)
-                    rating = self._extract_rating(soup)
+                    rating = await run_parse(_parse_rating, resp.content, resp.encoding)
                     
                     return {
                         "platform": "G2",
@@ -365,7 +350,8 @@ INSTRUÇÕES:
 """
         
         try:
-            resp = await openai.ChatCompletion.acreate(
+            resp = await chat_completion(
+                "enrichment.synthesis",
                 model=settings.OPENAI_MODEL,
                 messages=[
                     {"role": "system", "content": "Você é um analista de mercado especializado em criar perfis executivos de empresas para equipes de vendas B2B."},
@@ -400,34 +386,57 @@ INSTRUÇÕES:
         }
     
     # Métodos auxiliares
-    def _extract_meta_description(self, soup) -> str:
-        """Extrai meta description de uma página"""
-        meta = soup.find('meta', attrs={'name': 'description'}) or soup.find('meta', attrs={'property': 'og:description'})
-        return meta.get('content', 'Descrição não disponível') if meta else 'Descrição não disponível'
-    
-    def _extract_rating(self, soup) -> Optional[str]:
-        """Extrai rating de review sites"""
-        # Tenta vários seletores comuns
-        rating_selectors = [
-            {'class': 'stars'},
-            {'class': 'rating'},
-            {'itemprop': 'ratingValue'},
-            {'data-rating': True}
-        ]
-        
-        for selector in rating_selectors:
-            elem = soup.find('div', selector) or soup.find('span', selector)
-            if elem:
-                return elem.get_text(strip=True) or elem.get('data-rating')
-        
-        return None
-    
     def _get_timestamp(self) -> str:
         """Retorna timestamp atual"""
         from datetime import datetime
         return datetime.utcnow().isoformat()
 
 
+# Funções de parsing (módulo-level para rodarem no pool de processos)
+def _soup(content: bytes, encoding: Optional[str]) -> BeautifulSoup:
+    return BeautifulSoup(content.decode(encoding or "utf-8", errors="replace"), 'html.parser')
+
+
+def _parse_meta_description(content: bytes, encoding: Optional[str]) -> str:
+    """Extrai meta description de uma página"""
+    soup = _soup(content, encoding)
+    meta = soup.find('meta', attrs={'name': 'description'}) or soup.find('meta', attrs={'property': 'og:description'})
+    return meta.get('content', 'Descrição não disponível') if meta else 'Descrição não disponível'
+
+
+def _parse_rating(content: bytes, encoding: Optional[str]) -> Optional[str]:
+    """Extrai rating de review sites"""
+    soup = _soup(content, encoding)
+    # Tenta vários seletores comuns
+    rating_selectors = [
+        {'class': 'stars'},
+        {'class': 'rating'},
+        {'itemprop': 'ratingValue'},
+        {'data-rating': True}
+    ]
+    
+    for selector in rating_selectors:
+        elem = soup.find('div', selector) or soup.find('span', selector)
+        if elem:
+            return elem.get_text(strip=True) or elem.get('data-rating')
+    
+    return None
+
+
+def _parse_news_titles(content: bytes, encoding: Optional[str]) -> List[Dict[str, str]]:
+    """Extrai títulos de notícias do Google News"""
+    soup = _soup(content, encoding)
+    news_list = []
+    for article in soup.find_all('article', limit=5):
+        title_elem = article.find('h3') or article.find('h4')
+        if title_elem:
+            news_list.append({
+                "title": title_elem.get_text(strip=True),
+                "source": "google_news"
+            })
+    return news_list
+
+
 # Instância global
 enrichment_service = MultiSourceEnrichment()
 
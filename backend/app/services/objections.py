@@ -6,6 +6,8 @@ Gera objeções realistas e sugestões de respostas para treinamento de vendas
 from typing import List, Dict, Any, Optional
 import json
 from ..config import settings
+from .llm_client import chat_completion
+from .llm_providers import llm_enabled
 
 
 async def generate_objections(analysis: Any, difficulty: str = "medium") -> Dict[str, Any]:
@@ -19,13 +21,8 @@ async def generate_objections(analysis: Any, difficulty: str = "medium") -> Dict
     Returns:
         Dict com objeções geradas e contexto
     """
-    provider = settings.LLM_PROVIDER.lower()
-    
-    if provider == "openai":
+    if llm_enabled():
         try:
-            import openai
-            openai.api_key = settings.OPENAI_API_KEY
-            
             # Monta contexto da empresa
             context = _build_company_context(analysis)
             
@@ -72,7 +69,9 @@ IMPORTANTE:
 - Respostas devem ser consultivas, não agressivas
 - Use dados e evidências quando possível"""
 
-            response = await openai.ChatCompletion.acreate(
+            response = await chat_completion(
+                "objections.generate",
+                cache=False,  # objeções de treino devem variar
                 model=settings.OPENAI_MODEL,
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -166,7 +165,7 @@ def _generate_mock_objections(analysis: Any, difficulty: str) -> Dict[str, Any]:
     company_name = "a empresa"
     if analysis.entities:
         try:
-            entities = json.loads(analysis.entities) if isinstance(analysis.entities, str) else analysis.entities
+            entities = analysis.entities
             company_name = entities.get('company_name', 'a empresa')
         except:
             pass
@@ -357,13 +356,8 @@ async def evaluate_response(
     Returns:
         Dict com avaliação e feedback
     """
-    provider = settings.LLM_PROVIDER.lower()
-    
-    if provider == "openai":
+    if llm_enabled():
         try:
-            import openai
-            openai.api_key = settings.OPENAI_API_KEY
-            
             system_prompt = """Você é um mentor de vendas experiente avaliando respostas de vendedores em treinamento."""
             
             user_prompt = f"""Avalie a resposta do vendedor à objeção abaixo:
@@ -398,7 +392,8 @@ CRITÉRIOS:
 - Tom consultivo vs vendedor (15%)
 - Personalização ao contexto (15%)"""
 
-            response = await openai.ChatCompletion.acreate(
+            response = await chat_completion(
+                "objections.evaluate",
                 model=settings.OPENAI_MODEL,
                 messages=[
                     {"role": "system", "content": system_prompt},
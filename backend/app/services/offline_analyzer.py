@@ -0,0 +1,235 @@
+"""
+Analisador offline (sem LLM)
+
+Quando não há provider de LLM configurado, `summarize_main` monta a análise
+com heurísticas de palavras-chave. Todas as famílias de palavras-chave (ICP,
+produtos, stack, empresa, oportunidades) viram um único autômato: uma regex
+em forma de trie, compilada uma vez, que encontra em um só passe sobre o
+texto em minúsculas todas as palavras-chave presentes (inclusive dentro de
+outras palavras, como o `in` das heurísticas originais). Cada seção lê os
+sinais desse passe, preço e contatos usam regex pré-compiladas com parada
+no primeiro resultado, e os sinais são memoizados por documento.
+"""
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Iterable, List, Sequence, Tuple
+
+
+Rules = Sequence[Tuple[str, Tuple[str, ...]]]
+
+# (rótulo, palavras-chave): o rótulo entra no resultado se alguma aparecer no texto
+ICP_RULES: Rules = [
+    ("Empresas B2B", ("b2b", "business", "empresa", "corporação")),
+    ("Startups e PMEs", ("startup", "pequena", "média")),
+    ("Grandes corporações", ("grande", "enterprise", "corporativo")),
+    ("Empresas de tecnologia", ("tech", "tecnologia", "software")),
+]
+
+PRODUCT_RULES: Rules = [
+    ("Software", ("software",)),
+    ("Aplicativo", ("app", "aplicativo")),
+    ("API", ("api",)),
+    ("Soluções de IA", ("ia", "ai")),
+    ("Automação", ("automação", "automation")),
+]
+
+TECHNOLOGIES = (
+    "python", "javascript", "react", "node", "vue", "angular",
+    "aws", "azure", "gcp", "docker", "kubernetes",
+    "mysql", "postgresql", "mongodb", "redis",
+    "tensorflow", "pytorch", "openai", "gpt",
+)
+
+COMPANY_RULES: Rules = [
+    ("Empresa estabelecida", ("fundada", "criada", "estabelecida")),
+    ("Empresa inovadora", ("startup", "inovação", "disruptiva")),
+    ("Presença global", ("global", "internacional", "mundial")),
+    ("Presença nacional", ("local", "brasil", "nacional")),
+]
+
+OPPORTUNITY_RULES: Rules = [
+    ("Oportunidade de crescimento", ("crescimento", "expansão", "escalar", "crescer", "expandir")),
+    ("Necessidade de automação", ("automação", "otimização", "eficiência", "automatizar", "otimizar")),
+    ("Transformação digital", ("digital", "transformação", "modernização", "digitalizar")),
+    ("Adoção de IA", ("ia", "ai", "inteligência artificial", "machine learning", "ml")),
+    ("Empresa inovadora", ("inovação", "inovador", "disruptivo", "tecnologia")),
+    ("Possíveis pain points identificados", ("desafio", "problema", "dificuldade", "limitação")),
+    ("Análise de mercado necessária", ("mercado", "competição", "concorrência", "diferencial")),
+]
+
+# Sem nenhuma oportunidade: só a primeira que bater (ou a padrão)
+OPPORTUNITY_FALLBACK_RULES: Rules = [
+    ("Empresa em crescimento - oportunidades de parceria", ("startup", "pequena", "média empresa")),
+    ("Empresa estabelecida - foco em ROI e eficiência", ("grande", "corporação", "enterprise")),
+    ("Empresa de tecnologia - foco em inovação", ("tech", "tecnologia", "software")),
+]
+DEFAULT_OPPORTUNITY = "Análise de necessidades específicas recomendada"
+
+PRICE_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (r'\$\d+', r'€\d+', r'R\$\s*\d+', r'\d+\s*reais', r'preço.*?\d+', r'price.*?\d+')
+]
+EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+# Só a existência de telefone interessa: o padrão completo
+# r'(\+?55\s?)?(\(?\d{2}\)?\s?)?\d{4,5}-?\d{4}' casa exatamente quando o seu
+# final obrigatório casa, e sem os grupos opcionais o `re` não testa DDI/DDD
+# em cada posição do texto
+PHONE_PATTERN = re.compile(r'\d{4,5}-?\d{4}')
+
+
+def _all_keywords() -> FrozenSet[str]:
+    keywords = set(TECHNOLOGIES)
+    for rules in (ICP_RULES, PRODUCT_RULES, COMPANY_RULES, OPPORTUNITY_RULES, OPPORTUNITY_FALLBACK_RULES):
+        for _, words in rules:
+            keywords.update(words)
+    return frozenset(keywords)
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Regex equivalente à alternância das palavras, fatorada por prefixo
+    comum: em cada posição o `re` percorre um único caminho da trie."""
+    trie: Dict[str, Any] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, Any]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Fim de palavra no meio do caminho: o restante é opcional (guloso, pega a mais longa)
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+KEYWORDS = _all_keywords()
+# Lookahead: casa em todas as posições, inclusive sobrepostas ("ia" dentro de "tecnologia")
+_KEYWORD_AUTOMATON = re.compile(f"(?=({_trie_pattern(KEYWORDS)}))")
+# Em cada posição só a palavra mais longa é reportada; as contidas nela também estão no texto
+_CONTAINED = {word: frozenset(other for other in KEYWORDS if other in word) for word in KEYWORDS}
+
+
+def find_keywords(text_lower: str) -> FrozenSet[str]:
+    """Palavras-chave presentes no texto (já em minúsculas), em um passe."""
+    found = set()
+    for word in set(_KEYWORD_AUTOMATON.findall(text_lower)):
+        found |= _CONTAINED[word]
+    return frozenset(found)
+
+
+@dataclass(frozen=True)
+class OfflineSignals:
+    """Tudo o que as seções da análise offline precisam, de um passe só."""
+    title: str
+    company_name: str
+    smart_summary: str
+    icp: Tuple[str, ...]
+    products: Tuple[str, ...]
+    tech_stack: Tuple[str, ...]
+    pricing: str
+    contacts: Tuple[str, ...]
+    company_info: Tuple[str, ...]
+    opportunities: Tuple[str, ...]
+
+
+def _matching(rules: Rules, keywords: FrozenSet[str]) -> Tuple[str, ...]:
+    return tuple(label for label, words in rules if not keywords.isdisjoint(words))
+
+
+def _smart_summary(text: str, title: str) -> str:
+    """Resumo com as 2 primeiras frases significativas."""
+    sentences = [s.strip() for s in text.split('.') if len(s.strip()) > 20]
+
+    if len(sentences) >= 2:
+        summary = f"{title}. {sentences[0]}. {sentences[1]}."
+    elif len(sentences) == 1:
+        summary = f"{title}. {sentences[0]}."
+    else:
+        summary = f"{title}. {text[:200]}..."
+
+    return summary[:400] + ("..." if len(summary) > 400 else "")
+
+
+def _pricing(text: str) -> str:
+    """Primeiro preço do padrão mais específico que aparecer."""
+    for pattern in PRICE_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            return match.group()
+    return "Preços não especificados"
+
+
+def _contacts(text: str) -> Tuple[str, ...]:
+    contacts: List[str] = EMAIL_PATTERN.findall(text) if "@" in text else []
+    if PHONE_PATTERN.search(text):
+        contacts.append("Telefone encontrado")
+    return tuple(contacts)
+
+
+@lru_cache(maxsize=64)
+def offline_signals(raw_text: str) -> OfflineSignals:
+    """Sinais do documento (memoizados: reanálises do mesmo texto não varrem de novo)."""
+    first_line = next((line.strip() for line in raw_text.split('\n') if line.strip()), "")
+    title = first_line or "Título não encontrado"
+    keywords = find_keywords(raw_text.lower())
+
+    opportunities = _matching(OPPORTUNITY_RULES, keywords)
+    if not opportunities:
+        opportunities = _matching(OPPORTUNITY_FALLBACK_RULES, keywords)[:1] or (DEFAULT_OPPORTUNITY,)
+
+    return OfflineSignals(
+        title=title,
+        company_name=first_line[:50] or "Nome da empresa não identificado",
+        smart_summary=_smart_summary(raw_text, title),
+        icp=_matching(ICP_RULES, keywords),
+        products=_matching(PRODUCT_RULES, keywords),
+        tech_stack=tuple(tech.title() for tech in TECHNOLOGIES if tech in keywords),
+        pricing=_pricing(raw_text),
+        contacts=_contacts(raw_text),
+        company_info=_matching(COMPANY_RULES, keywords),
+        opportunities=opportunities,
+    )
+
+
+def _joined(values: Tuple[str, ...]) -> str:
+    return ", ".join(values) if values else "Não especificado"
+
+
+def analyze_offline(raw_text: str) -> Dict[str, Any]:
+    """Análise heurística no mesmo formato de `_parse_output` (summary,
+    key_points, entities). Devolve um dict novo a cada chamada."""
+    s = offline_signals(raw_text)
+    sections = [
+        ("🎯 ICP (Ideal Customer Profile)", _joined(s.icp)),
+        ("🛍️ PRODUTOS/SERVIÇOS", _joined(s.products)),
+        ("💰 PRICING", s.pricing),
+        ("🔧 STACK TECNOLÓGICO", _joined(s.tech_stack)),
+        ("📞 CONTATOS", _joined(s.contacts)),
+        ("🏢 SOBRE A EMPRESA", _joined(s.company_info)),
+        ("🎯 OPORTUNIDADES DE VENDAS", ", ".join(s.opportunities)),
+    ]
+
+    summary = f"## RESUMO EXECUTIVO\n{s.smart_summary}\n\n## INFORMAÇÕES PRINCIPAIS"
+    for section_title, content in sections:
+        summary += f"\n\n### {section_title}\n{content}"
+
+    key_points = [
+        f"{section_title}: {content}"
+        for section_title, content in sections
+        if content and content != "Não especificado" and len(content.strip()) > 3
+    ]
+
+    entities = {
+        "company_name": s.company_name,
+        "products": list(s.products) or ["Produtos não especificados"],
+        "pricing": s.pricing,
+        "tech_stack": list(s.tech_stack) or ["Stack não especificado"],
+        "contacts": list(s.contacts) or ["Contatos não fornecidos"],
+    }
+
+    return {"summary": summary, "key_points": key_points, "entities": entities}
@@ -0,0 +1,81 @@
+"""
+Store de snapshots de páginas para refresh barato de análises
+
+Guarda ETag, Last-Modified e o hash do texto normalizado de cada URL. No
+refresh de uma análise o fetch é condicional: um 304 ou um hash igual ao
+anterior significa que nada mudou e o pipeline de LLM inteiro é pulado.
+"""
+import asyncio
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from .. import models
+from .scraper import FetchResult, fetch_page, text_hash
+
+
+def get_snapshot(db: Session, url: str) -> Optional[models.PageSnapshot]:
+    return db.query(models.PageSnapshot).filter(models.PageSnapshot.url == url).first()
+
+
+def save_snapshot(
+    db: Session,
+    url: str,
+    result: FetchResult,
+    analysis_id: Optional[int] = None,
+) -> models.PageSnapshot:
+    """Atualiza (ou cria) o snapshot com o resultado de um fetch. Não faz commit."""
+    snapshot = get_snapshot(db, url)
+    now = datetime.utcnow()
+    if snapshot is None:
+        snapshot = models.PageSnapshot(url=url, fetched_at=now)
+        db.add(snapshot)
+
+    snapshot.etag = result.etag
+    snapshot.last_modified = result.last_modified
+    snapshot.checked_at = now
+    if not result.not_modified:
+        snapshot.content_hash = result.content_hash
+        snapshot.fetched_at = now
+    if analysis_id is not None:
+        snapshot.analysis_id = analysis_id
+    return snapshot
+
+
+async def refresh_fetch(db: Session, analysis: models.PageAnalysis) -> Optional[FetchResult]:
+    """Busca de novo a página de uma análise existente.
+
+    Returns:
+        None se o conteúdo não mudou (304 ou mesmo hash de texto),
+        ou o FetchResult com o novo conteúdo caso contrário.
+    """
+    # Queries da sessão síncrona em thread: não travam o event loop
+    snapshot = await asyncio.to_thread(get_snapshot, db, analysis.url)
+    result = await fetch_page(
+        analysis.url,
+        etag=snapshot.etag if snapshot else None,
+        last_modified=snapshot.last_modified if snapshot else None,
+    )
+
+    return await asyncio.to_thread(check_unchanged, db, analysis, result, snapshot)
+
+
+def check_unchanged(
+    db: Session,
+    analysis: models.PageAnalysis,
+    result: FetchResult,
+    snapshot: Optional[models.PageSnapshot] = None,
+) -> Optional[FetchResult]:
+    """Registra o fetch no snapshot e devolve None se o conteúdo não mudou."""
+    snapshot = snapshot or get_snapshot(db, analysis.url)
+    # Sem snapshot (análises antigas), compara com o texto armazenado
+    previous_hash = snapshot.content_hash if snapshot and snapshot.content_hash else text_hash(analysis.raw_text or "")
+    unchanged = result.not_modified or result.content_hash == previous_hash
+
+    saved = save_snapshot(db, analysis.url, result, analysis_id=analysis.id)
+    if unchanged:
+        saved.content_hash = saved.content_hash or previous_hash
+        db.commit()
+        return None
+    return result
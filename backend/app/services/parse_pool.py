@@ -0,0 +1,108 @@
+"""
+Pool de processos para parsing de HTML (CPU-bound)
+
+O parsing de páginas grandes bloqueava o event loop do worker inteiro.
+Aqui o trabalho é despachado para um ProcessPoolExecutor gerenciado, com
+bytes na entrada e texto/estruturas simples na saída. Páginas pequenas
+continuam sendo processadas inline, onde o custo de IPC não compensa.
+"""
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..config import settings
+from .boilerplate import MainContent, extract_main_content
+from .html_text import extract_text, extract_text_and_links
+from .tech_fingerprint import Headers, detect_technologies, header_pairs
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+_stats: Dict[str, int] = {
+    "queued": 0,      # tarefas submetidas ao pool ainda não concluídas
+    "submitted": 0,
+    "completed": 0,
+    "failed": 0,
+    "inline": 0,
+}
+
+
+def _pool_size() -> int:
+    if settings.PARSE_POOL_WORKERS > 0:
+        return settings.PARSE_POOL_WORKERS
+    # Deixa um núcleo livre para o event loop
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+def start_pool() -> None:
+    """Cria o pool de processos (chamado no startup da aplicação)."""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=_pool_size(),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        print(f"🧵 Pool de parsing iniciado com {_pool_size()} processos")
+
+
+def shutdown_pool() -> None:
+    """Encerra o pool de processos (chamado no shutdown da aplicação)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Métricas do pool: profundidade da fila e contadores."""
+    return {
+        **_stats,
+        "workers": _pool_size() if _executor is not None else 0,
+        "running": _executor is not None,
+        "inline_threshold_bytes": settings.PARSE_INLINE_THRESHOLD_BYTES,
+    }
+
+
+async def run_parse(fn: Callable[..., Any], content: bytes, *args: Any) -> Any:
+    """Executa `fn(content, *args)` no pool, ou inline se a página for pequena.
+
+    `fn` precisa ser uma função de módulo (picklável) que recebe bytes.
+    """
+    if _executor is None or len(content) < settings.PARSE_INLINE_THRESHOLD_BYTES:
+        _stats["inline"] += 1
+        return fn(content, *args)
+
+    loop = asyncio.get_running_loop()
+    _stats["queued"] += 1
+    _stats["submitted"] += 1
+    try:
+        result = await loop.run_in_executor(_executor, partial(fn, content, *args))
+        _stats["completed"] += 1
+        return result
+    except Exception:
+        _stats["failed"] += 1
+        raise
+    finally:
+        _stats["queued"] -= 1
+
+
+async def html_to_text(content: bytes, encoding: Optional[str] = None) -> Tuple[str, str]:
+    """Extrai (título, texto) de bytes HTML fora do event loop."""
+    return await run_parse(extract_text, content, encoding)
+
+
+async def html_to_text_and_links(content: bytes, encoding: Optional[str] = None) -> Tuple[str, str, List[str]]:
+    """Extrai (título, texto, links) de bytes HTML fora do event loop."""
+    return await run_parse(extract_text_and_links, content, encoding)
+
+
+async def html_to_main_content(content: bytes, encoding: Optional[str] = None) -> MainContent:
+    """Extrai o conteúdo principal (sem boilerplate) de bytes HTML fora do event loop."""
+    return await run_parse(extract_main_content, content, encoding)
+
+
+async def html_technologies(content: bytes, headers: Optional[Headers] = None) -> List[Dict[str, str]]:
+    """Detecta a stack do site (HTML bruto + headers) fora do event loop."""
+    return await run_parse(detect_technologies, content, header_pairs(headers))
@@ -0,0 +1,206 @@
+"""
+Pipeline de análise modelado como DAG de estágios
+
+Cada estágio declara de quais outros depende; o executor dispara todos de uma
+vez e cada um só espera as próprias dependências, então estágios
+independentes (resumo x sentiment, mercado x estratégia) rodam em paralelo.
+O tempo de cada estágio é registrado para acompanhar onde a latência está.
+
+Textos longos passam antes por um estágio "digest" (map-reduce em pedaços,
+services/long_document.py). Com ANALYSIS_MODE="fused", depois do digest
+vem um único estágio que produz tudo em uma chamada
+(services/fused_analysis.py).
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from ..config import settings
+from .fused_analysis import analyze_fused
+from .llm import analyze_sentiment, summarize_main
+from .llm_providers import llm_enabled
+from .long_document import condense_text
+from .market_analysis import analyze_market_trends, generate_sales_strategy
+
+
+StageFn = Callable[[Dict[str, Any]], Awaitable[Any]]
+ProgressCallback = Callable[[str, Dict[str, Any]], None]
+
+
+@dataclass
+class Stage:
+    """Estágio do DAG: recebe os resultados das dependências por nome."""
+    name: str
+    run: StageFn
+    deps: Tuple[str, ...] = ()
+
+
+@dataclass
+class AnalysisOutput:
+    """Saída consolidada do pipeline de análise."""
+    summary: Optional[str]
+    key_points: List[str]
+    entities: Dict[str, Any]
+    timings: Dict[str, Any] = field(default_factory=dict)
+
+
+def _check_dag(stages: List[Stage]) -> None:
+    """Valida nomes únicos, dependências existentes e ausência de ciclos."""
+    names = [stage.name for stage in stages]
+    if len(set(names)) != len(names):
+        raise ValueError("Nomes de estágio duplicados no pipeline")
+    deps = {stage.name: set(stage.deps) for stage in stages}
+    for name, required in deps.items():
+        missing = required - deps.keys()
+        if missing:
+            raise ValueError(f"Estágio '{name}' depende de estágios inexistentes: {sorted(missing)}")
+
+    resolved: set = set()
+    while len(resolved) < len(deps):
+        ready = {name for name, required in deps.items() if name not in resolved and required <= resolved}
+        if not ready:
+            raise ValueError("Dependências cíclicas no pipeline")
+        resolved |= ready
+
+
+async def run_dag(
+    stages: List[Stage],
+    on_stage: Optional[ProgressCallback] = None,
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Executa os estágios com a máxima concorrência permitida pelas dependências.
+
+    Args:
+        stages: Estágios do DAG (a ordem da lista não importa)
+        on_stage: Callback chamado com (nome, timing) ao fim de cada estágio
+
+    Returns:
+        Tupla (resultados por estágio, timings). Se um estágio falhar, os
+        demais são cancelados e a exceção é propagada.
+    """
+    _check_dag(stages)
+    started = time.perf_counter()
+    timings: Dict[str, Dict[str, int]] = {}
+    tasks: Dict[str, asyncio.Task] = {}
+
+    async def run_stage(stage: Stage) -> Any:
+        inputs = {dep: await tasks[dep] for dep in stage.deps}
+        stage_started = time.perf_counter()
+        result = await stage.run(inputs)
+        timings[stage.name] = {
+            "start_ms": int((stage_started - started) * 1000),
+            "duration_ms": int((time.perf_counter() - stage_started) * 1000),
+        }
+        if on_stage:
+            on_stage(stage.name, timings[stage.name])
+        return result
+
+    # As tasks só começam a rodar no próximo await, então todas existem antes
+    # de qualquer estágio procurar suas dependências em `tasks`
+    for stage in stages:
+        tasks[stage.name] = asyncio.create_task(run_stage(stage))
+    try:
+        values = await asyncio.gather(*tasks.values())
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        raise
+
+    total_ms = int((time.perf_counter() - started) * 1000)
+    return dict(zip(tasks.keys(), values)), {
+        "stages": timings,
+        "total_ms": total_ms,
+        # Soma dos estágios: quanto levaria rodando tudo em sequência
+        "sequential_ms": sum(t["duration_ms"] for t in timings.values()),
+    }
+
+
+def _digest_stage(raw_text: str, digest: Optional[str]) -> Stage:
+    async def reuse(_: Dict[str, Any]) -> str:
+        return digest
+
+    return Stage("digest", reuse if digest is not None else lambda _: condense_text(raw_text))
+
+
+def analysis_stages(raw_text: str, digest: Optional[str] = None) -> List[Stage]:
+    """DAG do /analyze: resumo e sentiment só dependem do texto (condensado,
+    se for longo); mercado e estratégia dependem das entidades extraídas no
+    resumo. `digest` reaproveita um texto já condensado."""
+    def summary_entities(inputs: Dict[str, Any]) -> Dict[str, Any]:
+        return inputs["summary"].get("entities", {})
+
+    return [
+        _digest_stage(raw_text, digest),
+        Stage("summary", lambda inputs: summarize_main(inputs["digest"]), ("digest",)),
+        Stage("sentiment", lambda inputs: analyze_sentiment(inputs["digest"]), ("digest",)),
+        Stage("market", lambda inputs: analyze_market_trends(summary_entities(inputs)), ("summary",)),
+        Stage("strategy", lambda inputs: generate_sales_strategy(summary_entities(inputs)), ("summary",)),
+    ]
+
+
+def _output(llm_out: Dict[str, Any], market: Dict[str, Any], strategy: Dict[str, Any], timings: Dict[str, Any]) -> AnalysisOutput:
+    entities = {
+        **llm_out.get("entities", {}),
+        "market_analysis": market,
+        "sales_strategy": strategy,
+        "sentiment_analysis": llm_out.get("sentiment_analysis", {}),
+        "market_context": llm_out.get("market_context", {}),
+        "sales_insights": llm_out.get("sales_insights", {}),
+        "risk_assessment": llm_out.get("risk_assessment", {})
+    }
+    return AnalysisOutput(
+        summary=llm_out.get("summary"),
+        key_points=llm_out.get("key_points", []),
+        entities=entities,
+        timings=timings,
+    )
+
+
+async def _run_fused(
+    raw_text: str,
+    on_stage: Optional[ProgressCallback],
+) -> Tuple[Optional[AnalysisOutput], str]:
+    """Modo fused: digest + um estágio só. Retorna (saída ou None se a
+    resposta não validou no schema, texto condensado)."""
+    results, timings = await run_dag([
+        _digest_stage(raw_text, None),
+        Stage("fused", lambda inputs: analyze_fused(inputs["digest"]), ("digest",)),
+    ])
+    fused = results["fused"]
+    if fused is None:
+        return None, results["digest"]
+    # Só anuncia o estágio depois de validado (senão o modo multi ainda vai rodar)
+    if on_stage:
+        on_stage("fused", timings["stages"]["fused"])
+    timings["mode"] = "fused"
+    print(f"⏱️ Pipeline de análise (fused) em {timings['total_ms']} ms")
+    return _output(fused, fused["market_analysis"], fused["sales_strategy"], timings), results["digest"]
+
+
+async def run_analysis_pipeline(
+    raw_text: str,
+    on_stage: Optional[ProgressCallback] = None,
+    mode: Optional[str] = None,
+) -> AnalysisOutput:
+    """Roda o pipeline completo de LLM sobre o texto de uma página.
+
+    Args:
+        raw_text: Texto da página (ou do site, no modo crawl)
+        on_stage: Callback de fim de estágio
+        mode: "multi" ou "fused" (padrão: ANALYSIS_MODE). Sem LLM configurado
+            vale sempre o multi, que cai na análise heurística.
+    """
+    mode = (mode or settings.ANALYSIS_MODE).lower()
+    digest = None
+    if mode == "fused" and llm_enabled():
+        output, digest = await _run_fused(raw_text, on_stage)
+        if output is not None:
+            return output
+        print("↩️ Modo fused sem resposta válida; usando o modo multi")
+
+    results, timings = await run_dag(analysis_stages(raw_text, digest), on_stage=on_stage)
+    timings["mode"] = "multi"
+    llm_out = {**results["summary"], **results["sentiment"]}
+    stages = ", ".join(f"{name}={t['duration_ms']}ms" for name, t in timings["stages"].items())
+    print(f"⏱️ Pipeline de análise em {timings['total_ms']} ms (sequencial seria {timings['sequential_ms']} ms): {stages}")
+    return _output(llm_out, results["market"], results["strategy"], timings)
@@ -6,7 +6,7 @@ import json
 from typing import List, Dict, Any, Tuple
 from datetime import datetime
 from ..config import settings
-import openai
+from .llm_client import chat_completion
 
 
 class RAGEvaluator:
@@ -49,7 +49,8 @@ class RAGEvaluator:
         """
         
         try:
-            response = await openai.ChatCompletion.acreate(
+            response = await chat_completion(
+                "rag_eval.retriever",
                 model=self.evaluator_model,
                 messages=[{"role": "user", "content": evaluation_prompt}],
                 temperature=0.2
@@ -100,7 +101,8 @@ class RAGEvaluator:
         """
         
         try:
-            response = await openai.ChatCompletion.acreate(
+            response = await chat_completion(
+                "rag_eval.generator",
                 model=self.evaluator_model,
                 messages=[{"role": "user", "content": evaluation_prompt}],
                 temperature=0.2
@@ -1,25 +1,116 @@
-from typing import Tuple
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import hashlib
 import httpx
-from bs4 import BeautifulSoup
 
+from ..config import settings
+from .parse_pool import html_technologies, html_to_main_content, html_to_text
 
-async def fetch_url(url: str, timeout_s: int = 20) -> Tuple[str, str]:
-    """Baixa HTML de uma URL e extrai título e texto limpo.
 
-    - Usa httpx com User-Agent para evitar bloqueios básicos
-    - Remove tags script/style/noscript
-    - Retorna texto truncado para evitar payloads muito grandes
+@dataclass
+class FetchResult:
+    """Resultado de um fetch (possivelmente condicional) de página."""
+    url: str
+    status_code: int
+    title: str = ""
+    text: str = ""
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[str] = None
+    full_chars: int = 0                  # tamanho do texto antes da remoção de boilerplate
+    blocks: List[str] = field(default_factory=list)
+    technologies: List[Dict[str, str]] = field(default_factory=list)  # detectadas no HTML/headers
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status_code == 304
+
+    @property
+    def shrink_ratio(self) -> float:
+        """Fração do texto da página que sobrou após remover boilerplate."""
+        return round(len(self.text) / self.full_chars, 3) if self.full_chars else 1.0
+
+    def extraction_stats(self) -> Dict[str, Any]:
+        return {
+            "full_chars": self.full_chars,
+            "main_chars": len(self.text),
+            "shrink_ratio": self.shrink_ratio,
+        }
+
+
+def text_hash(text: str) -> str:
+    """Hash estável do texto normalizado (espaços colapsados)."""
+    normalized = " ".join((text or "").split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+async def fetch_page(
+    url: str,
+    timeout_s: int = 20,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+) -> FetchResult:
+    """Baixa uma página, enviando validadores de cache quando disponíveis.
+
+    Com `etag`/`last_modified` envia If-None-Match/If-Modified-Since; se o
+    servidor responder 304 o resultado volta sem texto (`not_modified`).
     """
-    async with httpx.AsyncClient(timeout=timeout_s, headers={"User-Agent": "Mozilla/5.0"}) as client:
+    headers = {"User-Agent": "Mozilla/5.0"}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    async with httpx.AsyncClient(timeout=timeout_s, headers=headers, follow_redirects=True) as client:
         resp = await client.get(url)
+        validators = {
+            "etag": resp.headers.get("etag") or etag,
+            "last_modified": resp.headers.get("last-modified") or last_modified,
+        }
+        if resp.status_code == 304:
+            return FetchResult(url=str(resp.url), status_code=304, **validators)
+
         resp.raise_for_status()
-        html = resp.text
-        soup = BeautifulSoup(html, "html.parser")
-        # Remove script e style para limpar o texto
-        for tag in soup(["script", "style", "noscript"]):
-            tag.decompose()
-        title = soup.title.string.strip() if soup.title and soup.title.string else None
-        text = " ".join(soup.get_text(separator=" ").split())
-        return title or "", text[:200000]  # limite de segurança
+        # Texto e stack em paralelo (em páginas grandes, os dois no pool de parsing)
+        (title, text, full_chars, blocks), technologies = await asyncio.gather(
+            extract_page_text(resp.content, resp.encoding),
+            html_technologies(resp.content, resp.headers),
+        )
+        text = text[:200000]  # limite de segurança
+        result = FetchResult(
+            url=str(resp.url),
+            status_code=resp.status_code,
+            title=title,
+            text=text,
+            content_hash=text_hash(text),
+            full_chars=full_chars,
+            blocks=blocks,
+            technologies=technologies,
+            **validators,
+        )
+        print(f"✂️ Conteúdo principal de {url}: {full_chars} → {len(text)} caracteres (razão {result.shrink_ratio})")
+        return result
 
 
+async def extract_page_text(content: bytes, encoding: Optional[str]) -> Tuple[str, str, int, List[str]]:
+    """Extrai (título, texto, tamanho original, blocos) respeitando BOILERPLATE_REMOVAL."""
+    if not settings.BOILERPLATE_REMOVAL:
+        title, text = await html_to_text(content, encoding)
+        return title, text, len(text), []
+    main = await html_to_main_content(content, encoding)
+    return main.title, main.text, main.full_chars, main.blocks
+
+
+async def fetch_url(url: str, timeout_s: int = 20) -> Tuple[str, str]:
+    """Baixa HTML de uma URL e extrai título e texto limpo.
+
+    - Usa httpx com User-Agent para evitar bloqueios básicos
+    - Remove tags script/style/noscript em streaming (sem montar árvore DOM)
+    - Detecta a stack do site no HTML bruto e nos headers (services/tech_fingerprint.py)
+    - Descarta boilerplate (menus, rodapés, banners de cookies) por densidade de texto/links
+    - Parsing de páginas grandes roda no pool de processos (não bloqueia o loop)
+    - Retorna texto truncado para evitar payloads muito grandes
+    """
+    result = await fetch_page(url, timeout_s=timeout_s)
+    return result.title, result.text
@@ -0,0 +1,130 @@
+"""
+Tokenizador de seções das respostas em texto do LLM
+
+Os prompts de resumo (services/llm.py) e de relatório detalhado pedem
+respostas divididas em seções, com títulos Markdown ("## RESUMO EXECUTIVO",
+"### 🔧 STACK TECNOLÓGICO") ou no formato "=== TÍTULO ===". `SectionIndex`
+percorre o texto uma única vez com uma regex pré-compilada, anota o offset de
+cada título e onde o seu conteúdo termina (no próximo título "##"/"==="), e
+as seções são recortadas por offset, sem novas buscas no texto.
+"""
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+
+# Linha de título Markdown ("## Título", 1 a 6 #) ou "=== Título ===". A
+# regex começa por "\n" porque o `re` acha um prefixo literal muito mais
+# rápido do que testa "^" em cada posição; a primeira linha do texto, que
+# não tem "\n" antes, é testada à parte com `_HEADING_START`.
+_HEADING_LINE = re.compile(r"\n[ \t]*(?:(#{1,6})[ \t]+|={3,})([^\n]*)")
+_HEADING_START = re.compile(r"[ \t]*(?:(#{1,6})[ \t]+|={3,})([^\n]*)")
+
+# Título sem marcação de seção: "**Título**" ou linha curta sem minúsculas
+# ("ANÁLISE DE MERCADO:"), que o LLM às vezes usa quando esquece o formato.
+_BOLD_LINE = re.compile(r"\*\*([^*\n]+)\*\*:?")
+_LINE = re.compile(r"[^\n]+")
+MAX_UNMARKED_TITLE_CHARS = 80
+
+
+@dataclass
+class Section:
+    title: str
+    start: int        # início da linha do título
+    body_start: int   # primeira posição após a linha do título
+    end: int = 0      # início do próximo título que encerra seções
+    boundary: bool = True  # "##"+ e "===" encerram a seção anterior; "#" e títulos sem marcação não
+
+
+class SectionIndex:
+    """Títulos de um texto, indexados em uma varredura."""
+
+    def __init__(self, text: str):
+        self.text = text = text or ""
+        self.sections: List[Section] = []
+        self._by_title: Dict[str, Section] = {}
+        # Linhas candidatas a título sem marcação (só calculadas se pedidas)
+        self._unmarked: Optional[List[Tuple[str, str, int, int]]] = None
+
+        headings = list(_HEADING_LINE.finditer(text))
+        first = _HEADING_START.match(text)
+        if first:
+            headings.insert(0, first)
+        sections = self.sections
+        by_title = self._by_title
+        for match in headings:
+            hashes, rest = match.groups()
+            # O título começa após o "\n" casado (exceto na primeira linha)
+            # e o corpo, após o "\n" que encerra a linha do título
+            start = match.start() if match is first else match.start() + 1
+            section = Section(rest.strip(" \t\r#="), start, match.end() + 1, 0, hashes is None or len(hashes) >= 2)
+            sections.append(section)
+            key = section.title.upper()
+            previous = by_title.get(key)
+            if previous is None or (section.boundary and not previous.boundary):
+                by_title[key] = section
+
+        # Cada seção vai até o próximo título de fronteira
+        next_boundary = len(text)
+        if sections:
+            sections[-1].body_start = min(sections[-1].body_start, next_boundary)
+        for section in reversed(sections):
+            section.end = next_boundary
+            if section.boundary:
+                next_boundary = section.start
+
+    def _next_boundary(self, position: int) -> int:
+        return next((s.start for s in self.sections if s.boundary and s.start >= position), len(self.text))
+
+    def _unmarked_titles(self) -> List[Tuple[str, str, int, int]]:
+        """Linhas curtas em negrito ou sem minúsculas, na ordem do texto:
+        (linha em maiúsculas, título, início da linha, início do corpo).
+
+        Calculadas uma vez por texto, na primeira busca que precisar delas."""
+        if self._unmarked is None:
+            text = self.text
+            self._unmarked = []
+            for match in _LINE.finditer(text):
+                line = match.group().strip()
+                if not line or len(line) > MAX_UNMARKED_TITLE_CHARS:
+                    continue
+                bold = _BOLD_LINE.fullmatch(line)
+                if bold or line.isupper():
+                    title = bold.group(1).strip() if bold else line
+                    self._unmarked.append((line.upper(), title, match.start(), min(match.end() + 1, len(text))))
+        return self._unmarked
+
+    def _find_unmarked(self, name: str) -> Optional[Section]:
+        """Linha curta só com `name` em negrito ou sem minúsculas."""
+        wanted = name.upper()
+        for line, title, start, body_start in self._unmarked_titles():
+            if wanted in line:
+                return Section(title, start, body_start, self._next_boundary(body_start), boundary=False)
+        return None
+
+    def find(self, name: str, prefix: bool = False, unmarked: bool = False) -> Optional[Section]:
+        """Primeira seção cujo título contém `name` (ou começa com ele, se
+        `prefix`), sem diferenciar maiúsculas. Títulos "##"/"===" têm
+        preferência sobre "#"; com `unmarked`, se nenhum título bater, aceita
+        uma linha em negrito ou em maiúsculas que contenha `name`."""
+        wanted = name.upper()
+        exact = self._by_title.get(wanted)
+        if exact is not None and exact.boundary:
+            return exact
+        fallback = None
+        for title, section in self._by_title.items():
+            if title.startswith(wanted) if prefix else wanted in title:
+                if section.boundary:
+                    return section
+                if fallback is None:
+                    fallback = section
+        if fallback is None and unmarked:
+            fallback = self._find_unmarked(name)
+        return fallback
+
+    def body(self, name: str, prefix: bool = False, unmarked: bool = False) -> Optional[str]:
+        """Conteúdo da seção (sem o título), ou None se não existir."""
+        section = self.find(name, prefix, unmarked)
+        if section is None:
+            return None
+        return self.text[section.body_start:section.end].strip()
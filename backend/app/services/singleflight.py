@@ -0,0 +1,143 @@
+"""
+Single-flight: uma única execução por chave, mesmo com chamadas concorrentes
+
+Dentro do processo, chamadas com a mesma chave aguardam o mesmo future em vez
+de repetir o trabalho. Entre processos (vários workers do uvicorn), uma linha
+de claim no banco faz o mesmo papel: quem não consegue inserir a linha espera
+o dono terminar e então reaproveita o resultado gravado.
+"""
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Awaitable, Callable, Dict, Generic, Tuple, TypeVar
+
+from sqlalchemy.exc import IntegrityError
+
+from .. import models
+from ..config import settings
+from ..database import SessionLocal
+
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """Agrupa chamadas concorrentes com a mesma chave em uma única execução."""
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Future] = {}
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._calls
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """Executa `fn` ou aguarda a execução em andamento para `key`.
+
+        Returns:
+            Tupla (resultado, compartilhado). `compartilhado` é True quando o
+            resultado veio da execução de outro chamador.
+        """
+        while key in self._calls:
+            future = self._calls[key]
+            try:
+                # shield: o cancelamento de um seguidor não cancela o líder
+                return await asyncio.shield(future), True
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # Líder foi cancelado: o próximo da fila assume a execução
+
+        future = asyncio.get_running_loop().create_future()
+        # Marca a exceção como consumida mesmo se ninguém estiver esperando
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._calls[key] = future
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            self._calls.pop(key, None)
+
+
+class ClaimTimeout(Exception):
+    """Outro processo segurou o claim por mais tempo que o permitido."""
+
+
+def _try_claim(key: str, token: str) -> bool:
+    """Insere a linha de claim; rouba o claim se o anterior expirou."""
+    db = SessionLocal()
+    now = datetime.utcnow()
+    try:
+        db.add(models.AnalysisClaim(
+            key=key,
+            token=token,
+            claimed_at=now,
+            expires_at=now + timedelta(seconds=settings.ANALYSIS_CLAIM_TTL_S),
+        ))
+        try:
+            db.commit()
+            return True
+        except IntegrityError:
+            db.rollback()
+        # Dono anterior morreu sem liberar: o claim expirado pode ser tomado
+        stolen = db.query(models.AnalysisClaim).filter(
+            models.AnalysisClaim.key == key,
+            models.AnalysisClaim.expires_at < now,
+        ).update(
+            {
+                models.AnalysisClaim.token: token,
+                models.AnalysisClaim.claimed_at: now,
+                models.AnalysisClaim.expires_at: now + timedelta(seconds=settings.ANALYSIS_CLAIM_TTL_S),
+            },
+            synchronize_session=False,
+        )
+        db.commit()
+        return stolen == 1
+    finally:
+        db.close()
+
+
+def _release_claim(key: str, token: str) -> None:
+    db = SessionLocal()
+    try:
+        db.query(models.AnalysisClaim).filter(
+            models.AnalysisClaim.key == key,
+            models.AnalysisClaim.token == token,
+        ).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+@asynccontextmanager
+async def db_claim(key: str) -> AsyncIterator[bool]:
+    """Segura o claim de `key` no banco enquanto o bloco executa.
+
+    Yields:
+        True se foi preciso esperar outro processo liberar o claim (nesse
+        caso o chamador deve verificar se o resultado já foi gravado).
+
+    Raises:
+        ClaimTimeout: se o claim não for obtido em ANALYSIS_CLAIM_TTL_S
+    """
+    token = uuid.uuid4().hex
+    waited = False
+    deadline = asyncio.get_running_loop().time() + settings.ANALYSIS_CLAIM_TTL_S + settings.ANALYSIS_CLAIM_POLL_S
+    # Claim em sessão síncrona curta, numa thread (fora do event loop)
+    while not await asyncio.to_thread(_try_claim, key, token):
+        waited = True
+        if asyncio.get_running_loop().time() > deadline:
+            raise ClaimTimeout(f"Claim de '{key}' ocupado por outro worker")
+        await asyncio.sleep(settings.ANALYSIS_CLAIM_POLL_S)
+    try:
+        yield waited
+    finally:
+        await asyncio.to_thread(_release_claim, key, token)
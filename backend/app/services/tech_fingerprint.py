@@ -0,0 +1,273 @@
+"""
+Detecção de tecnologias por regras (estilo Wappalyzer) no momento do fetch
+
+O HTML bruto e os headers da resposta têm os sinais mais fortes da stack de
+um site (host e nome dos scripts, meta generator, cookies, Server e
+X-Powered-By), que somem quando a página vira texto. As regras abaixo são
+compiladas uma vez:
+
+- uma regex extrai as tags <script>/<link>/<meta> do HTML (e os primeiros
+  bytes de cada script inline, onde ficam os snippets de analytics); só
+  esses poucos KB passam pelos padrões "assets", em vez de testar cada
+  regra na página inteira;
+- meta generator, headers e cookies são consultas em dict.
+
+O resultado é determinístico e sai em menos de 1 ms numa página comum (sem
+LLM); em páginas de MBs a extração das tags passa de dezenas de ms, e por
+isso o fetch chama a detecção pelo pool de parsing (services/parse_pool.py).
+"""
+import re
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+# nome -> regras. Todas as regex em minúsculas (a evidência é normalizada):
+#   assets:  padrões buscados nos atributos das tags script/link/meta e início dos scripts inline
+#   meta:    conteúdo do <meta name="generator">
+#   headers: header da resposta -> regex do valor
+#   cookies: prefixos de nomes de cookie
+#   implies: tecnologias implicadas pela detecção
+TECHNOLOGY_RULES: Dict[str, Dict[str, Any]] = {
+    # CMS e e-commerce
+    "WordPress": {"category": "CMS", "assets": (r"/wp-(?:content|includes)/",), "meta": r"wordpress",
+                  "cookies": ("wordpress_", "wp-settings-"), "implies": ("PHP",)},
+    "WooCommerce": {"category": "E-commerce", "assets": (r"/plugins/woocommerce/", r"woocommerce_params"),
+                    "cookies": ("woocommerce_",), "implies": ("WordPress",)},
+    "Drupal": {"category": "CMS", "assets": (r"/sites/(?:all|default)/(?:themes|modules|files)/", r"drupal-settings-json"),
+               "meta": r"drupal", "headers": {"x-generator": r"drupal"}, "implies": ("PHP",)},
+    "Joomla": {"category": "CMS", "assets": (r"/media/(?:jui|system)/js/",), "meta": r"joomla", "implies": ("PHP",)},
+    "Wix": {"category": "CMS", "assets": (r"static\.parastorage\.com", r"static\.wixstatic\.com"),
+            "meta": r"wix\.com", "headers": {"x-wix-request-id": r""}},
+    "Squarespace": {"category": "CMS", "assets": (r"static1?\.squarespace\.com", r"assets\.squarespace\.com"),
+                    "meta": r"squarespace"},
+    "Webflow": {"category": "CMS", "assets": (r"assets\.website-files\.com", r"assets-global\.website-files\.com"),
+                "meta": r"webflow"},
+    "Ghost": {"category": "CMS", "assets": (r"/ghost/", r"ghost-(?:portal|search)"), "meta": r"ghost"},
+    "HubSpot CMS": {"category": "CMS", "headers": {"x-hs-hub-id": r""}, "meta": r"hubspot"},
+    "Shopify": {"category": "E-commerce", "assets": (r"cdn\.shopify\.com", r"shopify\.theme"),
+                "headers": {"x-shopid": r""}, "cookies": ("_shopify_",)},
+    "Magento": {"category": "E-commerce", "assets": (r"/static/version\d+/frontend/", r"mage/cookies"),
+                "cookies": ("x-magento-vary",), "implies": ("PHP",)},
+    "VTEX": {"category": "E-commerce", "assets": (r"vteximg\.com\.br", r"vtexassets\.com", r"\.vtex\.com\.br"),
+             "headers": {"x-vtex-cache-status": r""}, "cookies": ("vtex_",)},
+    "Nuvemshop": {"category": "E-commerce", "assets": (r"d26lpennugtm8s\.cloudfront\.net", r"nuvemshop", r"tiendanube")},
+    "Tray": {"category": "E-commerce", "assets": (r"tcdn\.com\.br", r"traycorp", r"tray\.com\.br")},
+    # Geradores de site estático e documentação
+    "Hugo": {"category": "Gerador de site estático", "meta": r"hugo"},
+    "Jekyll": {"category": "Gerador de site estático", "meta": r"jekyll"},
+    "Gatsby": {"category": "Gerador de site estático", "assets": (r"/page-data/", r"___gatsby"),
+               "meta": r"gatsby", "implies": ("React",)},
+    "Docusaurus": {"category": "Gerador de site estático", "meta": r"docusaurus", "implies": ("React",)},
+    "mdBook": {"category": "Gerador de site estático", "assets": (r"\"book(?:-[0-9a-f]{8})?\.js", r"/book(?:-[0-9a-f]{8})?\.js"),
+               "meta": r"mdbook"},
+    # Frameworks JavaScript
+    "Next.js": {"category": "Framework JavaScript", "assets": (r"/_next/static/", r"__next_data__"),
+                "headers": {"x-powered-by": r"next\.js"}, "implies": ("React",)},
+    "Nuxt.js": {"category": "Framework JavaScript", "assets": (r"/_nuxt/", r"window\.__nuxt__"), "implies": ("Vue.js",)},
+    "React": {"category": "Framework JavaScript", "assets": (r"react(?:-dom)?(?:\.production)?(?:\.min)?\.js",)},
+    "Vue.js": {"category": "Framework JavaScript", "assets": (r"vue(?:\.runtime)?(?:\.global)?(?:\.prod)?(?:\.min)?\.js",)},
+    "Angular": {"category": "Framework JavaScript", "assets": (r"angular(?:\.min)?\.js", r"zone\.js")},
+    "SvelteKit": {"category": "Framework JavaScript", "assets": (r"/_app/immutable/",), "implies": ("Svelte",)},
+    "Svelte": {"category": "Framework JavaScript"},
+    "Alpine.js": {"category": "Framework JavaScript", "assets": (r"alpinejs", r"alpine(?:\.min)?\.js")},
+    "jQuery": {"category": "Biblioteca JavaScript", "assets": (r"jquery(?:-\d[\w.]*)?(?:\.min)?\.js", r"code\.jquery\.com")},
+    # UI
+    "Bootstrap": {"category": "Framework de UI", "assets": (r"bootstrap(?:\.bundle)?(?:\.min)?\.(?:css|js)",)},
+    "Tailwind CSS": {"category": "Framework de UI", "assets": (r"tailwind(?:css)?[\w.-]*\.(?:css|js)", r"cdn\.tailwindcss\.com")},
+    "Font Awesome": {"category": "Fontes", "assets": (r"font-?awesome", r"kit\.fontawesome\.com")},
+    "Google Fonts": {"category": "Fontes", "assets": (r"fonts\.googleapis\.com", r"fonts\.gstatic\.com")},
+    "highlight.js": {"category": "Biblioteca JavaScript", "assets": (r"highlight(?:-[0-9a-f]{8})?(?:\.min)?\.js", r"/highlightjs/")},
+    "Elasticlunr": {"category": "Busca", "assets": (r"elasticlunr",)},
+    "Algolia": {"category": "Busca", "assets": (r"algolia(?:search|net)", r"docsearch")},
+    # Analytics e marketing
+    "Google Tag Manager": {"category": "Analytics", "assets": (r"googletagmanager\.com/gtm\.js", r"gtm-[a-z0-9]{4,}")},
+    "Google Analytics": {"category": "Analytics", "assets": (r"google-analytics\.com", r"googletagmanager\.com/gtag/js", r"gtag\("),
+                         "cookies": ("_ga",)},
+    "Meta Pixel": {"category": "Marketing", "assets": (r"connect\.facebook\.net/[\w_]+/fbevents\.js", r"fbq\(")},
+    "Hotjar": {"category": "Analytics", "assets": (r"static\.hotjar\.com", r"hotjar\.com/c/hotjar"), "cookies": ("_hj",)},
+    "Microsoft Clarity": {"category": "Analytics", "assets": (r"clarity\.ms/tag",)},
+    "Segment": {"category": "Analytics", "assets": (r"cdn\.segment\.(?:com|io)/analytics\.js",)},
+    "Mixpanel": {"category": "Analytics", "assets": (r"cdn\.mxpnl\.com", r"mixpanel\.init")},
+    "HubSpot": {"category": "Marketing", "assets": (r"js\.hs-scripts\.com", r"js\.hsforms\.net", r"js\.hs-analytics\.net"),
+                "cookies": ("hubspotutk", "__hstc")},
+    "RD Station": {"category": "Marketing", "assets": (r"d335luupugsy2\.cloudfront\.net", r"rdstation")},
+    "Intercom": {"category": "Chat", "assets": (r"widget\.intercom\.io", r"js\.intercomcdn\.com"), "cookies": ("intercom-",)},
+    "Zendesk": {"category": "Chat", "assets": (r"static\.zdassets\.com", r"zopim")},
+    "Crisp": {"category": "Chat", "assets": (r"client\.crisp\.chat",)},
+    "Tawk.to": {"category": "Chat", "assets": (r"embed\.tawk\.to",)},
+    "reCAPTCHA": {"category": "Segurança", "assets": (r"google\.com/recaptcha", r"recaptcha/api\.js")},
+    # Pagamentos
+    "Stripe": {"category": "Pagamentos", "assets": (r"js\.stripe\.com",), "cookies": ("__stripe_",)},
+    "Mercado Pago": {"category": "Pagamentos", "assets": (r"sdk\.mercadopago\.com", r"mercadopago")},
+    "PagSeguro": {"category": "Pagamentos", "assets": (r"pagseguro",)},
+    # Servidores, hospedagem e CDN
+    "Cloudflare": {"category": "CDN", "headers": {"server": r"cloudflare", "cf-ray": r""}, "cookies": ("__cf_bm", "__cflb")},
+    "Amazon CloudFront": {"category": "CDN", "headers": {"x-amz-cf-id": r"", "via": r"cloudfront"}},
+    "Fastly": {"category": "CDN", "headers": {"x-served-by": r"cache-", "x-fastly-request-id": r""}},
+    "Akamai": {"category": "CDN", "headers": {"x-akamai-transformed": r"", "server": r"akamaighost"}},
+    "Vercel": {"category": "Hospedagem", "headers": {"server": r"vercel", "x-vercel-id": r""}},
+    "Netlify": {"category": "Hospedagem", "headers": {"server": r"netlify", "x-nf-request-id": r""}},
+    "GitHub Pages": {"category": "Hospedagem", "headers": {"server": r"github\.com"}},
+    "Amazon S3": {"category": "Hospedagem", "headers": {"server": r"amazons3"}},
+    "Heroku": {"category": "Hospedagem", "headers": {"via": r"vegur"}},
+    "Nginx": {"category": "Servidor web", "headers": {"server": r"nginx"}},
+    "Apache": {"category": "Servidor web", "headers": {"server": r"apache"}},
+    "Microsoft IIS": {"category": "Servidor web", "headers": {"server": r"microsoft-iis"}},
+    "LiteSpeed": {"category": "Servidor web", "headers": {"server": r"litespeed"}},
+    "Gunicorn": {"category": "Servidor web", "headers": {"server": r"gunicorn"}, "implies": ("Python",)},
+    "Uvicorn": {"category": "Servidor web", "headers": {"server": r"uvicorn"}, "implies": ("Python",)},
+    # Linguagens e frameworks de backend
+    "PHP": {"category": "Linguagem", "headers": {"x-powered-by": r"php"}, "cookies": ("phpsessid",)},
+    "Python": {"category": "Linguagem", "headers": {"server": r"python/"}},
+    "Laravel": {"category": "Framework web", "cookies": ("laravel_session",), "implies": ("PHP",)},
+    "Django": {"category": "Framework web", "cookies": ("csrftoken", "django_language"),
+               "implies": ("Python",)},
+    "Ruby on Rails": {"category": "Framework web", "assets": (r"name=\"csrf-param\" content=\"authenticity_token\"",),
+                      "headers": {"x-runtime": r""}, "cookies": ("_rails_",)},
+    "Express": {"category": "Framework web", "headers": {"x-powered-by": r"express"}, "implies": ("Node.js",)},
+    "Node.js": {"category": "Linguagem"},
+    "ASP.NET": {"category": "Framework web", "headers": {"x-powered-by": r"asp\.net", "x-aspnet-version": r""},
+                "cookies": ("asp.net_sessionid", ".aspxauth")},
+}
+
+# Tags que carregam os sinais; dos scripts inline só o começo interessa
+# (snippets de analytics são curtos, JSON de estado pode ter megabytes)
+_TAG = re.compile(rb"<(script|link|meta)\b([^>]*)>", re.IGNORECASE)
+INLINE_SCRIPT_PEEK_BYTES = 2048
+_META_GENERATOR = re.compile(r"name=[\"']?generator[\"']?[^>]*?content=[\"']([^\"']*)|content=[\"']([^\"']*)[\"'][^>]*name=[\"']?generator")
+
+
+def _compile_headers() -> Dict[str, List[Any]]:
+    """header -> [(tecnologia, regex do valor)]; regex vazia só exige o header."""
+    by_header: Dict[str, List[Any]] = {}
+    for name, rule in TECHNOLOGY_RULES.items():
+        for header, pattern in rule.get("headers", {}).items():
+            by_header.setdefault(header, []).append((name, re.compile(pattern)))
+    return by_header
+
+
+_NAMES = list(TECHNOLOGY_RULES)
+# Um padrão por alternativa: cada um começa por um literal, que o `re` acha
+# com busca rápida; numa alternância única esse atalho se perde e cada
+# posição do texto testa todas as regras (~20x mais lento)
+_ASSETS = [(name, re.compile(pattern)) for name, rule in TECHNOLOGY_RULES.items() for pattern in rule.get("assets", ())]
+_META = [(name, re.compile(rule["meta"])) for name, rule in TECHNOLOGY_RULES.items() if rule.get("meta")]
+_HEADERS = _compile_headers()
+_COOKIES = [(prefix, name) for name, rule in TECHNOLOGY_RULES.items() for prefix in rule.get("cookies", ())]
+
+
+def _evidence_text(content: bytes) -> str:
+    """Atributos das tags script/link/meta e início dos scripts inline."""
+    parts: List[bytes] = []
+    for match in _TAG.finditer(content):
+        parts.append(match.group(2))
+        if match.group(1).lower() == b"script":
+            end = content.find(b"</", match.end(), match.end() + INLINE_SCRIPT_PEEK_BYTES)
+            parts.append(content[match.end():end if end != -1 else match.end() + INLINE_SCRIPT_PEEK_BYTES])
+    return b"\n".join(parts).decode("utf-8", errors="replace").lower()
+
+
+# Headers da resposta: httpx.Headers, dict ou lista de pares (nome, valor)
+Headers = Union[Mapping[str, str], Sequence[Tuple[str, str]]]
+
+
+def header_pairs(headers: Optional[Headers]) -> List[Tuple[str, str]]:
+    """Headers como pares (nome em minúsculas, valor), com chaves repetidas.
+
+    A lista é picklável: é assim que os headers vão para o pool de parsing."""
+    if not headers:
+        return []
+    # httpx.Headers repete chaves (set-cookie); dict comum tem uma por chave
+    if hasattr(headers, "multi_items"):
+        items = headers.multi_items()
+    elif hasattr(headers, "items"):
+        items = headers.items()
+    else:
+        items = headers
+    return [(key.lower(), value) for key, value in items]
+
+
+def _cookie_names(header_items: Iterable[Any]) -> List[str]:
+    return [
+        value.split("=", 1)[0].strip().lower()
+        for key, value in header_items
+        if key == "set-cookie"
+    ]
+
+
+def detect_technologies(content: bytes, headers: Optional[Headers] = None) -> List[Dict[str, str]]:
+    """Tecnologias do site a partir do HTML bruto e dos headers da resposta.
+
+    Returns:
+        Lista de {"name", "category", "evidence"} na ordem de TECHNOLOGY_RULES
+        (tecnologias implicadas trazem "implicado por <origem>").
+    """
+    found: Dict[str, str] = {}
+
+    evidence = _evidence_text(content or b"")
+    for name, pattern in _ASSETS:
+        if name not in found:
+            match = pattern.search(evidence)
+            if match:
+                found[name] = f"html: {match.group()[:80]}"
+
+    if "generator" in evidence:
+        for generator in _META_GENERATOR.finditer(evidence):
+            value = generator.group(1) or generator.group(2) or ""
+            for name, pattern in _META:
+                if pattern.search(value):
+                    found.setdefault(name, f"meta generator: {value[:80]}")
+
+    header_items = header_pairs(headers)
+    for key, value in header_items:
+        for name, pattern in _HEADERS.get(key, ()):
+            if pattern.search(value.lower()):
+                found.setdefault(name, f"header {key}: {value[:80]}")
+    for cookie in _cookie_names(header_items):
+        for prefix, name in _COOKIES:
+            if cookie.startswith(prefix):
+                found.setdefault(name, f"cookie: {cookie}")
+
+    # Implicações (WooCommerce -> WordPress -> PHP), até estabilizar
+    pending = list(found)
+    while pending:
+        origin = pending.pop()
+        for implied in TECHNOLOGY_RULES[origin].get("implies", ()):
+            if implied not in found:
+                found[implied] = f"implicado por {origin}"
+                pending.append(implied)
+
+    return [
+        {"name": name, "category": TECHNOLOGY_RULES[name]["category"], "evidence": found[name]}
+        for name in _NAMES
+        if name in found
+    ]
+
+
+def merge_technologies(groups: Iterable[Sequence[Dict[str, str]]]) -> List[Dict[str, str]]:
+    """União das detecções de várias páginas (a primeira evidência vale)."""
+    merged: Dict[str, Dict[str, str]] = {}
+    for technologies in groups:
+        for technology in technologies:
+            merged.setdefault(technology["name"], technology)
+    return [merged[name] for name in _NAMES if name in merged]
+
+
+# Valores que o LLM/analisador offline usam quando não acham nada
+_EMPTY_STACK = {"stack não especificado", "não especificado", "n/a", ""}
+
+
+def merge_tech_stack(technologies: Sequence[Dict[str, str]], llm_stack: Any) -> List[str]:
+    """`tech_stack` final: o que as regras detectaram primeiro, depois o que
+    o LLM citou a mais (sem repetir, ignorando maiúsculas)."""
+    if isinstance(llm_stack, str):
+        llm_stack = [llm_stack]
+    names = [technology["name"] for technology in technologies]
+    seen = {name.casefold() for name in names}
+    for item in llm_stack or []:
+        if not isinstance(item, str):
+            continue
+        key = item.strip().casefold()
+        if key in seen or (names and key in _EMPTY_STACK):
+            continue
+        seen.add(key)
+        names.append(item.strip())
+    return names
@@ -0,0 +1,52 @@
+"""
+Canonicalização de URLs para o cache de análises
+
+`https://acme.com`, `https://www.acme.com/` e `https://acme.com/?utm_source=x`
+são a mesma empresa. A chave canônica ignora esquema, `www.`, porta padrão,
+parâmetros de rastreamento, fragmento e barra final, e ordena a query.
+"""
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+
+# Parâmetros de campanha/rastreamento que não mudam o conteúdo da página
+TRACKING_PARAM_PATTERN = re.compile(
+    r"^(utm_\w+|gclid|gclsrc|dclid|fbclid|msclkid|yclid|twclid|igshid|mc_cid|mc_eid"
+    r"|_ga|_gl|_hsenc|_hsmi|hsctatracking|mkt_tok|ref|ref_src|referrer|trk|trkinfo)$",
+    re.I,
+)
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+_MULTI_SLASH = re.compile(r"/{2,}")
+
+
+def canonical_key(url: str) -> str:
+    """Chave canônica de uma URL (não é uma URL buscável: não tem esquema).
+
+    Ex.: "http://WWW.Acme.com/pricing/?utm_source=x&b=2&a=1#planos" vira
+    "acme.com/pricing?a=1&b=2".
+    """
+    raw = (url or "").strip()
+    if "://" not in raw:
+        raw = f"https://{raw}"
+    parts = urlsplit(raw)
+    scheme = parts.scheme.lower()
+
+    host = (parts.hostname or "").rstrip(".")
+    if host.startswith("www."):
+        host = host[4:]
+    try:
+        port = parts.port
+    except ValueError:  # porta inválida: mantém como veio
+        port = None
+    if port and port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+
+    path = _MULTI_SLASH.sub("/", parts.path or "").rstrip("/")
+    params = sorted(
+        (name, value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not TRACKING_PARAM_PATTERN.match(name)
+    )
+    query = f"?{urlencode(params)}" if params else ""
+    return f"{host}{path}{query}"
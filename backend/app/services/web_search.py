@@ -8,6 +8,8 @@ from bs4 import BeautifulSoup
 import json
 import re
 
+from .parse_pool import html_to_text, run_parse
+
 
 async def google_search(query: str, num_results: int = 5) -> List[Dict[str, Any]]:
     """
@@ -32,42 +34,48 @@ async def google_search(query: str, num_results: int = 5) -> List[Dict[str, Any]
             response = await client.get(search_url)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.text, 'html.parser')
-            results = []
-            
-            # Procura por divs de resultado do Google
-            search_results = soup.find_all('div', class_='g')
-            
-            for result in search_results[:num_results]:
-                try:
-                    # Extrai título
-                    title_elem = result.find('h3')
-                    title = title_elem.get_text() if title_elem else ""
-                    
-                    # Extrai URL
-                    link_elem = result.find('a')
-                    url = link_elem['href'] if link_elem and 'href' in link_elem.attrs else ""
-                    
-                    # Extrai snippet/descrição
-                    snippet_elem = result.find('div', class_=['VwiC3b', 'yXK7lf'])
-                    snippet = snippet_elem.get_text() if snippet_elem else ""
-                    
-                    if title and url:
-                        results.append({
-                            'title': title,
-                            'url': url,
-                            'snippet': snippet
-                        })
-                except Exception as e:
-                    continue
-            
-            return results
+            # Parsing do HTML do Google roda fora do event loop
+            return await run_parse(_parse_google_results, response.content, response.encoding, num_results)
             
     except Exception as e:
         print(f"Erro ao buscar no Google: {e}")
         return []
 
 
+def _parse_google_results(content: bytes, encoding: str, num_results: int) -> List[Dict[str, Any]]:
+    """Extrai {title, url, snippet} da página de resultados do Google (roda no pool)."""
+    soup = BeautifulSoup(content.decode(encoding or "utf-8", errors="replace"), 'html.parser')
+    results = []
+    
+    # Procura por divs de resultado do Google
+    search_results = soup.find_all('div', class_='g')
+    
+    for result in search_results[:num_results]:
+        try:
+            # Extrai título
+            title_elem = result.find('h3')
+            title = title_elem.get_text() if title_elem else ""
+            
+            # Extrai URL
+            link_elem = result.find('a')
+            url = link_elem['href'] if link_elem and 'href' in link_elem.attrs else ""
+            
+            # Extrai snippet/descrição
+            snippet_elem = result.find('div', class_=['VwiC3b', 'yXK7lf'])
+            snippet = snippet_elem.get_text() if snippet_elem else ""
+            
+            if title and url:
+                results.append({
+                    'title': title,
+                    'url': url,
+                    'snippet': snippet
+                })
+        except Exception:
+            continue
+    
+    return results
+
+
 async def duckduckgo_search(query: str, num_results: int = 5) -> List[Dict[str, Any]]:
     """
     Busca alternativa usando DuckDuckGo (mais simples e sem bloqueios).
@@ -142,15 +150,8 @@ async def scrape_url_content(url: str) -> str:
             response = await client.get(url)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Remove scripts e styles
-            for tag in soup(['script', 'style', 'noscript']):
-                tag.decompose()
-            
-            # Extrai texto limpo
-            text = soup.get_text(separator=' ', strip=True)
-            text = ' '.join(text.split())  # Remove espaços extras
+            # Extrai texto limpo (ignora scripts, styles e noscript)
+            _, text = await html_to_text(response.content, response.encoding)
             
             return text[:5000]  # Limita tamanho
             
@@ -0,0 +1,11 @@
+"""
+Configuração comum dos testes: torna o pacote `app` importável quando o
+pytest roda de fora de backend/.
+"""
+import pathlib
+import sys
+
+
+BACKEND_DIR = str(pathlib.Path(__file__).resolve().parents[1])
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
@@ -0,0 +1,89 @@
+"""
+Lote maior que o pool de conexões síncrono (5 + 10) não pode esgotá-lo.
+
+Fetch e pipeline de LLM são substituídos por versões falsas com latência,
+para que várias análises fiquem em andamento ao mesmo tempo; o banco é um
+SQLite temporário com o mesmo pool do engine da aplicação.
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.database import Base
+from app.services import analysis_runner, bulk_analysis, singleflight
+from app.services.pipeline import AnalysisOutput
+from app.services.scraper import FetchResult
+
+
+URLS = 40
+
+
+class Peak:
+    """Quantos estão em andamento agora e o máximo observado."""
+
+    def __init__(self):
+        self.current = self.peak = 0
+
+    def enter(self, *_):
+        self.current += 1
+        self.peak = max(self.peak, self.current)
+
+    def exit(self, *_):
+        self.current -= 1
+
+
+@pytest.fixture
+def bulk_db(monkeypatch, tmp_path):
+    """Engine SQLite temporário no lugar do SessionLocal da aplicação."""
+    # pool_timeout curto: pool esgotado vira falha no lote em vez de travar o teste
+    engine = create_engine(f"sqlite:///{tmp_path / 'bulk.db'}", pool_size=5, max_overflow=10, pool_timeout=2)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr(bulk_analysis, "SessionLocal", session_factory)
+    monkeypatch.setattr(singleflight, "SessionLocal", session_factory)
+    yield engine
+    engine.dispose()
+
+
+def test_bulk_larger_than_pool(monkeypatch, bulk_db):
+    fetches, pipelines, connections = Peak(), Peak(), Peak()
+
+    async def fake_fetch_page(url: str) -> FetchResult:
+        fetches.enter()
+        try:
+            await asyncio.sleep(0.05)
+        finally:
+            fetches.exit()
+        text = f"Empresa em {url} vende software B2B."
+        return FetchResult(url=url, status_code=200, title=url, text=text, full_chars=len(text), content_hash=url)
+
+    async def fake_pipeline(raw_text: str, on_stage=None, mode=None) -> AnalysisOutput:
+        pipelines.enter()
+        try:
+            await asyncio.sleep(0.1)
+        finally:
+            pipelines.exit()
+        return AnalysisOutput(summary="Resumo", key_points=["Ponto"], entities={"industry": "SaaS"})
+
+    monkeypatch.setattr(analysis_runner, "fetch_page", fake_fetch_page)
+    monkeypatch.setattr(analysis_runner, "run_analysis_pipeline", fake_pipeline)
+    event.listen(bulk_db, "checkout", connections.enter)
+    event.listen(bulk_db, "checkin", connections.exit)
+
+    async def run():
+        urls = [f"https://empresa-{n}.example.com" for n in range(URLS)]
+        return [item async for item in bulk_analysis.analyze_bulk(urls)]
+
+    items = asyncio.run(run())
+
+    summary = items[-1]["summary"]
+    failures = [item for item in items[:-1] if item["status"] == "failed"]
+    assert failures == []
+    assert summary["succeeded"] == URLS
+    # Cada fase respeita o próprio limite (e o de fetch é de fato atingido)
+    assert fetches.peak == settings.BULK_FETCH_CONCURRENCY
+    assert pipelines.peak <= settings.BULK_LLM_CONCURRENCY
+    assert connections.peak <= settings.BULK_ACTIVE_ANALYSES
@@ -0,0 +1,121 @@
+"""
+Respostas "golden" do parser de seções (services/section_parser.py).
+
+`_parse_output` e `extract_section` são comparados com saídas fixas e, no
+corpus do bench_section_parser, com os parsers anteriores (mesmas regras de
+comparação do script).
+"""
+import pytest
+
+from app.scripts.bench_section_parser import compare_report, compare_summary, report_samples, summary_samples
+from app.services.llm import _parse_output, extract_section
+from app.services.section_parser import SectionIndex
+
+
+SUMMARY_RESPONSE = """## RESUMO EXECUTIVO
+A Acme vende um CRM em nuvem para redes de varejo de médio porte.
+
+## ANÁLISE ESTRATÉGICA
+
+### 🎯 ICP (Ideal Customer Profile)
+**Setor:** Varejo
+
+### 🔧 STACK TECNOLÓGICO
+React, PostgreSQL e AWS.
+
+### 💡 INSIGHTS ESTRATÉGICOS
+Expansão para o México anunciada.
+
+## ENTIDADES ESTRUTURADAS
+```json
+{"industry": "Varejo", "sales_potential": "Alto"}
+```
+
+## SCORE DE PRIORIDADE
+85/100 - cliente com orçamento e dor clara.
+"""
+
+REPORT_RESPONSE = """=== RESUMO EXECUTIVO EXPANDIDO ===
+A Acme atende 120 lojas com um CRM em nuvem integrado a ERPs e gateways de pagamento.
+
+=== ANÁLISE DE MERCADO ===
+O varejo de médio porte digitaliza o atendimento; a concorrência é fragmentada e regional.
+# Concorrentes
+Três players locais, nenhum com integração nativa a ERPs.
+
+**OPORTUNIDADES DE VENDAS**
+Módulo de fidelidade para as 120 lojas e integração com o ERP que a Acme já usa hoje.
+
+ESTRATÉGIA DE ABORDAGEM:
+Começar pelo diretor de operações, com um piloto de 30 dias em cinco lojas da rede.
+
+=== INSIGHTS ADICIONAIS ===
+A estratégia de abordagem deve considerar a sazonalidade de fim de ano do varejo.
+"""
+
+
+def test_parse_output_golden():
+    assert _parse_output(SUMMARY_RESPONSE) == {
+        "summary": "A Acme vende um CRM em nuvem para redes de varejo de médio porte.",
+        "key_points": [
+            "🎯 ICP (Ideal Customer Profile): **Setor:** Varejo",
+            "🔧 STACK TECNOLÓGICO: React, PostgreSQL e AWS.",
+            # Última seção "###" antes de um "##": o parser antigo a perdia
+            "💡 INSIGHTS ESTRATÉGICOS: Expansão para o México anunciada.",
+            # Título "##" (o parser antigo só buscava "### SCORE DE PRIORIDADE")
+            "SCORE DE PRIORIDADE: 85/100 - cliente com orçamento e dor clara.",
+        ],
+        "entities": {"industry": "Varejo", "sales_potential": "Alto"},
+    }
+
+
+def test_parse_output_without_sections_uses_bullets():
+    text = "Empresa de software.\n- CRM em nuvem\n* 120 lojas\nTexto solto"
+    assert _parse_output(text) == {
+        "summary": text,
+        "key_points": ["CRM em nuvem", "120 lojas"],
+        "entities": {},
+    }
+
+
+@pytest.mark.parametrize("name, expected", [
+    # "#" e títulos sem marcação não encerram a seção "==="
+    ("ANÁLISE DE MERCADO",
+     "O varejo de médio porte digitaliza o atendimento; a concorrência é fragmentada e regional.\n"
+     "# Concorrentes\nTrês players locais, nenhum com integração nativa a ERPs.\n\n"
+     "**OPORTUNIDADES DE VENDAS**\n"
+     "Módulo de fidelidade para as 120 lojas e integração com o ERP que a Acme já usa hoje.\n\n"
+     "ESTRATÉGIA DE ABORDAGEM:\n"
+     "Começar pelo diretor de operações, com um piloto de 30 dias em cinco lojas da rede."),
+    # Títulos sem marcação vão até o próximo título de fronteira
+    ("OPORTUNIDADES DE VENDAS",
+     "Módulo de fidelidade para as 120 lojas e integração com o ERP que a Acme já usa hoje.\n\n"
+     "ESTRATÉGIA DE ABORDAGEM:\n"
+     "Começar pelo diretor de operações, com um piloto de 30 dias em cinco lojas da rede."),
+    # A menção no texto dos insights não é um título
+    ("ESTRATÉGIA DE ABORDAGEM",
+     "Começar pelo diretor de operações, com um piloto de 30 dias em cinco lojas da rede."),
+    ("INSIGHTS ADICIONAIS", "A estratégia de abordagem deve considerar a sazonalidade de fim de ano do varejo."),
+    ("STACK TECNOLÓGICO", "Seção STACK TECNOLÓGICO não encontrada no relatório gerado."),
+])
+def test_extract_section_golden(name, expected):
+    assert extract_section(REPORT_RESPONSE, name) == expected
+
+
+def test_index_prefers_boundary_titles():
+    index = SectionIndex("# Resumo\ncurto\n## RESUMO\ncompleto\n### Resumo executivo\ndetalhe")
+    assert index.body("resumo") == "completo"
+    assert index.find("resumo", prefix=True).title == "RESUMO"
+    assert index.body("inexistente", unmarked=True) is None
+
+
+@pytest.mark.parametrize("text", summary_samples())
+def test_summary_corpus_matches_legacy(text):
+    ok, note = compare_summary(text)
+    assert ok, note
+
+
+@pytest.mark.parametrize("text", report_samples())
+def test_report_corpus_matches_legacy(text):
+    ok, note = compare_report(text)
+    assert ok, note